@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+"""dhcp_range_lookup.py [range_count]
+
+Time DhcpRangeList.in_range for every address of a /16 with many ranges,
+with the addresses in ascending and in shuffled order, and compare with
+scanning the ranges from the start for each address, which is what lookups
+out of order used to cost.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+
+import sys
+import time
+import random
+import ipaddress
+
+import bluecat_bam
+
+
+def make_ranges(count):
+    """count DHCP4Range entities spread over 10.0.0.0/16"""
+    step = 65536 // count
+    ranges = []
+    for i in range(count):
+        start = ipaddress.IPv4Address("10.0.0.0") + i * step + 10
+        end = start + step // 2
+        ranges.append(
+            {
+                "id": 1000 + i,
+                "name": None,
+                "type": "DHCP4Range",
+                "properties": {"start": str(start), "end": str(end)},
+            }
+        )
+    return ranges
+
+
+def scan(range_list, ip):
+    """check each range from the start"""
+    for dhcp_range in range_list:
+        if dhcp_range["start"] <= ip <= dhcp_range["end"]:
+            return True
+    return False
+
+
+def timed(func, addresses):
+    """seconds to call func on each address, and how many were in a range"""
+    start = time.time()
+    found = sum(1 for ip in addresses if func(ip))
+    return time.time() - start, found
+
+
+def main():
+    """dhcp_range_lookup.py"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    network_obj = {"id": 1, "type": "IP4Network", "properties": {"CIDR": "10.0.0.0/16"}}
+    range_list = bluecat_bam.DhcpRangeList(make_ranges(count), network_obj)
+    ascending = list(ipaddress.IPv4Network("10.0.0.0/16"))
+    shuffled = list(ascending)
+    random.seed(1)
+    random.shuffle(shuffled)
+    print("%s addresses, %s ranges, seconds:" % (len(ascending), count))
+    for name, addresses in (("ascending", ascending), ("shuffled", shuffled)):
+        seconds, found = timed(range_list.in_range, addresses)
+        print("in_range, %-10s %8.3f  (%s in ranges)" % (name, seconds, found))
+    seconds, found = timed(lambda ip: scan(range_list, ip), shuffled)
+    print("scan,     %-10s %8.3f  (%s in ranges)" % ("shuffled", seconds, found))
+
+
+if __name__ == "__main__":
+    main()
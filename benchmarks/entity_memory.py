@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+"""entity_memory.py [count]
+
+Compare memory used by getEntities results as the usual nested dicts
+and as compact Entity objects (BAM(compact=True)), using a made-up
+list of IP4Address entities in the form the BAM returns them.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+
+import sys
+import json
+import tracemalloc
+
+import bluecat_bam
+
+
+def make_response(count):
+    """json text like a getEntities reply for IP4Address"""
+    entities = []
+    for i in range(count):
+        address = "10.%d.%d.%d" % (i >> 16 & 255, i >> 8 & 255, i & 255)
+        mac = "DE-AD-BE-EF-%02X-%02X" % (i >> 8 & 255, i & 255)
+        entities.append(
+            {
+                "id": 1000000 + i,
+                "name": "host%d" % (i),
+                "type": "IP4Address",
+                "properties": "address=%s|state=DHCP_RESERVED|macAddress=%s|"
+                "locationInherited=true|" % (address, mac),
+            }
+        )
+    return json.dumps(entities)
+
+
+def measure(conn, text, compact, split):
+    """bytes per entity after converting, and after reading the properties"""
+    obj = json.loads(text)
+    tracemalloc.start()
+    entities = conn.convert_response(obj, compact)
+    if split:
+        for entity in entities:
+            _ = entity["properties"]["state"]
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used / float(len(entities))
+
+
+def main():
+    """entity_memory.py"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    text = make_response(count)
+    conn = bluecat_bam.BAM.__new__(bluecat_bam.BAM)  # conversion needs no server
+    print("%s IP4Address entities, bytes per entity:" % (count))
+    print("dict, properties not read:   %6.0f" % measure(conn, text, False, False))
+    print("dict, properties read:       %6.0f" % measure(conn, text, False, True))
+    print("Entity (compact=True):       %6.0f" % measure(conn, text, True, True))
+
+
+if __name__ == "__main__":
+    main()
@@ -50,7 +50,12 @@ config.add_argument(
     "--file",
     "--filename",
     "-f",
-    help="filename (--file OR --ip and --mac can be used, but not both)",
+    help="filename (--file OR --ip and --mac can be used, but not both), "
+    + "with IP, MAC, and optional hostname on each line, "
+    + "results are printed as one JSON line each",
+)
+config.add_argument(
+    "--workers", type=int, default=8, help="concurrent requests with --file"
 )
 config.add_argument("--ip", "-i", "-a", "--address", help="ip address")
 config.add_argument(
@@ -90,10 +95,6 @@ if filename:
         print("--file cannot be used with --ip and --mac, use one or other")
         config.print_help()
         sys.exit(1)
-    else:
-        # read file here ****
-        print("code to read file not completed")
-        # ????
 elif not (ip and mac):
     print("either --file OR both ( --ip and --mac ) must be specified")
     config.print_help()
@@ -131,6 +132,42 @@ with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
     network_id = network_obj["id"]
     """
 
+    if filename:
+        operations = []
+        with open(filename) as fd:
+            for line in fd:
+                fields = line.replace(",", " ").split()
+                if len(fields) < 2 or fields[0].startswith("#"):
+                    continue
+                hostinfo = ""
+                if len(fields) > 2:
+                    hostinfo = ",".join(
+                        [
+                            fields[2],
+                            str(view_id),
+                            "reverseFlag=true",
+                            "sameAsZoneFlag=false",
+                        ]
+                    )
+                operations.append(
+                    (
+                        "assignIP4Address",
+                        {
+                            "method": "post",
+                            "configurationId": configuration_id,
+                            "ip4Address": fields[0],
+                            "macAddress": fields[1],
+                            "hostInfo": hostinfo,
+                            "action": "MAKE_DHCP_RESERVED",
+                            "properties": "",
+                        },
+                    )
+                )
+        writer = bluecat_bam.BulkWriter(conn, max_workers=args.workers, log=sys.stdout)
+        counts = writer.write_all(operations)
+        print("counts", json.dumps(counts), file=sys.stderr)
+        sys.exit(1 if counts.get("failed") else 0)
+
     if hostname:
         hostinfo_list = [
             hostname,
@@ -4,7 +4,6 @@
 count_states_by_network.py  network
 """
 
-
 # to be python2/3 compatible:
 from __future__ import print_function
 
@@ -13,6 +12,10 @@ import ipaddress
 
 import bluecat_bam
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 __progname__ = "count_states_by_network"
 __version__ = "0.1"
@@ -45,7 +48,7 @@ def main():
     logger.setLevel(args.logging)
 
     with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
-        (configuration_id, _) = conn.get_config_and_view(args.configuration)
+        configuration_id, _ = conn.get_config_and_view(args.configuration)
 
         network_obj_list = conn.get_obj_list(
             args.network, configuration_id, "IP4Network"
@@ -59,13 +62,10 @@ def main():
         for network in network_obj_list:
             networkid = network["id"]
             ip_obj_list = get_ip_list(networkid, conn)
-            ip_dict = {}
-            for ip in ip_obj_list:
-                ip_dict[ip["properties"]["address"]] = ip
 
             range_list = conn.get_dhcp_ranges(networkid)
             # print(range_list)
-            range_info_list = conn.make_dhcp_ranges_list(range_list)
+            range_info_list = bluecat_bam.DhcpRangeList(range_list, network)
             # print(range_info_list)
 
             # print(network)
@@ -75,7 +75,9 @@ def main():
             print("%s size of Network: %s\t%s" % (netsize, network["name"], cidr))
             print_dhcp_ranges(range_info_list)
 
-            (count_in, count_out) = count_network(network_net, range_info_list, ip_dict)
+            count_in, count_out = count_network(
+                network_net, range_info_list, ip_obj_list
+            )
             print_counts(count_in, count_out)
             print("")
 
@@ -92,53 +94,67 @@ def print_counts(count_in, count_out):
         print(location, count, state)
 
 
-def count_network(network_net, range_info_list, ip_dict):
-    """count states in a network"""
-    # in_range=False    # future - count in each range
-    # note that range_info_list is sorted
-    i = 0
-    (rangestart, rangeend) = get_info(i, range_info_list, network_net)
+def count_network(network_net, range_info_list, ip_obj_list):
+    """count states in a network,
+    range_info_list is a DhcpRangeList for the network"""
+    first = int(network_net.network_address)
+    last = int(network_net.broadcast_address)
+    if network_net.prefixlen < 31:  # same hosts as network_net.hosts()
+        first += 1
+        last -= 1
+    hosts = range(first, last + 1)
+    # state of each IP object, by integer address
+    states = {}
+    for ip in ip_obj_list:
+        address = int(ipaddress.ip_address(ip["properties"]["address"]))
+        states[address] = ip["properties"].get("state")
+    # check all hosts against the DHCP ranges at once
+    in_range, _ = range_info_list.contains_many(hosts)
+    if numpy is None or not isinstance(in_range, numpy.ndarray):
+        count_in = {}  # in DHCP ranges
+        count_out = {}  # out of DHCP ranges
+        for address, inside in zip(hosts, in_range):
+            state = states.get(address, "Free")
+            counts = count_in if inside else count_out
+            counts[state] = counts.get(state, 0) + 1
+        return (count_in, count_out)
+    return count_arrays(first, in_range, states)
+
+
+def count_arrays(first, in_range, states):
+    """count_network with numpy, in_range is a bool array for the hosts
+    from address first, states is a dict of integer address: state"""
+    names = sorted(set(states.values()), key=str)
+    codes = {name: code for code, name in enumerate(names)}
+    # host number and state code of each IP object
+    offsets = numpy.fromiter(states.keys(), dtype=numpy.int64, count=len(states))
+    offsets -= first
+    state_codes = numpy.fromiter(
+        (codes[state] for state in states.values()),
+        dtype=numpy.int64,
+        count=len(states),
+    )
+    # IP objects outside the hosts are not counted, like the network address
+    known = (offsets >= 0) & (offsets < len(in_range))
+    inside = numpy.zeros(len(offsets), dtype=bool)
+    inside[known] = in_range[offsets[known]]
+    hosts_in = int(numpy.count_nonzero(in_range))
     count_in = {}  # in DHCP ranges
     count_out = {}  # out of DHCP ranges
-    for ip in network_net.hosts():
-        entity = ip_dict.get(str(ip))
-        if entity:
-            prop = ip_dict[str(ip)].get("properties")
-            if prop:
-                state = prop.get("state")
-            else:
-                state = "noprop"
-        else:
-            state = "Free"
-        # check if in a DHCP range
-        while ip > rangeend:
-            i += 1
-            (rangestart, rangeend) = get_info(i, range_info_list, network_net)
-        if ip >= rangestart:  # in range
-            if count_in.get(state):
-                count_in[state] += 1
-            else:
-                count_in[state] = 1
-        else:  # not in a DHCP range
-            if count_out.get(state):
-                count_out[state] += 1
-            else:
-                count_out[state] = 1
+    for counts, selected, hosts in (
+        (count_in, known & inside, hosts_in),
+        (count_out, known & ~inside, len(in_range) - hosts_in),
+    ):
+        tally = numpy.bincount(state_codes[selected], minlength=len(names))
+        for name, count in zip(names, tally):
+            if count:
+                counts[name] = int(count)
+        free = hosts - int(tally.sum())
+        if free:
+            counts["Free"] = counts.get("Free", 0) + free
     return (count_in, count_out)
 
 
-def get_info(i, range_info_list, network_net):
-    """get the info on this dhcp_range"""
-    if i < len(range_info_list):
-        range_info = range_info_list[i]
-        rangestart = range_info["start"]
-        rangeend = range_info["end"]
-    else:
-        rangestart = network_net.broadcast_address
-        rangeend = rangestart
-    return (rangestart, rangeend)
-
-
 def print_dhcp_ranges(range_info_list):
     """print dhcp ranges"""
     for x in range_info_list:
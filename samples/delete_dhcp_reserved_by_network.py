@@ -9,6 +9,7 @@ delete_dhcp_reserved_by_network.py < list-of-networkIP
 # to be python2/3 compatible:
 from __future__ import print_function
 
+import sys
 import logging
 
 import bluecat_bam
@@ -18,37 +19,15 @@ __progname__ = "delete_dhcp_reserved_by_network"
 __version__ = "0.1"
 
 
-def get_bam_api_list(conn, apiname, **kwargs):
-    """wrap api call with loop to handle 'start' and 'count'"""
-    if not kwargs["count"]:
-        kwargs["count"] = 1000
-    if not kwargs["start"]:
-        kwargs["start"] = 0
-    count = kwargs["count"]
-    replysize = count
-    listall = []
-    start = 0
-    while replysize == count:
-        kwargs["start"] = start
-        listone = conn.do(apiname, **kwargs)
-        replysize = len(listone)
-        start += replysize
-        # print(replysize)
-        listall.extend(listone)
-    return listall
-
-
 def get_dhcp_reserved(networkid, conn):
     """get list of entities"""
     logger = logging.getLogger()
     # ip_list = conn.do(
-    ip_list = get_bam_api_list(
-        conn,
+    ip_list = conn.get_bam_api_list(
         "getEntities",
         parentId=networkid,
         type="IP4Address",
-        start=0,
-        count=1000,
+        count="auto",
     )
     logger.info(ip_list)
     reserved_list = [
@@ -92,6 +71,7 @@ def main():
     configuration_name = args.configuration
     object_ident = args.object_ident
     rangetype = ""
+    failed = 0
 
     with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
         configuration_obj = conn.do(
@@ -110,11 +90,22 @@ def main():
             entityId = entity["id"]
 
             reserved_list = get_dhcp_reserved(entityId, conn)
-            for ip in reserved_list:
+            results = conn.do_many(
+                ("delete", {"objectId": ip["id"]}) for ip in reserved_list
+            )
+            for ip, result in zip(reserved_list, results):
                 print_ip(ip)
-                result = conn.do("delete", objectId=ip["id"])
-                if result:
+                if isinstance(result, Exception):
+                    failed += 1
+                    print(
+                        "delete failed: %s: %s" % (type(result).__name__, result),
+                        file=sys.stderr,
+                    )
+                elif result:
                     print("result: ", result)
+    if failed:
+        print("%s deletes failed" % (failed), file=sys.stderr)
+        sys.exit(1)
 
 
 def print_ip(ip):
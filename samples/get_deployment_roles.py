@@ -235,8 +235,13 @@ def main():
         for server in final_dns_obj_list:
             prop = server["properties"]
             roles = conn.do("getServerDeploymentRoles", serverId=server["id"])
-            for role in roles:
-                entity = conn.do("getEntityById", id=role["entityId"])
+            entities = conn.do_many(
+                ("getEntityById", {"id": role["entityId"]}) for role in roles
+            )
+            for role, entity in zip(roles, entities):
+                if isinstance(entity, Exception):
+                    print("ERROR - failed to get entity", role["entityId"], entity)
+                    continue
                 # print(entity)
                 if entity["type"] in ("Zone"):  # pylint: disable=C0325
                     print(
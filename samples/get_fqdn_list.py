@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+"""get_fqdn_list.py config view type file_of_domain_names"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+
+import sys
+import json
+import logging
+
+import bluecat_bam
+
+
+config = bluecat_bam.BAM.argparsecommon(
+    "Get fully qualified domain name objects for a list of names"
+)
+config.add_argument(
+    "--type",
+    help="DNS record type, like HostRecord, AliasRecord, TXTRecord, GenericRecord, etc"
+    + " or Entity to get all types",
+    default="Entity",
+)
+config.add_argument(
+    "name_file", help="file with one DNS domain name or hostname per line, or '-'"
+)
+args = config.parse_args()
+
+logger = logging.getLogger()
+logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
+logger.setLevel(args.logging)
+
+configuration_name = args.configuration
+view_name = args.view
+record_type = args.type
+name_file = args.name_file
+
+if not (configuration_name and view_name and record_type and name_file):
+    config.print_help()
+    sys.exit(1)
+
+if name_file == "-":
+    names = [line.strip() for line in sys.stdin if line.strip()]
+else:
+    with open(name_file) as f:
+        names = [line.strip() for line in f if line.strip()]
+
+with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
+
+    (configuration_id, view_id) = conn.get_config_and_view(
+        configuration_name, view_name
+    )
+
+    results = conn.resolve_fqdns(names, view_id, record_type)
+
+    for name, entities in results.items():
+        if not entities:
+            print("not found", name)
+        for entity in entities:
+            print(json.dumps(entity))
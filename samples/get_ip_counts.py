@@ -7,7 +7,6 @@ from __future__ import print_function
 
 import os
 import sys
-import json
 import argparse
 import logging
 import ipaddress
@@ -64,46 +63,14 @@ if not start_id:
 
 with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
 
-    block_list = []
-    network_list = []
-    parent_id = start_id
-
-    while True:
-        blocks = conn.do(
-            "getEntities",
-            method="get",
-            parentId=parent_id,
-            type="IP4Block",
-            start=0,
-            count=1000,
-        )
-        if blocks:
-            block_list.extend(blocks)
-            # print("got blocks",json.dumps(blocks))
-
-        networks = conn.do(
-            "getEntities", parentId=parent_id, type="IP4Network", start=0, count=1000
-        )
-        if networks:
-            network_list.extend(networks)
-            # print("got networks",json.dumps(networks))
-
-        # print('block list now',json.dumps(block_list))
-        # print("network list now",json.dumps(network_list))
-        if block_list:
-            parent_obj = block_list.pop()
-            parent_id = parent_obj.get("id")
-            # print('new parent id',parent_id)
-            if parent_id == 0:
-                print("ERROR - block id is zero, block is", json.dumps(parent_obj))
-                print("block list", json.dumps(block_list))
-                sys.exit(1)
-        else:
-            # print('block list empty')
-            break
+    network_list = [
+        entity
+        for _, _, entity in conn.walk_tree(start_id)
+        if entity["type"] == "IP4Network"
+    ]
 
     # print("results")
-    ip_totals = {"ip_empty": 0}
+    ip_totals = {"empty": 0}
     for network_obj in network_list:
         # print('network_obj',json.dumps(network_obj))
         # print(network_obj.get('id'),network_obj.get('name'),
@@ -118,35 +85,9 @@ with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
 
         network_id = network_obj.get("id")
 
-        def getlist(action, **kwargs):
-            """auto-update start and count to get whole list"""
-            count = kwargs.get("count")
-            if count:
-                if count == -1:
-                    countflag = True
-                    kwargs["count"] = 1000
-                else:
-                    countflag = False
-            else:
-                countflag = True
-                kwargs["count"] = 1000
-
-            if not kwargs.get("start"):
-                kwargs["start"] = 0
-            start = 0
-            result_list = []
-            while True:
-                kwargs["start"] = start
-                newlist = conn.do(action, **kwargs)
-                result_list.extend(newlist)
-                if len(newlist) < kwargs["count"]:
-                    break
-                start += 1000
-                if not countflag:
-                    break
-            return result_list
-
-        ip_list = getlist("getEntities", parentId=network_id, type="IP4Address")
+        ip_list = conn.get_bam_api_list(
+            "getEntities", parentId=network_id, type="IP4Address", count="auto"
+        )
 
         print("num ip", len(ip_list))
         ip_counts = {}
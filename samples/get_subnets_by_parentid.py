@@ -7,7 +7,6 @@ from __future__ import print_function
 
 import os
 import sys
-import json
 import argparse
 import logging
 
@@ -65,43 +64,11 @@ if not start_id:
 
 with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
 
-    block_list = []
-    network_list = []
-    parent_id = start_id
-
-    while True:
-        blocks = conn.do(
-            "getEntities",
-            method="get",
-            parentId=parent_id,
-            type="IP4Block",
-            start=0,
-            count=1000,
-        )
-        if blocks:
-            block_list.extend(blocks)
-            # print("got blocks",json.dumps(blocks))
-
-        networks = conn.do(
-            "getEntities", parentId=parent_id, type="IP4Network", start=0, count=1000
-        )
-        if networks:
-            network_list.extend(networks)
-            # print("got networks",json.dumps(networks))
-
-        # print('block list now',json.dumps(block_list))
-        # print("network list now",json.dumps(network_list))
-        if block_list:
-            parent_obj = block_list.pop()
-            parent_id = parent_obj.get("id")
-            # print('new parent id',parent_id)
-            if parent_id == 0:
-                print("ERROR - block id is zero, block is", json.dumps(parent_obj))
-                print("block list", json.dumps(block_list))
-                sys.exit(1)
-        else:
-            # print('block list empty')
-            break
+    network_list = [
+        entity
+        for _, _, entity in conn.walk_tree(start_id)
+        if entity["type"] == "IP4Network"
+    ]
 
     # print("results")
     for network_obj in network_list:
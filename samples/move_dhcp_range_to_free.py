@@ -4,7 +4,6 @@
 move_dhcp_range_to_free.py network-or-filename size [--offset nn]
 """
 
-
 # to be python2/3 compatible:
 from __future__ import print_function
 
@@ -12,7 +11,7 @@ import logging
 import ipaddress
 
 import bluecat_bam
-
+from bluecat_bam.intervals import IntervalSet
 
 __progname__ = "move_dhcp_range_to_free"
 __version__ = "0.1"
@@ -47,7 +46,7 @@ def main():
     offset = int(args.offset)
 
     with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
-        (configuration_id, _) = conn.get_config_and_view(args.configuration)
+        configuration_id, _ = conn.get_config_and_view(args.configuration)
 
         obj_list = conn.get_obj_list(network_ident, configuration_id, rangetype)
         logger.info("obj_list: %s", obj_list)
@@ -107,6 +106,8 @@ def do_dhcp_ranges(network_obj, conn, size, offset):  # pylint: disable=R0914
             start = lowest_active
 
     start, end = find_open_space(offset, network_ip, broadcast_ip, ip_dict, size)
+    if start is None:
+        return
     add_update_range(range_obj, conn, networkid, start, end)
     # print resulting range
     range_list = conn.get_dhcp_ranges(networkid)
@@ -115,44 +116,22 @@ def do_dhcp_ranges(network_obj, conn, size, offset):  # pylint: disable=R0914
 
 
 def find_open_space(offset, network_ip, broadcast_ip, ip_dict, size):
-    """search for open space to fit range"""
+    """search for open space to fit range,
+    where only DHCP_ALLOCATED and STATIC IP's may be in the range"""
     if not offset:
         offset = 5
-    start = network_ip + offset
-    ip = start
-    mysize = 0
-    while ip < broadcast_ip:
-        # print("checking",ip)
-        obj = ip_dict.get(ip)
-        if obj:
-            # print("found",obj)
-            state = obj["properties"]["state"]
-            if state in ("DHCP_ALLOCATED", "STATIC"):
-                mysize += 1
-                if mysize >= size:
-                    end = ip
-                    break
-                # else
-                ip += 1
-                continue
-            # else:
-            ip += 1
-            start = ip
-            mysize = 0
-            continue
-        # else
-        mysize += 1
-        if mysize >= size:
-            end = ip
-            break
-        ip += 1
-
-    else:  # end of while goes here
+    taken = IntervalSet.from_values(
+        ip
+        for ip, obj in ip_dict.items()
+        if obj["properties"]["state"] not in ("DHCP_ALLOCATED", "STATIC")
+    )
+    space = IntervalSet([(network_ip + offset, broadcast_ip - 1)]) - taken
+    run = space.first_fit(size)
+    if run is None:
         print("no room for range found")
         return None, None
-    # break jumps to here
-    # print("new range start", start, "end", end)
-    return start, end
+    # print("new range start", run[0], "end", run[1])
+    return type(network_ip)(run[0]), type(network_ip)(run[1])
 
 
 def get_ip_dict(conn, networkid):
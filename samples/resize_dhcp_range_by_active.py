@@ -5,7 +5,6 @@ resize_dhcp_range_by_active.py network-or-filename offset free
 [--checkonly] [--activeonly]
 """
 
-
 # to be python2/3 compatible:
 from __future__ import print_function
 
@@ -13,7 +12,7 @@ import logging
 import ipaddress
 
 import bluecat_bam
-
+from bluecat_bam.intervals import IntervalSet
 
 __progname__ = "resize_dhcp_range_by_active"
 __version__ = "0.1"
@@ -63,7 +62,7 @@ def main():
     offset = int(args.offset)
 
     with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
-        (configuration_id, _) = conn.get_config_and_view(args.configuration)
+        configuration_id, _ = conn.get_config_and_view(args.configuration)
 
         obj_list = conn.get_obj_list(object_ident, configuration_id, rangetype)
         logger.info("obj_list: %s", obj_list)
@@ -164,15 +163,9 @@ def add_free(start, end, free, ip_dict, network_ip, broadcast_ip):
     """expand range to match desired free"""
     logger = logging.getLogger()
     # count active in range
-    active = 0
-    current_free = 0
-    ip = start
-    while ip <= end:
-        if ip_dict.get(ip):
-            active += 1
-        else:
-            current_free += 1
-        ip += 1
+    active_set = IntervalSet.from_values(ip_dict)
+    active = (active_set & IntervalSet([(start, end)])).size()
+    current_free = max(int(end) - int(start) + 1, 0) - active
     logger.info("active in range %s, free %s", active, current_free)
     diff = free - current_free
     logger.info("desired free %s, current free %s, diff %s", free, current_free, diff)
@@ -184,7 +177,7 @@ def add_free(start, end, free, ip_dict, network_ip, broadcast_ip):
     # try to increase the range at the end
     ip = end
     step = 1
-    ip, diff, active = expand_range(ip, step, limit1, limit2, diff, active, ip_dict)
+    ip, diff, active = expand_range(ip, step, limit1, limit2, diff, active, active_set)
     end = ip
     range_size = int(end) - int(start) + 1
     logger.info(
@@ -194,7 +187,7 @@ def add_free(start, end, free, ip_dict, network_ip, broadcast_ip):
     # try to increase the range at the start
     ip = start
     step = -1
-    ip, diff, active = expand_range(ip, step, limit1, limit2, diff, active, ip_dict)
+    ip, diff, active = expand_range(ip, step, limit1, limit2, diff, active, active_set)
     start = ip
     range_size = int(end) - int(start) + 1
     logger.info(
@@ -213,25 +206,38 @@ def get_ip_dict(conn, networkid):
     return ip_dict
 
 
-def expand_range(ip, step, limit1, limit2, diff, active, ip_dict):
-    """returns ip, diff, active"""
+def expand_range(ip, step, limit1, limit2, diff, active, active_set):
+    """returns ip, diff, active,
+    after moving ip by step until diff more free IP's are passed,
+    staying between limit1 and limit2"""
     logger = logging.getLogger()
-    while diff > 0:
-        prev = ip
-        ip += step  # next IP to check
-        ip_obj = ip_dict.get(ip)
-        logger.info("checking %s", str(ip))
-        if ip <= limit1 or ip >= limit2:
-            ip = prev
+    if diff <= 0:
+        return ip, diff, active
+    if step > 0:
+        if ip + 1 <= limit1:
             logger.info("hit limit, use %s", str(ip))
-            break
-        if ip_obj:
-            logger.info("active %s", str(ip_obj))
-            active += 1
+            return ip, diff, active
+        window = IntervalSet([(ip + 1, limit2 - 1)])
+    else:
+        if ip - 1 >= limit2:
+            logger.info("hit limit, use %s", str(ip))
+            return ip, diff, active
+        window = IntervalSet([(limit1 + 1, ip - 1)])
+    free_set = window - active_set
+    last = free_set.nth(diff, reverse=step < 0)
+    if last is None:
+        # not enough free, take the whole window
+        taken = free_set.size()
+        if window:
+            last = window.runs[0][0] if step < 0 else window.runs[-1][1]
         else:
-            logger.info("not active %s", str(ip))
-            diff -= 1
-    return ip, diff, active
+            last = int(ip)
+        logger.info("hit limit, use %s", str(type(ip)(last)))
+    else:
+        taken = diff
+    active += abs(last - int(ip)) - taken
+    diff -= taken
+    return type(ip)(last), diff, active
 
 
 def add_update_range(range_obj, conn, networkid, start, end):
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+"""snapshot_configuration.py config snapshot_file [--refresh id ...]"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+
+import sys
+import logging
+
+import bluecat_bam
+from bluecat_bam.snapshot import Snapshot
+
+config = bluecat_bam.BAM.argparsecommon(
+    "Copy blocks, networks, ranges, IPs, MACs, and zones to a SQLite file"
+)
+config.add_argument("snapshot_file", help="SQLite file to create or update")
+config.add_argument(
+    "--refresh",
+    nargs="+",
+    type=int,
+    help="only update the subtrees under these entity ids",
+)
+config.add_argument(
+    "--workers", type=int, default=8, help="number of concurrent list calls"
+)
+args = config.parse_args()
+
+logger = logging.getLogger()
+logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
+logger.setLevel(args.logging)
+
+configuration_name = args.configuration
+
+if not configuration_name:
+    config.print_help()
+    sys.exit(1)
+
+with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
+
+    configuration_id, _ = conn.get_config_and_view(configuration_name)
+
+    with Snapshot(args.snapshot_file) as snap:
+        if args.refresh:
+            count = snap.refresh(conn, args.refresh, args.workers)
+        else:
+            configuration_obj = conn.do("getEntityById", id=configuration_id)
+            count = snap.export(conn, configuration_obj, args.workers)
+
+    print("saved", count, "entities to", args.snapshot_file)
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+
+"""snapshot_count_states.py snapshot_file
+count IP states in each network, from a snapshot made by snapshot_configuration.py
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+
+import argparse
+
+from bluecat_bam.snapshot import Snapshot
+
+
+def main():
+    """snapshot_count_states.py"""
+    config = argparse.ArgumentParser(
+        description="count IP states by network, from a snapshot file"
+    )
+    config.add_argument("snapshot_file", help="SQLite file from a snapshot")
+    args = config.parse_args()
+
+    with Snapshot(args.snapshot_file) as snap:
+        rows = snap.query("""
+            select network.cidr, ip.state, count(*)
+            from entities network join entities ip on ip.parent_id = network.id
+            where network.type = 'IP4Network' and ip.type = 'IP4Address'
+            group by network.start_int, ip.state
+            order by network.start_int, ip.state
+            """)
+    for cidr, state, count in rows:
+        print(cidr, state, count)
+
+
+if __name__ == "__main__":
+    main()
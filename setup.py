@@ -30,7 +30,7 @@ setup(
     zip_safe=False,
     setup_requires=["pytest-runner"],
     tests_require=tests_require,
-    extras_require={"test": tests_require},
-    install_requires=["requests>=2.31.0"],
+    extras_require={"test": tests_require, "numpy": ["numpy"]},
+    install_requires=["requests>=2.31.0", 'futures; python_version < "3"'],
     entry_points={"console_scripts": ["bam=bluecat_bam.cli:main"]},
 )
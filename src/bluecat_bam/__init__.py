@@ -1,2 +1,14 @@
 """package bluecat_bam"""
-from bluecat_bam.api import BAM, DhcpRangeList  # noqa: F401
+from bluecat_bam.api import (  # noqa: F401
+    BAM,
+    BAMPool,
+    DhcpRangeList,
+    Entity,
+    LazyProperties,
+)
+try:
+    from bluecat_bam.async_api import AsyncBAM  # noqa: F401
+except (ImportError, SyntaxError):
+    pass  # python 2 has no asyncio or async def
+from bluecat_bam.bulk import BulkWriter  # noqa: F401
+from bluecat_bam.cache import EntityCache  # noqa: F401
@@ -60,9 +60,22 @@ import json
 import argparse
 import os
 import re
+import time
 import ipaddress
+import bisect
+import collections
+import contextlib
+import threading
+import concurrent.futures
 import requests
 
+from bluecat_bam.compat import basestring
+from bluecat_bam.token_cache import TokenCache
+from bluecat_bam.cache import EntityCache
+from bluecat_bam.hierarchy import HierarchyIndex
+from bluecat_bam.zone_cache import ZoneCache
+from bluecat_bam.server_index import ServerIndex
+from bluecat_bam.range_index import IPRangeIndex
 
 # double underscore names
 __progname__ = "api"
@@ -70,15 +83,53 @@ __version__ = "0.2.7"
 
 # python2/3 compatability
 try:
-    basestring  # pylint: disable=E0601
-except NameError:
-    basestring = str  # pylint: disable=invalid-name,redefined-builtin
+    intern = sys.intern
+except AttributeError:
+    pass  # python2 builtin
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # pylint: disable=import-error
+# optional, for DhcpRangeList.contains_many
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class BAM(requests.Session):  # pylint: disable=R0902,R0904
     """subclass requests and
     redefine requests.request to a simpler BlueCat interface"""
 
+    # page sizes for get_bam_api_list(count="auto") by entity type:
+    # (smallest, first, largest)
+    page_sizes = {
+        "IP4Address": (100, 1000, 10000),
+        "IP6Address": (100, 1000, 10000),
+        "MACAddress": (100, 1000, 10000),
+        "HostRecord": (100, 1000, 5000),
+        "GenericRecord": (100, 1000, 5000),
+        "IP4Network": (100, 500, 5000),
+        "IP4Block": (50, 500, 2000),
+        "DHCP4Range": (50, 500, 2000),
+        "Zone": (50, 500, 2000),
+        "NetworkServerInterface": (50, 200, 1000),
+        "Server": (50, 200, 1000),
+    }
+    default_page_size = (100, 1000, 5000)
+    page_seconds = 2.0  # target time per page
+    page_bytes = 8000000  # largest page response
+
+    # get_obj_lines() with a range index lists the IP's of a network with one
+    # of its IP's in each this many
+    obj_lines_list_ratio = 10
+
+    # walk_tree() default, parent type: child types to list under it
+    block_tree_types = {
+        "Configuration": ("IP4Block",),
+        "IP4Block": ("IP4Block", "IP4Network"),
+    }
+
     def __init__(
         self,
         server,
@@ -89,14 +140,31 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         timeout=None,
         max_retries=None,
         verify=True,
-    ):
-        """login to BlueCat server API, get token, set header"""
+        pool_maxsize=None,
+        token_cache=None,
+        token=None,
+        compact=False,
+        cache=None,
+    ):  # pylint: disable=R0913
+        """login to BlueCat server API, get token, set header,
+        token_cache can be a TokenCache or a file name, to reuse login tokens,
+        token can be the token from another logged-in BAM, to share its login,
+        compact=True returns entities as Entity objects, to save memory,
+        cache can be an EntityCache or True, to reuse results of lookups"""
         self.username = username
         self.password = password
         self.timeout = timeout
         self.verify = verify
         self.raw = bool(raw)
-        self.parentviewcache = {}  # zoneid: viewid
+        self.compact = bool(compact)
+        if cache is True:
+            cache = EntityCache()
+        self.cache = cache or None
+        self.hierarchy = HierarchyIndex()  # parents seen, for walking up the tree
+        self.zones = ZoneCache()  # zones and non-zones seen, for get_zone
+        self.server_indexes = {}  # configuration id: ServerIndex, for getserver
+        self.range_indexes = {}  # configuration id: IPRangeIndex, for get_range
+        self.local = threading.local()  # per-thread response_length
         logging.info("raw: %s", self.raw)
         self.raw_in = bool(raw_in)
         logging.info("raw_in: %s", self.raw_in)
@@ -107,11 +175,19 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         logging.info("url: %s", self.mainurl)
 
         requests.Session.__init__(self)
-        if max_retries:
-            adapter = requests.adapters.HTTPAdapter(max_retries=max_retries)
-            url_prefix = self.mainurl.split("://", 1)[0] + "://"
-            self.mount(url_prefix, adapter)
-        self.login()
+        self.max_retries = max_retries
+        self.pool_maxsize = requests.adapters.DEFAULT_POOLSIZE
+        if max_retries or pool_maxsize:
+            self.mount_adapter(pool_maxsize)
+        if token_cache and not isinstance(token_cache, TokenCache):
+            token_cache = TokenCache(token_cache)
+        self.token_cache = token_cache
+        if self.token_cache and not token:
+            token = self.token_cache.get(self.mainurl, self.username)
+        if token:
+            self.set_token(token)
+        else:
+            self.login()
         # set up compiled patterns once at start for later .match
         self.ip_pattern = re.compile(
             r"^(?P<start>(?:\d{1,3}\.){3}\d{1,3})"
@@ -127,8 +203,24 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
     # __enter__ from our parent class returns the Session object for us
 
     def __exit__(self, *args):
+        if self.token_cache:
+            # keep the token for the next run
+            return
         self.logout()
 
+    def mount_adapter(self, pool_maxsize=None):
+        """mount an HTTPAdapter with our retries and connection pool size,
+        pool_maxsize should be at least the number of threads using this session"""
+        if pool_maxsize:
+            self.pool_maxsize = pool_maxsize
+        adapter = requests.adapters.HTTPAdapter(
+            max_retries=self.max_retries or requests.adapters.DEFAULT_RETRIES,
+            pool_connections=1,  # one BAM server per session
+            pool_maxsize=self.pool_maxsize,
+        )
+        url_prefix = self.mainurl.split("://", 1)[0] + "://"
+        self.mount(url_prefix, adapter)
+
     @staticmethod
     def convert_url(server):
         """Convert server string to full url,
@@ -158,8 +250,19 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         if response.status_code != 200:
             print(response.json(), file=sys.stderr)
             raise requests.HTTPError
-        self.token = str(response.json())
-        self.token = self.token.split()[2] + " " + self.token.split()[3]
+        token = str(response.json())
+        token = token.split()[2] + " " + token.split()[3]
+        self.set_token(token)
+        if self.token_cache:
+            self.token_cache.put(self.mainurl, self.username, token)
+
+    def relogin(self):
+        """login again after the token was refused"""
+        self.login()
+
+    def set_token(self, token):
+        """use token for future calls"""
+        self.token = token
         self.token_header = {
             "Authorization": self.token,
             "Content-Type": "application/json",
@@ -171,11 +274,14 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
 
     def logout(self):
         """log out of BlueCat server, return nothing"""
+        if self.token_cache:
+            self.token_cache.remove(self.mainurl, self.username)
         self.get(self.mainurl + "logout?", headers=self.token_header)
 
-    def do(self, command, method=None, data=None, **kwargs):
+    def do(self, command, method=None, data=None, compact=None, **kwargs):
         # pylint: disable=invalid-name,R0912
-        """run any BlueCat REST API command"""
+        """run any BlueCat REST API command,
+        compact=True or False overrides the BAM compact setting for this call"""
         # method = kwargs.pop("method")
         # Convert properties from dict-in-string to dict if needed
         # if properties:
@@ -208,6 +314,33 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                 kwargs["overrides"] = self.convert_dict_to_str(overrides)
         except KeyError:
             pass
+        use_cache, found, obj = self.cache_lookup(command, method, kwargs)
+        if found:
+            obj = self.convert_result(obj, compact)
+            self.hierarchy.observe(command, kwargs, obj)
+            return obj
+        response = self.send_command(command, method, data, kwargs)
+        if method.upper() != "GET":
+            self.after_write(command, kwargs, data)
+        # print("status_code: %s" % response.status_code)
+        if response.status_code != 200:
+            print(response.text, file=sys.stderr)
+        response.raise_for_status()
+        # check type of response
+        logging.info(response)
+        if response.headers.get("Content-Length") == "0":
+            obj = None  # void (null) response
+        else:
+            obj = response.json()
+        if use_cache:
+            self.cache.put(command, kwargs, obj)
+        obj = self.convert_result(obj, compact)
+        self.hierarchy.observe(command, kwargs, obj)
+        return obj
+        # pylint: enable=invalid-name,R0912
+
+    def send_command(self, command, method, data, kwargs):
+        """send one request for do(), login again and retry once on 401"""
         response = self.request(
             method,
             self.mainurl + command + "?",
@@ -218,24 +351,99 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             timeout=self.timeout,
             verify=self.verify,
         )
+        if response.status_code == 401:
+            # token expired or logged out elsewhere, login again and retry once
+            logging.info("401 Unauthorized, logging in again")
+            self.relogin()
+            response = self.request(
+                method,
+                self.mainurl + command + "?",
+                data=data,
+                params=kwargs,
+                timeout=self.timeout,
+                verify=self.verify,
+            )
         logging.info(vars(response.request))
         logging.info("response: %s", response.text)
         logging.debug("headers: %s", response.headers)
         logging.debug("len: %s", response.headers.get("Content-Length"))
-        # print("status_code: %s" % response.status_code)
-        if response.status_code != 200:
-            print(response.text, file=sys.stderr)
-        response.raise_for_status()
-        # check type of response
-        logging.info(response)
-        if response.headers.get("Content-Length") == "0":
-            obj = None  # void (null) response
-        else:
-            obj = response.json()
+        self.local.response_length = len(response.content)
+        return response
+
+    def cache_lookup(self, command, method, kwargs):
+        """(use_cache, found, obj) for do(), found is True if the cache has
+        the result of this GET"""
+        use_cache = (
+            self.cache is not None
+            and method.upper() == "GET"
+            and self.cache.cacheable(command)
+        )
+        if use_cache:
+            found, obj = self.cache.get(command, kwargs)
+            return use_cache, found, obj
+        return use_cache, False, None
+
+    def after_write(self, command, kwargs, data):
+        """drop what a write command may have changed from the hierarchy,
+        zone, server, range, and entity caches, for do()"""
+        self.hierarchy.after_write(command, kwargs, data)
+        self.zones.after_write(command, kwargs, data)
+        for indexes in (self.server_indexes, self.range_indexes):
+            for configuration_id, index in list(indexes.items()):
+                if index.changed_by(command, kwargs, data):
+                    indexes.pop(configuration_id, None)
+        if self.cache is not None:
+            self.cache.after_write(command, kwargs, data)
+
+    def convert_result(self, obj, compact):
+        """convert a response object unless raw, for do()"""
         if not self.raw:
-            obj = self.convert_response(obj)
+            if compact is None:
+                compact = self.compact
+            obj = self.convert_response(obj, compact)
         return obj
-        # pylint: enable=invalid-name,R0912
+
+    def do_many(self, calls, max_workers=8):
+        """run independent BlueCat REST API commands concurrently,
+        calls is an iterable of (command, kwargs) tuples, like:
+            results = conn.do_many(
+                [("getEntityById", {"id": entity_id}) for entity_id in id_list]
+            )
+        returns a list of results in the same order as the calls,
+        if a call raised an exception, the exception is its result"""
+        return list(self.iter_do_many(calls, max_workers))
+
+    def iter_do_many(self, calls, max_workers=8):
+        """like do_many, but yield each result as soon as it and all earlier
+        results are ready, so calls can be a long stream"""
+        return self.map_ordered(
+            lambda call: self.do(call[0], **(call[1] or {})), calls, max_workers
+        )
+
+    def map_ordered(self, func, items, max_workers=8):
+        """run func(item) for each item on a thread pool sharing this session,
+        yield results in the same order as the items,
+        if a call raised an exception, the exception is its result,
+        at most 2 * max_workers items are read ahead of the results"""
+        if max_workers > self.pool_maxsize:
+            self.mount_adapter(max_workers)
+        pending = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for item in items:
+                pending.append(pool.submit(func, item))
+                if len(pending) >= 2 * max_workers:
+                    yield self.future_result(pending.popleft())
+            while pending:
+                yield self.future_result(pending.popleft())
+
+    @staticmethod
+    def future_result(future):
+        """return result of a future, or the exception it raised"""
+        error = future.exception()
+        if error:
+            logging.info("concurrent call failed: %s", error)
+            return error
+        return future.result()
 
     @staticmethod
     def convert_dict_in_str_to_dict(data):
@@ -273,14 +481,17 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
     @staticmethod
     def convert_dict_to_str(value):
         """convert dict to string name=value|..."""
-        if isinstance(value, dict):
+        if isinstance(value, LazyProperties) and value.text is not None:
+            value = value.text  # unchanged since it came from the BAM
+        elif isinstance(value, dict):
             value = "|".join(k + "=" + str(v) for k, v in value.items()) + "|"
             # value = "|".join([k + "=" + str(v) for k, v in value.items()]) + "|"
         return value
 
     # @staticmethod
-    def convert_response(self, obj):
-        """check types of response and convert if needed"""
+    def convert_response(self, obj, compact=False):
+        """check types of response and convert if needed,
+        compact=True converts entities to Entity objects"""
         if obj is None:
             logging.info("response is null")
         elif isinstance(obj, basestring):
@@ -288,10 +499,10 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             obj = self.convert_str_to_dict(obj)
         elif isinstance(obj, dict):
             logging.info("response is dict")
-            obj = self.convert_dict_entries(obj)
+            obj = self.convert_entity(obj, compact)
         elif isinstance(obj, list):
             logging.info("response is list")
-            obj = [self.convert_dict_entries(item) for item in obj]
+            obj = [self.convert_entity(item, compact) for item in obj]
         elif isinstance(obj, bool):
             logging.info("response is bool")
         elif isinstance(obj, int):  # note that bool is subset of int, so order is key
@@ -301,6 +512,12 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             raise ValueError
         return obj
 
+    def convert_entity(self, obj, compact=False):
+        """convert dict, to an Entity if compact"""
+        if compact and isinstance(obj, dict) and "id" in obj and "type" in obj:
+            return Entity.from_dict(obj)
+        return self.convert_dict_entries(obj)
+
     # @staticmethod
     def convert_dict_entries(self, obj):
         """convert each value string in dict"""
@@ -308,14 +525,9 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
 
     @staticmethod
     def convert_str_to_dict(value):
-        """convert string to dict"""
+        """convert string to dict, the string is split when first used"""
         if isinstance(value, basestring) and "|" in value:
-            value = dict(
-                # using a python "generator", not a "comprehension"
-                item.split("=", 1)
-                for item in value.split("|")
-                if item != ""
-            )
+            value = LazyProperties(value)
         return value
 
     @staticmethod
@@ -468,8 +680,11 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             view_id = None
         return configuration_id, view_id
 
-    def get_bam_api_list(self, apiname, **kwargs):
-        """wrap api call with loop to handle 'start' and 'count'"""
+    def get_bam_api_list(self, apiname, window=1, **kwargs):
+        """wrap api call with loop to handle 'start' and 'count',
+        for long lists, window > 1 requests that many pages at once"""
+        if window > 1 or kwargs.get("count") == "auto":
+            return list(self.iter_bam_api_list(apiname, window=window, **kwargs))
         if not kwargs.get("count"):
             kwargs["count"] = 1000
         if not kwargs.get("start"):
@@ -486,6 +701,132 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             listall.extend(listone)
         return listall
 
+    def iter_bam_api_list(self, apiname, window=1, **kwargs):
+        """like get_bam_api_list, but yield entities one page at a time,
+        the next page is fetched in the background while the caller
+        works on the current page, so memory use stays at about two pages,
+        window > 1 keeps that many page requests in flight, for lists
+        known to be long, pages past the end of the list come back empty
+        and are ignored,
+        count="auto" adjusts the page size to the time and size of each page"""
+        if kwargs.get("count") == "auto":
+            for entity in self.iter_bam_api_list_auto(apiname, **kwargs):
+                yield entity
+            return
+        if not kwargs.get("count"):
+            kwargs["count"] = 1000
+        if not kwargs.get("start"):
+            kwargs["start"] = 0
+        count = kwargs["count"]
+        next_start = kwargs["start"]
+        if window > self.pool_maxsize:
+            self.mount_adapter(window)
+        pending = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=window) as pool:
+            for _ in range(window):
+                pending.append(
+                    pool.submit(self.do, apiname, **dict(kwargs, start=next_start))
+                )
+                next_start += count
+            while pending:
+                listone = pending.popleft().result()
+                if len(listone) == count:
+                    # keep the window full
+                    pending.append(
+                        pool.submit(self.do, apiname, **dict(kwargs, start=next_start))
+                    )
+                    next_start += count
+                else:
+                    # end of list, drop requests for pages past the end
+                    for future in pending:
+                        future.cancel()
+                    pending.clear()
+                for entity in listone:
+                    yield entity
+
+    def iter_bam_api_list_auto(self, apiname, **kwargs):
+        """yield entities, growing or shrinking each page toward
+        page_seconds per page and at most page_bytes,
+        within the page_sizes for the entity type"""
+        entity_type = kwargs.get("type") or kwargs.get("types")
+        smallest, count, largest = self.page_sizes.get(
+            entity_type, self.default_page_size
+        )
+        start = kwargs.get("start") or 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(
+                self.get_page, apiname, dict(kwargs, start=start, count=count)
+            )
+            while future:
+                listone, seconds, length = future.result()
+                start += len(listone)
+                if len(listone) == count:
+                    count = self.next_page_size(
+                        count, seconds, length, smallest, largest
+                    )
+                    logging.info("next page size %s", count)
+                    future = pool.submit(
+                        self.get_page, apiname, dict(kwargs, start=start, count=count)
+                    )
+                else:
+                    future = None
+                for entity in listone:
+                    yield entity
+
+    def get_page(self, apiname, kwargs):
+        """get one page, return it with the seconds taken and response length"""
+        begin = time.time()
+        listone = self.do(apiname, **kwargs)
+        seconds = time.time() - begin
+        return listone, seconds, getattr(self.local, "response_length", 0)
+
+    def next_page_size(self, count, seconds, length, smallest, largest):
+        """scale count toward page_seconds, no more than page_bytes,
+        by at most double or half each page"""
+        factor = 2.0
+        if seconds > 0:
+            factor = min(factor, max(0.5, self.page_seconds / seconds))
+        if length:
+            factor = min(factor, float(self.page_bytes) / length)
+        return int(min(largest, max(smallest, count * factor)))
+
+    def walk_tree(self, root, types=None, max_workers=8):
+        """yield (depth, parent id, entity) for the entities under root,
+        an entity id or entity, breadth first, depth 1 for its children,
+        types is a dict of parent type: child types to list under it,
+        default block_tree_types, the blocks and networks of a
+        Configuration or Block,
+        all the children of one level of the tree are listed at once,
+        each list with all its pages"""
+        if types is None:
+            types = self.block_tree_types
+        if not isinstance(root, (dict, Entity)):
+            root = self.do("getEntityById", method="get", id=root)
+        parents = [root]
+        depth = 0
+        while parents:
+            depth += 1
+            tasks = [
+                (parent_obj["id"], child_type)
+                for parent_obj in parents
+                for child_type in types.get(parent_obj["type"], ())
+            ]
+            answers = self.map_ordered(
+                lambda task: self.get_bam_api_list(
+                    "getEntities", parentId=task[0], type=task[1]
+                ),
+                tasks,
+                max_workers,
+            )
+            parents = []
+            for (parent_id, _), entity_list in zip(tasks, answers):
+                if isinstance(entity_list, Exception):
+                    raise entity_list
+                for entity in entity_list:
+                    if entity["type"] in types:
+                        parents.append(entity)
+                    yield depth, parent_id, entity
+
     def get_id_list(self, object_ident, containerId, object_type):
         """get object id, or a list of objects from a file"""
         obj_list = self.get_obj_list(object_ident, containerId, object_type)
@@ -524,18 +865,122 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                 logger.info("failed to find object or open file: '%s'", object_ident)
         return obj_list
 
-    def get_obj_lines(self, fd, containerId, object_type):
-        """read lines, get obj, return obj list"""
+    def get_obj_lines(
+        self, fd, containerId, object_type, max_workers=8, use_index=False
+    ):
+        """read lines, get obj, return obj list,
+        use_index=True loads the range index of containerId if not loaded,
+        see plan_obj_lookups"""
         obj_list = []
-        for line in fd:
-            if line.strip() != "":
-                obj, _ = self.get_obj(line.strip(), containerId, object_type)
-                if obj and obj["id"]:
-                    obj_list.append(obj)
-                else:
-                    print("not found", line)
+        lines = self.iter_obj_lines(
+            fd, containerId, object_type, max_workers, use_index
+        )
+        for line, obj in lines:
+            if obj and obj["id"]:
+                obj_list.append(obj)
+            else:
+                print("not found", line)
         return obj_list
 
+    def iter_obj_lines(
+        self, fd, containerId, object_type, max_workers=8, use_index=False
+    ):
+        """read lines, yield (line, obj) in line order, skipping blank lines,
+        each different line is looked up once, max_workers at a time,
+        grouped by what it looks like, see plan_obj_lookups"""
+        lines = [line.strip() for line in fd if line.strip() != ""]
+        unique = list(collections.OrderedDict.fromkeys(lines))
+        lookups = self.plan_obj_lookups(
+            unique, containerId, object_type, max_workers, use_index
+        )
+
+        def look_up(ident):
+            if ident in lookups:
+                return lookups[ident](ident)
+            return self.get_obj(ident, containerId, object_type)[0]
+
+        answers = self.map_ordered(look_up, unique, max_workers)
+        found = {}
+        position = 0
+        # answers come in order of first appearance, so each line can be
+        # yielded as soon as its answer and those of the lines before are in
+        for ident, obj in zip(unique, answers):
+            if isinstance(obj, Exception):
+                raise obj
+            found[ident] = obj
+            while position < len(lines) and lines[position] in found:
+                yield lines[position], found[lines[position]]
+                position += 1
+
+    def plan_obj_lookups(
+        self, unique, containerId, object_type, max_workers=8, use_index=False
+    ):
+        """group identifiers by what they look like, and return a dict of
+        identifier: function(identifier) returning its obj, for the ones that
+        do not need get_obj: with the range index of containerId, if it is
+        loaded, or use_index=True to load it here (one getEntities per block
+        and network), CIDRs are found in the index, and IP's as in
+        plan_ip_lookups"""
+        by_class = collections.OrderedDict()
+        for ident in unique:
+            by_class.setdefault(self.match_type(ident)[0], []).append(ident)
+        logging.info(
+            "get_obj_lines %s unique: %s",
+            len(unique),
+            ", ".join("%s %s" % (name, len(group)) for name, group in by_class.items()),
+        )
+        cidrs = [cidr for cidr in by_class.get("CIDR", ()) if self.is_ip4_cidr(cidr)]
+        ips = [ip for ip in by_class.get("IP4Address", ()) if IPRangeIndex.covers(ip)]
+        index = self.range_indexes.get(containerId)
+        if index is None and use_index and (cidrs or ips):
+            index = self.load_range_index(containerId, max_workers)
+        if index is None:
+            return {}
+
+        def find_cidr(cidr):
+            return index.get_cidr(cidr, object_type)
+
+        lookups = dict.fromkeys(cidrs, find_cidr)
+        lookups.update(self.plan_ip_lookups(index, ips, max_workers))
+        return lookups
+
+    def plan_ip_lookups(self, index, ips, max_workers=8):
+        """dict of ip: function(ip) returning its obj, for the IP's in a
+        network from the range index with at least one of them per
+        obj_lines_list_ratio addresses, from one list of its IP's"""
+        by_network = collections.OrderedDict()  # network id: (network, [ip])
+        for ip in ips:
+            network_obj = index.get_range(ip, "IP4Network")
+            if network_obj is not None:
+                entry = by_network.setdefault(network_obj["id"], (network_obj, []))
+                entry[1].append(ip)
+        listings = [
+            (network_obj, network_ips)
+            for network_obj, network_ips in by_network.values()
+            if len(network_ips) * self.obj_lines_list_ratio
+            >= ipaddress.IPv4Network(network_obj["properties"]["CIDR"]).num_addresses
+        ]
+        ip_lists = self.map_ordered(
+            lambda listing: self.get_ip_list(listing[0]["id"]), listings, max_workers
+        )
+        lookups = {}
+        for (_, network_ips), ip_list in zip(listings, ip_lists):
+            if isinstance(ip_list, Exception):
+                raise ip_list
+            by_address = {ip_obj["properties"]["address"]: ip_obj for ip_obj in ip_list}
+            for ip in network_ips:
+                lookups[ip] = by_address.get
+        return lookups
+
+    @staticmethod
+    def is_ip4_cidr(cidr):
+        """True if cidr is an IPv4 network, with no host bits set"""
+        try:
+            ipaddress.IPv4Network(cidr)
+        except ValueError:
+            return False
+        return True
+
     def match_type(self, object_ident):
         """uses pattern matching, finds type as
         id, MACAddress, IP4Address, CIDR, IP4Range, or None
@@ -613,8 +1058,11 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                 return None, None
             obj_ip, obj_prefix = obj["properties"]["CIDR"].split("/")
             logger.info("CIDR obj_ip %s,obj_prefix %s,obj %s", obj_ip, obj_prefix, obj)
-            while obj_ip == part1 and obj_prefix > part2:
-                obj = self.do("getParent", entityId=obj["id"])
+            while obj_ip == part1 and int(obj_prefix) > int(part2):
+                obj = self.hierarchy.get_parent(self, obj["id"])
+                if obj is None or "CIDR" not in obj["properties"]:
+                    obj = None
+                    break
                 obj_ip, obj_prefix = obj["properties"]["CIDR"].split("/")
                 logger.info(
                     "CIDR parent obj_ip %s,obj_prefix %s,obj %s",
@@ -656,31 +1104,37 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         )
         if object_type is None:
             object_type = ""  # standardize the value
-        obj = self.do(
-            "getIPRangedByIP",
-            address=address,
-            containerId=containerId,
-            type=object_type,
-        )
+        index = self.range_indexes.get(containerId)
+        if index is not None and index.covers(address):
+            obj = index.get_range(address, object_type) or {"id": 0}
+        else:
+            index = None
+            obj = self.do(
+                "getIPRangedByIP",
+                address=address,
+                containerId=containerId,
+                type=object_type,
+            )
         if obj:
             obj_id = obj.get("id")
             if obj_id:
                 cidr = obj["properties"].get("CIDR")
                 start = obj["properties"].get("start")
-        logging.info("getIPRangedByIP obj = %s", json.dumps(obj))
+        logging.info("getIPRangedByIP obj = %s", obj)
         if obj_id == 0:
             obj = None
         elif start and start != address:
             obj = None
         elif cidr:
-            (obj_ip, _) = cidr.split("/")
+            obj_ip, _ = cidr.split("/")
             if obj_ip != address:
                 obj = None
             else:
                 # bug in BlueCat - if Block and Network have the same CIDR,
                 # it should return the Network, but it returns the Block.
                 # So check for a matching Network.
-                if object_type == "" and obj["type"] == "IP4Block":
+                # (the range index already returns the Network)
+                if object_type == "" and obj["type"] == "IP4Block" and not index:
                     network_obj = self.do(
                         "getEntityByCIDR",
                         method="get",
@@ -693,86 +1147,60 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                         logger.info("IP4Network found: %s", obj)
         return obj
 
+    def load_range_index(self, configuration_id, max_workers=8):
+        """load all blocks, networks, and DHCP ranges of a configuration,
+        so get_range and get_obj answer IPv4 lookups in that configuration
+        without asking the BAM, until something changes them"""
+        index = IPRangeIndex(configuration_id).load(self, max_workers)
+        self.range_indexes[configuration_id] = index
+        return index
+
     def getinterface(self, server_name, configuration_id):
         """get server interface object, given the server name or interface name"""
         _, interface_obj = self.getserver(server_name, configuration_id)
         return interface_obj
 
+    def get_server_index(self, configuration_id):
+        """ServerIndex of the servers in a configuration, loaded on first use"""
+        index = self.server_indexes.get(configuration_id)
+        if index is None:
+            index = ServerIndex(configuration_id).load(self)
+            self.server_indexes[configuration_id] = index
+        return index
+
     def getserverbyinterfacename(self, server_name, configuration_id):
         """search by server name, short or long, divided at dots"""
         # server_obj, interface_obj = conn.getserver(server_name, configuration_id)
-        # assume <= 1000 servers defined  ****
-        logger = logging.getLogger()
-        interface_obj_list = self.do(
-            "searchByObjectTypes",
-            keyword=server_name,
-            types="NetworkServerInterface",
-            start=0,
-            count=1000,  # same server can be in multiple Configurations
-        )
-        # filter for the right Configuration
-        interface_ok_list = []
-        for interface in interface_obj_list:
-            # check the name again so that "adonis1" does not match "adonis10" etc
-            name_pattern = re.compile(server_name + r"\b")
-            name_match = name_pattern.match(interface["name"])
-            if not name_match:
-                logger.info("%s did not match %s", server_name, interface["name"])
-                continue
-            # check which Configuration
-            server_obj = self.do("getParent", entityId=interface["id"])
-            server_configuration = self.do("getParent", entityId=server_obj["id"])
-            if server_configuration["id"] == configuration_id:
-                interface_ok_list.append(interface)
+        index = self.get_server_index(configuration_id)
+        interface_ok_list = index.find_by_interface_name(server_name)
         if len(interface_ok_list) > 1:
             print("ERROR - more than one interface found:")
-            for interface in interface_ok_list:
+            for _, interface in interface_ok_list:
                 print(interface["name"])
             return None, None
         if interface_ok_list:
-            interfaceid = interface_ok_list[0]["id"]
-            if interfaceid != 0:
-                return server_obj, interface_ok_list[0]
+            return interface_ok_list[0]
         return None, None
 
     def getserverbyservername(self, server_name, configuration_id):
         """get server by servername"""
         # try another method, in case they gave the server display name instead
-        server_obj_list = self.do(
-            "getEntitiesByNameUsingOptions",
-            parentId=configuration_id,
-            name=server_name,
-            type="Server",
-            options="ignoreCase=true",
-            start=0,
-            count=2,  # error if more than one
-        )
-        # print(json.dumps(server_obj_list))
+        index = self.get_server_index(configuration_id)
+        server_obj_list = index.find_by_server_name(server_name)
         if len(server_obj_list) == 1:
-            server_id = server_obj_list[0]["id"]
-            if server_id != 0:
-                interface_obj_list = self.do(
-                    "getEntities",
-                    method="get",
-                    parentId=server_id,
-                    type="NetworkServerInterface",
-                    start=0,
-                    count=1000,
+            interface_obj_list = index.server_interfaces[server_obj_list[0]["id"]]
+            if len(interface_obj_list) == 1:
+                return server_obj_list[0], interface_obj_list[0]
+            if len(interface_obj_list) > 1:
+                print(
+                    "ERROR - more than one interface found",
+                    json.dumps(interface_obj_list, default=Entity.to_dict),
                 )
-                if len(interface_obj_list) == 1:
-                    interfaceid = interface_obj_list[0]["id"]
-                    if interfaceid != 0:
-                        return server_obj_list[0], interface_obj_list[0]
-                if len(interface_obj_list) > 1:
-                    print(
-                        "ERROR - more than one interface found",
-                        json.dumps(interface_obj_list),
-                    )
         if len(server_obj_list) > 1:
             print(
                 "ERROR - found more than one server for name",
                 server_name,
-                json.dumps(server_obj_list),
+                json.dumps(server_obj_list, default=Entity.to_dict),
             )
         return None, None
 
@@ -793,28 +1221,25 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
 
     def get_zone(self, domain_name, view_id):
         """find closest zone for domain_name,
-        return zone_obj,remainder (possibly dotted name)"""
+        return zone_obj,remainder (possibly dotted name),
+        zone_obj is None if no zone matches,
+        zones already seen are answered from self.zones without a BAM call"""
         logger = logging.getLogger()
-        domain_label_list = domain_name.split(".")
+        domain_label_list = domain_name.rstrip(".").split(".")
         logger.info(domain_label_list)
         zone_end = len(domain_label_list)
         zone_start = zone_end - 1
         search_domain = ".".join(domain_label_list[zone_start:zone_end])
         current_domain = ""
         parent_id = view_id
+        found_zone_obj = None
 
         while True:
             logger.info(
                 "start: %s, end: %s, search: %s", zone_start, zone_end, search_domain
             )
-            zone_obj = self.do(
-                "getEntityByName",
-                method="get",
-                parentId=parent_id,
-                name=search_domain,
-                type="Zone",
-            )
-            if zone_obj.get("id") == 0:  # try same parent, dotted name
+            zone_obj = self.zones.lookup(self, parent_id, search_domain)
+            if zone_obj is None:  # try same parent, dotted name
                 if zone_start > 0:
                     zone_start -= 1  # decrement by one
                     search_domain = ".".join(domain_label_list[zone_start:zone_end])
@@ -839,7 +1264,9 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         """get list of entities with given fqdn and type"""
         logger = logging.getLogger()
         zone_obj, remainder = self.get_zone(domain_name, view_id)
-        if record_type.lower() == "zone":
+        if zone_obj is None:
+            entities = []
+        elif record_type.lower() == "zone":
             entities = [zone_obj]
         else:
             entities = self.do(
@@ -855,6 +1282,109 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         logger.info("entities: %s", entities)
         return entities
 
+    def resolve_fqdns(
+        self,
+        names,
+        view_id,
+        record_type="HostRecord",
+        max_workers=8,
+        list_min=20,
+        list_ratio=10,
+    ):  # pylint: disable=R0913
+        """get entities for many fqdns, like get_fqdn for each name,
+        return OrderedDict of name: list of entities, in the order of names,
+        each zone is found once, then records are looked up concurrently,
+        zones with at least list_min of the names are listed once and
+        matched here, instead of a lookup per name, unless the zone has more
+        than list_ratio records per name, then those names are looked up"""
+        names = list(collections.OrderedDict.fromkeys(names))  # unique, in order
+        results, by_zone = self.group_by_zone(names, view_id, record_type, max_workers)
+        listings = [item for item in by_zone.items() if len(item[1]) >= list_min]
+        lookups = [  # (zone id, name, remainder)
+            (zone_id, name, remainder)
+            for zone_id, name_list in by_zone.items()
+            if len(name_list) < list_min
+            for name, remainder in name_list
+        ]
+        listed = self.map_ordered(
+            lambda listing: self.list_zone_records(
+                listing[0], record_type, len(listing[1]) * list_ratio
+            ),
+            listings,
+            max_workers,
+        )
+        for (zone_id, name_list), by_name in zip(listings, listed):
+            if isinstance(by_name, Exception):
+                raise by_name
+            if by_name is None:  # too big to list for so few names
+                lookups.extend((zone_id, name, rest) for name, rest in name_list)
+                continue
+            for name, remainder in name_list:
+                results[name] = by_name.get(remainder.lower(), [])
+        found = self.map_ordered(
+            lambda lookup: self.do(
+                "getEntitiesByNameUsingOptions",
+                method="get",
+                parentId=lookup[0],
+                name=lookup[2],
+                type=record_type,
+                options="ignoreCase=true",
+                start=0,
+                count=1000,
+            ),
+            lookups,
+            max_workers,
+        )
+        for (_, name, _), entities in zip(lookups, found):
+            if isinstance(entities, Exception):
+                raise entities
+            results[name] = entities or []
+        return collections.OrderedDict((name, results[name]) for name in names)
+
+    def group_by_zone(self, names, view_id, record_type, max_workers=8):
+        """find the zone of each name concurrently, return a dict of
+        name: [] for names with no zone, or [zone] if record_type is Zone,
+        and an OrderedDict of zone id: [(name, remainder)] for the rest"""
+        results = {}
+        by_zone = collections.OrderedDict()  # zone id: [(name, remainder)]
+        zone_answers = self.map_ordered(
+            lambda name: self.get_zone(name, view_id), names, max_workers
+        )
+        for name, answer in zip(names, zone_answers):
+            if isinstance(answer, Exception):
+                raise answer
+            zone_obj, remainder = answer
+            if zone_obj is None:
+                results[name] = []
+            elif record_type.lower() == "zone":
+                results[name] = [zone_obj]
+            else:
+                by_zone.setdefault(zone_obj["id"], []).append((name, remainder))
+        return results, by_zone
+
+    def list_zone_records(self, zone_id, record_type, limit):
+        """dict of lower case name: records of record_type in zone_id,
+        or None if the zone has more than limit of them"""
+        by_name = {}
+        count = min(1000, limit + 1)
+        start = 0
+        while True:
+            page = self.do(
+                "getEntities",
+                parentId=zone_id,
+                type=record_type,
+                start=start,
+                count=count,
+            )
+            start += len(page)
+            if start > limit:
+                logging.info("zone %s has over %s %s", zone_id, limit, record_type)
+                return None
+            for entity in page:
+                by_name.setdefault((entity["name"] or "").lower(), []).append(entity)
+            if len(page) < count:
+                return by_name
+
     def delete_ip_obj(self, ip_obj):
         """delete ip obj, handle case of DHCP_ALLOCATED"""
         ip_id = ip_obj["id"]
@@ -889,6 +1419,14 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         logger.debug(range_list)
         return range_list
 
+    def iter_dhcp_ranges(self, networkid):
+        """yield ranges, fetched one page at a time"""
+        return self.iter_bam_api_list(
+            "getEntities",
+            parentId=networkid,
+            type="DHCP4Range",
+        )
+
     @staticmethod
     def make_dhcp_ranges_list(range_list):
         """return sorted list of dict with the start and end ipaddress class IP objects
@@ -908,26 +1446,20 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         return range_info_list
 
     def getparentview(self, entity_id):
-        """walk tree up to view, with cache"""
-        view_id = self.parentviewcache.get("id")
-        if view_id:
-            return view_id
-        parent = self.do("getParent", entityId=entity_id)
-        if parent == 0:
+        """walk tree up to view, using the hierarchy index"""
+        view = self.hierarchy.find_ancestor(self, entity_id, "View")
+        if view is None:
             print("ERROR - got to top without finding a view for object id", entity_id)
             return None
-        entity_type = parent["type"]
-        if entity_type == "View":
-            view_id = parent["id"]
-            self.parentviewcache[entity_id] = view_id
-            return view_id
-        return self.getparentview(parent["id"])  # recursive
-
-    def get_ip_list(self, networkid, states=None):
+        return view["id"]
+
+    def get_ip_list(self, networkid, states=None, window=1):
         """returns [filtered] list of IP entities, given a network id
-        and optional list of states"""
+        and optional list of states,
+        window > 1 fetches that many pages at once, for large networks"""
         ip_list = self.get_bam_api_list(
             "getEntities",
+            window=window,
             parentId=networkid,
             type="IP4Address",
         )
@@ -935,6 +1467,18 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             ip_list = [ip for ip in ip_list if ip["properties"]["state"] in states]
         return ip_list
 
+    def iter_ip_list(self, networkid, states=None, window=1):
+        """yields [filtered] IP entities, given a network id
+        and optional list of states, fetched one page at a time"""
+        for ip in self.iter_bam_api_list(
+            "getEntities",
+            window=window,
+            parentId=networkid,
+            type="IP4Address",
+        ):
+            if not states or ip["properties"]["state"] in states:
+                yield ip
+
     @staticmethod
     def make_ip_dict(ip_list):
         """convert ip_list to dict: {ipaddress_class_obj: ip_entity}"""
@@ -976,19 +1520,96 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         like finding the group for a tag,
         or the configuration for a network,
         or the view for a zone or record,
-        returns parent object"""
-        logger = logging.getLogger()
-        myid = obj_id
-        mytype = None
-        parent_obj = None  # make it in this scope
-        while mytype != obj_type and myid != 0:
-            parent_obj = self.do("getParent", entityId=myid)
-            mytype = parent_obj["type"]
-            myid = parent_obj["id"]
-            logger.info("id: %s, name: %s, type: %s", myid, parent_obj["name"], mytype)
-        if myid == 0:
-            return None
-        return parent_obj
+        returns parent object,
+        links already in the hierarchy index are not fetched again"""
+        return self.hierarchy.find_ancestor(self, obj_id, obj_type)
+
+
+class PooledBAM(BAM):
+    """BAM session in a BAMPool, the pool handles logging in again"""
+
+    def __init__(self, pool, *args, **kwargs):
+        self.pool = pool
+        BAM.__init__(self, *args, **kwargs)
+
+    def relogin(self):
+        """login again through the pool, so all sessions get the new token"""
+        self.pool.relogin(self, self.token)
+
+
+class BAMPool:
+    """thread-safe pool of BAM sessions sharing one login, like:
+    with BAMPool(server, username, password, size=8) as pool:
+        with pool.session() as conn:
+            entity = conn.do("getEntityById", id=entity_id)
+    each thread should check out its own session, and check it back in"""
+
+    def __init__(self, server, username, password, size=4, **kwargs):
+        """login once, create size sessions using the same token,
+        cache=True gives all sessions one shared EntityCache,
+        each session is used by one thread at a time, so pool_maxsize is 1
+        unless given"""
+        if size < 1:
+            raise ValueError("BAMPool size must be at least 1, not %s" % (size))
+        kwargs = dict(kwargs)
+        if kwargs.get("cache") is True:
+            kwargs["cache"] = EntityCache()
+        kwargs["pool_maxsize"] = kwargs.get("pool_maxsize") or 1
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+        self.sessions = []
+        for _ in range(size):
+            if self.sessions:
+                kwargs["token"] = self.sessions[0].token
+            conn = PooledBAM(self, server, username, password, **kwargs)
+            self.sessions.append(conn)
+            self.idle.put(conn)
+        self.token = self.sessions[0].token
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def checkout(self, timeout=None):
+        """get an idle session, waiting up to timeout seconds (None for forever)"""
+        conn = self.idle.get(timeout=timeout)
+        with self.lock:
+            if conn.token != self.token:
+                conn.set_token(self.token)
+        return conn
+
+    def checkin(self, conn):
+        """return a session to the pool"""
+        self.idle.put(conn)
+
+    @contextlib.contextmanager
+    def session(self, timeout=None):
+        """check out a session for a 'with' block"""
+        conn = self.checkout(timeout)
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def relogin(self, conn, stale_token):
+        """login once for the whole pool when the shared token expires"""
+        with self.lock:
+            if self.token == stale_token:
+                conn.login()
+                self.token = conn.token
+            else:  # another session already logged in again
+                conn.set_token(self.token)
+
+    def close(self):
+        """logout, unless the token is cached for later, and close sessions"""
+        conn = self.sessions[0]
+        if not conn.token_cache:
+            conn.set_token(self.token)
+            conn.logout()
+        for conn in self.sessions:
+            conn.close()
 
 
 class DhcpRangeList(list):  # pylint: disable=R0902
@@ -1002,47 +1623,336 @@ class DhcpRangeList(list):  # pylint: disable=R0902
     ):
         """DHCP range list, with extra functions"""
         list.__init__(self, BAM.make_dhcp_ranges_list(dhcp_ranges_list))
-        # save network, range list, and current range
+        # save network and range list
         self.network_obj = network_obj
         self.ranges = dhcp_ranges_list
-        self.range_num = 0
-        # calculate network start/end
-        self.cidr = network_obj["properties"]["CIDR"]
-        self.network_net = ipaddress.IPv4Network(self.cidr)
+        # calculate network start/end, IP4Network has CIDR, IP6Network has prefix
+        properties = network_obj["properties"]
+        self.cidr = properties.get("CIDR") or properties.get("prefix")
+        self.network_net = ipaddress.ip_network("%s" % (self.cidr))
         self.network_ip = self.network_net.network_address
         self.broadcast_ip = self.network_net.broadcast_address
-        # start with gap from network_ip to before first range
-        self.gap = self.network_ip
-        if self.__len__() > 0:
-            # range list must be sorted
-            self.start = self[0]["start"]
-            self.end = self[0]["end"]
-        else:
-            # no range_size, put start after end so it never matches
-            self.start = self.broadcast_ip + 1
-            self.end = self.broadcast_ip
+        # integer start and end of each range, sorted, for bisect
+        self.starts = [int(dhcp_range["start"]) for dhcp_range in self]
+        self.ends = [int(dhcp_range["end"]) for dhcp_range in self]
+
+    @staticmethod
+    def ip_int(ip):
+        """integer for an ipaddress object, string, or integer"""
+        if isinstance(ip, basestring):
+            ip = ipaddress.ip_address("%s" % (ip))
+        return int(ip)
+
+    def find_index(self, ip):
+        """index in this list of the range holding ip, or None"""
+        ip_int = self.ip_int(ip)
+        index = bisect.bisect_right(self.starts, ip_int) - 1
+        if index >= 0 and ip_int <= self.ends[index]:
+            return index
+        return None
+
+    def find_range(self, ip):
+        """BlueCat range object holding ip, or None"""
+        index = self.find_index(ip)
+        if index is None:
+            return None
+        return self[index]["range"]
 
     def in_range(self, ip):
-        """check if given IP is in any of the DHCP raanges"""
-        # note that this is most efficient if IP's are checked in ascending order
-        if ip < self.gap:
-            # restart range search
-            self.range_num = 0
-        elif ip < self.start:
-            return False
-        elif ip < self.end:
-            return True
+        """check if given IP is in any of the DHCP ranges,
+        IPs can be checked in any order"""
+        return self.find_index(ip) is not None
+
+    def contains_many(self, addresses):
+        """check many IPs at once, addresses is a range, or a list or numpy
+        array of integers (or ipaddress objects or strings),
+        return (mask, indexes) where mask is True for IPs in a DHCP range,
+        and indexes is the index in this list of that range, or -1,
+        as numpy arrays if numpy is installed and this is IPv4, else lists"""
+        if numpy is None or self.network_net.version != 4:
+            indexes = [self.find_index(ip) for ip in addresses]
+            mask = [index is not None for index in indexes]
+            return mask, [-1 if index is None else index for index in indexes]
+        if isinstance(addresses, numpy.ndarray):
+            addresses = addresses.astype(numpy.int64)
+        elif isinstance(addresses, range):
+            addresses = numpy.arange(
+                addresses.start, addresses.stop, addresses.step, dtype=numpy.int64
+            )
+        elif isinstance(addresses, list) and all(
+            isinstance(ip, int) for ip in addresses
+        ):
+            addresses = numpy.asarray(addresses, dtype=numpy.int64)
         else:
-            self.range_num += 1
-        # outside network?
-        if ip < self.network_ip or ip > self.broadcast_ip:
-            return False
-        # search ranges
-        while self.range_num < len(self):
-            if ip <= self[self.range_num]["end"]:
-                if ip >= self[self.range_num]["start"]:
-                    return True
-                return False
-            # move to next range
-            self.range_num += 1
-        return False
+            addresses = numpy.fromiter(
+                (self.ip_int(ip) for ip in addresses), dtype=numpy.int64
+            )
+        if not self.starts:
+            return (
+                numpy.zeros(len(addresses), dtype=bool),
+                numpy.full(len(addresses), -1, dtype=numpy.int64),
+            )
+        starts = numpy.array(self.starts, dtype=numpy.int64)
+        ends = numpy.array(self.ends, dtype=numpy.int64)
+        indexes = numpy.searchsorted(starts, addresses, side="right") - 1
+        mask = (indexes >= 0) & (addresses <= ends[numpy.maximum(indexes, 0)])
+        return mask, numpy.where(mask, indexes, -1)
+
+
+class LazyProperties(dict):
+    """dict made from a BlueCat 'name=value|...' string, which is only split
+    when the dict is first used, since most callers read few properties,
+    and which converts back to the same string if it was not changed"""
+
+    __slots__ = ("text", "pending")
+
+    # placeholder entry until split, so the dict is not seen as empty
+    unsplit = object()
+
+    def __init__(self, text):  # pylint: disable=super-init-not-called
+        dict.__setitem__(self, self.unsplit, None)
+        self.text = text  # original string, None after any change
+        self.pending = True  # not split yet
+
+    def split(self):
+        """split the string into the dict, if not done yet"""
+        if self.pending:
+            items = dict(
+                # using a python "generator", not a "comprehension"
+                item.split("=", 1)
+                for item in self.text.split("|")
+                if item != ""
+            )
+            dict.update(self, items)
+            dict.pop(self, self.unsplit, None)
+            self.pending = False
+
+    def changed(self):
+        """split, and forget the original string before a change"""
+        self.split()
+        self.text = None
+
+    def __getitem__(self, key):
+        self.split()
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self.split()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self.split()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.split()
+        return dict.__len__(self)
+
+    def __eq__(self, other):
+        self.split()
+        if isinstance(other, LazyProperties):
+            other.split()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        self.split()
+        return dict.__repr__(self)
+
+    def __or__(self, other):
+        self.split()
+        return dict(self.items()) | other
+
+    def __ror__(self, other):
+        self.split()
+        return other | dict(self.items())
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def copy(self):
+        """shallow copy"""
+        if self.pending:
+            return LazyProperties(self.text)
+        return dict(self.items())
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return self.copy()  # keys and values are strings
+
+    def get(self, key, default=None):
+        """get value, or default"""
+        self.split()
+        return dict.get(self, key, default)
+
+    def keys(self):
+        """keys"""
+        self.split()
+        return dict.keys(self)
+
+    def values(self):
+        """values"""
+        self.split()
+        return dict.values(self)
+
+    def items(self):
+        """items"""
+        self.split()
+        return dict.items(self)
+
+    def __setitem__(self, key, value):
+        self.changed()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.changed()
+        dict.__delitem__(self, key)
+
+    def pop(self, *args):
+        """remove key and return value"""
+        self.changed()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        """remove and return an item"""
+        self.changed()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        """get value, setting it to default if missing"""
+        self.changed()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        """update from dict or pairs"""
+        self.changed()
+        dict.update(self, *args, **kwargs)
+
+    def clear(self):
+        """remove all items"""
+        self.changed()
+        dict.clear(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+
+class Entity:
+    """compact BlueCat entity for large result sets, see BAM(compact=True),
+    uses __slots__ and shared (interned) strings for the type, property names,
+    and common property values, but reads like the entity dict:
+        entity["id"], entity.get("name"), entity["properties"]["state"]
+    use entity.to_dict() for json.dumps"""
+
+    __slots__ = ("id", "name", "type", "properties")
+
+    # properties with few different values, shared between entities
+    interned_properties = frozenset(
+        [
+            "state",
+            "locationInherited",
+            "defaultView",
+            "allowDuplicateHost",
+            "inheritAllowDuplicateHost",
+            "pingBeforeAssign",
+            "inheritPingBeforeAssign",
+            "inheritDefaultDomains",
+            "inheritDefaultView",
+            "inheritDNSRestrictions",
+        ]
+    )
+
+    def __init__(self, entity_id, name, entity_type, properties):
+        self.id = entity_id  # pylint: disable=invalid-name
+        self.name = name
+        self.type = intern(entity_type) if entity_type else entity_type
+        self.properties = properties
+
+    @classmethod
+    def from_dict(cls, obj):
+        """make Entity from a BlueCat entity dict,
+        with properties as a string or dict"""
+        properties = obj.get("properties")
+        if isinstance(properties, basestring):
+            properties = cls.compact_properties(
+                item.split("=", 1) for item in properties.split("|") if item != ""
+            )
+        elif isinstance(properties, dict):
+            properties = cls.compact_properties(properties.items())
+        return cls(obj.get("id"), obj.get("name"), obj.get("type"), properties)
+
+    @classmethod
+    def compact_properties(cls, pairs):
+        """dict from (name, value) pairs, with interned names and common values"""
+        properties = {}
+        for name, value in pairs:
+            name = intern(name)
+            if name in cls.interned_properties:
+                value = intern(value)
+            properties[name] = value
+        return properties
+
+    def to_dict(self):
+        """plain entity dict"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type": self.type,
+            "properties": self.properties,
+        }
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        """get field, or default"""
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def keys(self):
+        """field names"""
+        return list(self.__slots__)
+
+    def values(self):
+        """field values"""
+        return [getattr(self, key) for key in self.__slots__]
+
+    def items(self):
+        """(name, value) pairs"""
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def __eq__(self, other):
+        if isinstance(other, Entity):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Entity(%r)" % (self.to_dict())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API asyncio module
+
+Use as a Python module like:
+import asyncio
+import json
+import bluecat_bam
+
+async def main():
+    async with bluecat_bam.AsyncBAM(server, username, password) as conn:
+        r = await conn.do('getEntityByName', parentId=0, name='admin', type='User')
+        print(json.dumps(r))
+
+asyncio.get_event_loop().run_until_complete(main())
+
+AsyncBAM has the same do() contract as BAM, but do() and the list helpers
+are coroutines, so many calls can be in flight at once, like:
+    ip_lists = await asyncio.gather(
+        *[conn.get_ip_list(network["id"]) for network in network_list]
+    )
+
+The calls run on a pool of worker threads sharing one logged-in BAM session,
+so only the requests module is needed.  "concurrency" sets the number of
+worker threads, which is the most requests that will be sent to the BAM at once.
+"""
+
+import sys
+import logging
+import functools
+import asyncio
+import concurrent.futures
+
+from bluecat_bam.api import BAM
+
+
+class AsyncBAM:  # pylint: disable=R0902
+    """asyncio wrapper around BAM, with a limit on concurrent requests"""
+
+    def __init__(
+        self,
+        server,
+        username,
+        password,
+        raw=False,
+        raw_in=False,
+        timeout=None,
+        max_retries=None,
+        verify=True,
+        concurrency=10,
+    ):
+        """save settings, login happens in open() or 'async with'"""
+        self.server = server
+        self.username = username
+        self.password = password
+        self.raw = raw
+        self.raw_in = raw_in
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.verify = verify
+        self.concurrency = concurrency
+        self.executor = None
+        self.conn = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def open(self):
+        """start worker threads and login"""
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.concurrency
+        )
+        self.conn = await self.run(
+            BAM,
+            self.server,
+            self.username,
+            self.password,
+            raw=self.raw,
+            raw_in=self.raw_in,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            verify=self.verify,
+            pool_maxsize=self.concurrency,
+        )
+
+    async def close(self):
+        """logout and stop worker threads"""
+        if self.conn:
+            await self.run(self.conn.logout)
+            self.conn.close()
+            self.conn = None
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    async def run(self, func, *args, **kwargs):
+        """run a blocking BAM function in a worker thread"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def do(self, command, method=None, data=None, **kwargs):
+        # pylint: disable=invalid-name
+        """run any BlueCat REST API command"""
+        return await self.run(self.conn.do, command, method=method, data=data, **kwargs)
+
+    async def get_bam_api_list(self, apiname, **kwargs):
+        """wrap api call with loop to handle 'start' and 'count'"""
+        return await self.run(self.conn.get_bam_api_list, apiname, **kwargs)
+
+    async def get_obj(self, object_ident, containerId, object_type, warn=True):
+        """get an object, given an id, IP, CIDR, or range,
+        return object and type matched"""
+        return await self.run(
+            self.conn.get_obj, object_ident, containerId, object_type, warn=warn
+        )
+
+    async def get_obj_list(self, object_ident, containerId, object_type):
+        """get object, or a list of objects from a file or stdin('-'),
+        lines from a file are looked up concurrently"""
+        logger = logging.getLogger()
+        if object_ident == "-":
+            with sys.stdin as f:
+                lines = f.readlines()
+            return await self.get_obj_lines(lines, containerId, object_type)
+        obj, obj_type = await self.get_obj(
+            object_ident, containerId, object_type, warn=False
+        )
+        if obj and obj.get("id"):
+            return [obj]
+        if obj_type:
+            print("not found", object_ident, obj_type)
+            return []
+        # not an object, must be a file name
+        try:
+            with open(object_ident) as f:
+                lines = f.readlines()
+        except ValueError:
+            logger.info("failed to find object or open file: '%s'", object_ident)
+            return []
+        return await self.get_obj_lines(lines, containerId, object_type)
+
+    async def get_obj_lines(self, lines, containerId, object_type):
+        """get obj for each line concurrently, return obj list in line order"""
+        idents = [line.strip() for line in lines if line.strip() != ""]
+        results = await asyncio.gather(
+            *[self.get_obj(ident, containerId, object_type) for ident in idents]
+        )
+        obj_list = []
+        for ident, (obj, _) in zip(idents, results):
+            if obj and obj["id"]:
+                obj_list.append(obj)
+            else:
+                print("not found", ident)
+        return obj_list
+
+    async def get_dhcp_ranges(self, networkid):
+        """get list of ranges"""
+        return await self.get_bam_api_list(
+            "getEntities",
+            parentId=networkid,
+            type="DHCP4Range",
+        )
+
+    async def get_ip_list(self, networkid, states=None):
+        """returns [filtered] list of IP entities, given a network id
+        and optional list of states"""
+        ip_list = await self.get_bam_api_list(
+            "getEntities",
+            parentId=networkid,
+            type="IP4Address",
+        )
+        if states:
+            ip_list = [ip for ip in ip_list if ip["properties"]["state"] in states]
+        return ip_list
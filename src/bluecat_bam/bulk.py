@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) bulk writes
+
+Runs a stream of commands that change the BAM, like assignIP4Address,
+addHostRecord, update, changeStateIP4Address, or delete, on several threads
+at once, retrying the ones that fail for reasons that may pass, like:
+import bluecat_bam
+with bluecat_bam.BAM(server, username, password) as conn:
+    with open("results.ndjson", "w") as log:
+        writer = bluecat_bam.BulkWriter(conn, max_workers=8, log=log)
+        for result in writer.run(
+            ("delete", {"objectId": ip_id}) for ip_id in ip_id_list
+        ):
+            if not result["ok"]:
+                print(result["error"])
+    print(writer.counts)
+
+Operations are (command, kwargs) tuples, like for BAM.do_many(), or
+(command, kwargs, keys) to choose the keys.  Operations that share a key,
+by default the same IP address, MAC address, name, or entity id, run one
+after another in the order given, others can run at the same time.
+An entity id can be the same object as an address or name, so an operation
+keyed only by ids also waits for the ones before it keyed only by addresses,
+MAC's, or names, and the other way around.  Give both keys to avoid the wait.
+Results come back in the order given, as dicts, one JSON line each in log.
+A write that timed out may have been done by the BAM, so adds and assigns
+are only retried after errors from before the request was sent, like a
+refused connection, other writes are retried after any error that may pass.
+"""
+
+import json
+import time
+import logging
+import threading
+import collections
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from bluecat_bam.compat import basestring
+
+
+class BulkWriter:  # pylint: disable=R0902
+    """run write operations concurrently, in order for each key, with retries"""
+
+    # HTTP status codes worth retrying, the BAM or a proxy is busy
+    retry_statuses = (429, 502, 503, 504)
+    # of those, the ones that say the request was not done
+    not_done_statuses = (429, 503)
+    # commands that create something, which a retry could create twice
+    create_prefixes = ("add", "assign")
+
+    # parameter: kind of key, for the default keys of an operation
+    key_params = (
+        ("ip4Address", "ip"),
+        ("address", "ip"),
+        ("addresses", "ip"),
+        ("macAddress", "mac"),
+        ("absoluteName", "name"),
+        ("objectId", "id"),
+        ("addressId", "id"),
+        ("entityId", "id"),
+    )
+
+    def __init__(
+        self, conn, max_workers=8, retries=3, backoff=1.0, max_backoff=30.0, log=None
+    ):  # pylint: disable=R0913
+        """conn is a BAM, log is an open file for the JSON lines results"""
+        self.conn = conn
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.log = log
+        self.lock = threading.Lock()
+        self.last_done = {}  # key: Event set when its latest operation is done
+        # Events of operations not done, keyed only by "id", or only by others
+        self.partly_keyed = {"id": [], "other": []}
+        self.counts = collections.Counter()
+
+    def run(self, operations):
+        """run operations, yield a result dict for each in the same order"""
+        results = self.conn.map_ordered(
+            self.run_one, self.schedule(operations), self.max_workers
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+            with self.lock:
+                self.counts["ok" if result["ok"] else "failed"] += 1
+                if result["attempts"] > 1:
+                    self.counts["retried"] += 1
+            if self.log is not None:
+                self.log.write(json.dumps(result, default=self.to_json) + "\n")
+            yield result
+
+    def write_all(self, operations):
+        """run operations, return counts of ok, failed, and retried"""
+        for _ in self.run(operations):
+            pass
+        return dict(self.counts)
+
+    def schedule(self, operations):
+        """yield each operation with the Events to wait for and to set,
+        in the order given, so each waits for the one before with its keys"""
+        for index, operation in enumerate(operations):
+            command, kwargs = operation[0], dict(operation[1] or {})
+            if len(operation) > 2:
+                keys = operation[2]
+                if isinstance(keys, basestring) or not isinstance(
+                    keys, (list, tuple, set)
+                ):
+                    keys = [keys]
+            else:
+                keys = self.keys(command, kwargs)
+            done = threading.Event()
+            wait_for = self.wait_for_kinds(keys, done)
+            for key in keys:
+                previous = self.last_done.get(key)
+                if previous is not None and not previous.is_set():
+                    wait_for.append(previous)
+                self.last_done[key] = done
+            yield index, command, kwargs, list(keys), wait_for, done
+
+    def wait_for_kinds(self, keys, done):
+        """Events to wait for because an id key and an IP, MAC, or name key
+        could be the same object, and save done for later operations"""
+        kinds = set(
+            "id" if key[0] == "id" else "other"
+            for key in keys
+            if isinstance(key, tuple) and len(key) == 2
+        )
+        for kind in self.partly_keyed:
+            self.partly_keyed[kind] = [
+                event for event in self.partly_keyed[kind] if not event.is_set()
+            ]
+        if kinds == set(["id"]):
+            self.partly_keyed["id"].append(done)
+            return list(self.partly_keyed["other"])
+        if kinds == set(["other"]):
+            self.partly_keyed["other"].append(done)
+            return list(self.partly_keyed["id"])
+        if kinds:  # both, known by its keys to later operations
+            return self.partly_keyed["id"] + self.partly_keyed["other"]
+        return []
+
+    def keys(self, command, kwargs):
+        """default keys of an operation, the IP's, MAC's, names, and ids it
+        changes, like ("ip", "10.0.0.1"), ("mac", "001122AABBCC"), ("id", 5)"""
+        keys = set()
+        for param, kind in self.key_params:
+            value = kwargs.get(param)
+            if value in (None, ""):
+                continue
+            for one in str(value).split(","):
+                one = one.strip()
+                if not one:
+                    continue
+                if kind == "mac":
+                    one = "".join(c for c in one if c.isalnum()).upper()
+                elif kind == "name":
+                    one = one.lower().rstrip(".")
+                keys.add((kind, one))
+        data = kwargs.get("data", kwargs.get("body"))
+        if isinstance(data, basestring):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                data = None
+        if command == "update" and isinstance(data, dict) and data.get("id"):
+            keys.add(("id", str(data["id"])))
+        return sorted(keys)
+
+    def run_one(self, item):
+        """run one scheduled operation, after the ones it waits for"""
+        index, command, kwargs, keys, wait_for, done = item
+        try:
+            for previous in wait_for:
+                previous.wait()
+            return self.call(index, command, kwargs, keys)
+        finally:
+            done.set()
+
+    def call(self, index, command, kwargs, keys):
+        """do one command with retries, return its result dict"""
+        begin = time.time()
+        result = {
+            "index": index,
+            "command": command,
+            "params": kwargs,
+            "keys": keys,
+            "ok": False,
+            "result": None,
+            "error": None,
+            "status": None,
+            "attempts": 0,
+        }
+        while True:
+            result["attempts"] += 1
+            error = self.attempt(result, command, kwargs)
+            if error is None:
+                break
+            retry = self.failed(result, command, error)
+            if not retry or result["attempts"] > self.retries:
+                logging.info("%s failed: %s", command, result["error"])
+                break
+            delay = min(self.max_backoff, self.backoff * 2 ** (result["attempts"] - 1))
+            logging.info("%s failed, retry in %s seconds", command, delay)
+            time.sleep(delay)
+        result["seconds"] = round(time.time() - begin, 3)
+        return result
+
+    def attempt(self, result, command, kwargs):
+        """do command once, save its result, return the exception it raised,
+        or None if it worked"""
+        try:
+            result["result"] = self.conn.do(command, **kwargs)
+        except Exception as error:  # pylint: disable=broad-except
+            return error
+        result["ok"] = True
+        result["error"] = result["status"] = None
+        return None
+
+    def failed(self, result, command, error):
+        """save error in result, return True if command is worth retrying"""
+        create = command.startswith(self.create_prefixes)
+        if isinstance(error, requests.HTTPError):
+            response = error.response
+            result["status"] = getattr(response, "status_code", None)
+            result["error"] = getattr(response, "text", None) or str(error)
+            if create:
+                return result["status"] in self.not_done_statuses
+            return result["status"] in self.retry_statuses
+        result["status"] = None
+        result["error"] = "%s: %s" % (type(error).__name__, error)
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return not create or self.not_sent(error)
+        return False
+
+    @staticmethod
+    def not_sent(error):
+        """True if a requests error happened while connecting,
+        before the request could reach the BAM"""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = error.args[0] if error.args else None
+        reason = getattr(reason, "reason", reason)  # inside a MaxRetryError
+        return isinstance(reason, NewConnectionError)
+
+    @staticmethod
+    def to_json(obj):
+        """json.dumps default, for Entity results"""
+        if hasattr(obj, "to_dict"):
+            return obj.to_dict()
+        return str(obj)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) entity cache
+
+Keeps the results of read-only lookups that scripts repeat, like
+getEntityById and getParent, so that BAM.do() can answer them without
+another request, like:
+import bluecat_bam
+with bluecat_bam.BAM(server, username, password, cache=True) as conn:
+    conn.do("getEntityById", id=3)  # asks the BAM
+    conn.do("getEntityById", id=3)  # from the cache
+    print(conn.cache.stats())
+
+Entries expire after a time to live per command, and the least recently used
+entries are dropped when the cache is full.
+Commands that change the BAM remove the entries for the ids they touch,
+and any other change clears the whole cache, since it could move or rename
+anything.  Results with id 0 (not found) are never cached, so a lookup will
+see an entity as soon as it is added.
+"""
+
+import copy
+import json
+import time
+import logging
+import threading
+import collections
+
+from bluecat_bam.compat import basestring
+
+
+class EntityCache:  # pylint: disable=R0902
+    """thread-safe LRU cache of BAM lookup results, with per-command ttl"""
+
+    # seconds to keep each cacheable command result
+    default_ttls = {
+        "getEntityById": 60,
+        "getEntityByName": 60,
+        "getParent": 300,
+        "getEntityByCIDR": 300,
+        "getIPRangedByIP": 300,
+    }
+
+    # command: parameter that holds the id it changes, "id" in the body for update
+    write_ids = {
+        "update": "id",
+        "delete": "objectId",
+        "deleteWithOptions": "objectId",
+        "changeStateIP4Address": "addressId",
+        "resizeRange": "objectId",
+    }
+
+    # commands that can change which range or block contains an address
+    resize_commands = ("resizeRange",)
+    containment_commands = ("getIPRangedByIP", "getEntityByCIDR")
+
+    def __init__(self, maxsize=10000, ttls=None):
+        """maxsize is the most entries kept, ttls is a dict of command: seconds
+        to change or add to the default_ttls, 0 to not cache that command"""
+        self.maxsize = maxsize
+        self.ttls = dict(self.default_ttls)
+        if ttls:
+            self.ttls.update(ttls)
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()  # key: (expires, ids, obj)
+        self.id_index = {}  # id: set of keys that mention it
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def cacheable(self, command):
+        """True if results of command are kept"""
+        return bool(self.ttls.get(command))
+
+    @staticmethod
+    def key(command, params):
+        """cache key for a command and its parameters"""
+        return (command, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    def get(self, command, params):
+        """return (True, copy of cached result) or (False, None)"""
+        key = self.key(command, params)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                self.discard(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        logging.info("cache hit for %s %s", command, params)
+        return True, copy.deepcopy(entry[2])
+
+    def put(self, command, params, obj):
+        """save a copy of the result of command, unless it is not found"""
+        if not self.cacheable(command):
+            return
+        if not obj or (isinstance(obj, dict) and not obj.get("id")):
+            return
+        key = self.key(command, params)
+        ids = set(self.param_ids(params))
+        if isinstance(obj, dict):
+            ids.add(obj["id"])
+        expires = time.time() + self.ttls[command]
+        with self.lock:
+            self.discard(key)
+            self.entries[key] = (expires, ids, copy.deepcopy(obj))
+            for entity_id in ids:
+                self.id_index.setdefault(entity_id, set()).add(key)
+            while len(self.entries) > self.maxsize:
+                self.discard(next(iter(self.entries)))
+                self.evictions += 1
+
+    @staticmethod
+    def param_ids(params):
+        """integer values of the id parameters, like id, parentId, entityId"""
+        for name, value in params.items():
+            if name == "id" or name.endswith("Id"):
+                try:
+                    yield int(value)
+                except (TypeError, ValueError):
+                    pass
+
+    def discard(self, key):
+        """remove one entry, caller holds the lock"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for entity_id in entry[1]:
+            keys = self.id_index.get(entity_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.id_index[entity_id]
+
+    def invalidate(self, entity_id):
+        """remove entries for an entity, or that mention its id"""
+        try:
+            entity_id = int(entity_id)
+        except (TypeError, ValueError):
+            return
+        with self.lock:
+            keys = list(self.id_index.get(entity_id, ()))
+            for key in keys:
+                self.discard(key)
+            self.invalidations += len(keys)
+
+    def invalidate_command(self, command):
+        """remove all entries for one command"""
+        with self.lock:
+            keys = [key for key in self.entries if key[0] == command]
+            for key in keys:
+                self.discard(key)
+            self.invalidations += len(keys)
+
+    def clear(self):
+        """remove all entries"""
+        with self.lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.id_index.clear()
+
+    def after_write(self, command, params, data):
+        """forget what a command that changes the BAM may have changed"""
+        id_name = self.write_ids.get(command)
+        if id_name is None:
+            logging.info("cache cleared after %s", command)
+            self.clear()
+            return
+        if id_name == "id":
+            if isinstance(data, basestring):
+                try:
+                    data = json.loads(data)
+                except ValueError:
+                    data = None
+            entity_id = data.get("id") if isinstance(data, dict) else None
+        else:
+            entity_id = params.get(id_name)
+        if entity_id is None:
+            self.clear()
+            return
+        self.invalidate(entity_id)
+        if command in self.resize_commands:
+            for lookup in self.containment_commands:
+                self.invalidate_command(lookup)
+
+    def stats(self):
+        """dict of hits, misses, evictions, invalidations and size"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self.entries),
+            }
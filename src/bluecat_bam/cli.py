@@ -61,8 +61,10 @@ import os
 import sys
 import logging
 import json
+import socket
 import argparse
 from bluecat_bam.api import BAM
+from bluecat_bam import daemon
 
 # double underscore names
 __progname__ = "cli"
@@ -71,6 +73,62 @@ __version__ = "0.2.7"
 
 def main():
     """CLI - Command Line Interface"""
+    config = make_config()
+    args = config.parse_args()
+
+    logger = logging.getLogger()
+    logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
+    logger.setLevel(args.logging)
+
+    params = get_params(args.args)
+
+    if not (args.command or args.batch) or (args.command and args.batch):
+        print("either a command or --batch is required, but not both")
+        print("Type '%s -h' for help" % (os.path.basename(sys.argv[0])))
+        sys.exit(1)
+
+    if args.socket or args.command == "daemon":
+        check_daemon(args, params)
+
+    if not (args.server and args.username and args.password):
+        print(
+            "server, username, and password are required.\n",
+            "Please put them in the environment.\n",
+        )
+        print("Type '%s -h' for help" % (os.path.basename(sys.argv[0])))
+        # config.print_help()  # printing full help on every mistake is too much
+        # raise ValueError  # stacktrace here is not useful
+        sys.exit(2)
+    logging.debug("raw: %s", args.raw)
+    if not args.raw:
+        args.raw = False
+        logging.debug("raw_in changed to False")
+    else:
+        args.raw = make_bool(args.raw)
+        logging.debug("raw_in made bool")
+
+    logging.debug("raw_in: %s", args.raw_in)
+    if not args.raw_in:
+        args.raw_in = False
+    else:
+        args.raw_in = make_bool(args.raw_in)
+    logging.debug("raw_in: %s", args.raw_in)
+
+    # call MAIN
+    with BAM(
+        args.server,
+        args.username,
+        args.password,
+        raw=args.raw,
+        raw_in=args.raw_in,
+        verify=args.verify,
+        token_cache=args.token_cache,
+    ) as conn:
+        run_command(conn, args, params)
+
+
+def make_config():
+    """argument parser for the CLI"""
     config = argparse.ArgumentParser(
         description="BlueCat Address Manager raw JSON REST API python module and CLI"
     )
@@ -119,19 +177,47 @@ def main():
     )
     config.add_argument("--verify", default=True, help="verify SSL Cert, default True")
     config.add_argument(
-        "command", help="BlueCat REST API command, for example: getEntityById"
+        "--token_cache",
+        default=os.getenv("BLUECAT_TOKEN_CACHE"),
+        help="file to save the login token in, so that later calls can reuse it "
+        + "instead of logging in and out every time",
+    )
+    config.add_argument(
+        "--batch",
+        "-b",
+        help="file (or '-' for stdin) with one json command per line, like: "
+        + '{"command": "getEntityById", "id": 123}, '
+        + "prints one json result per line, in the same order",
+    )
+    config.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help="number of batch commands to run at the same time, default 1",
+    )
+    config.add_argument(
+        "--socket",
+        default=os.getenv("BLUECAT_SOCKET"),
+        help="Unix socket of a 'bam daemon' to send commands to, "
+        + "or for 'bam daemon' to listen on",
+    )
+    config.add_argument(
+        "command",
+        nargs="?",
+        help="BlueCat REST API command, for example: getEntityById, "
+        + "or 'daemon' to keep a session open and answer commands on --socket",
     )
     config.add_argument("args", nargs=argparse.REMAINDER)
-    args = config.parse_args()
+    return config
 
-    logger = logging.getLogger()
-    logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
-    logger.setLevel(args.logging)
 
+def get_params(pairs):
+    """params dictionary from name=value command line arguments"""
     # should use a 'comprehension' ?? ***
     params = {}  # create the params dictionary
     params["body"] = None  # default value
-    for pair in args.args:
+    for pair in pairs:
         try:
             name, value = pair.split("=", 1)  # "1" means only split on first "="
             params[name] = value
@@ -141,45 +227,96 @@ def main():
             # config.print_help()  # printing full help on every mistake is too much
             # raise ValueError  # stacktrace here is not useful
             sys.exit(1)
+    return params
 
-    if not (args.server and args.username and args.password):
-        print(
-            "server, username, and password are required.\n",
-            "Please put them in the environment.\n",
-        )
-        print("Type '%s -h' for help" % (os.path.basename(sys.argv[0])))
-        # config.print_help()  # printing full help on every mistake is too much
-        # raise ValueError  # stacktrace here is not useful
-        sys.exit(2)
-    logging.debug("raw: %s", args.raw)
-    if not args.raw:
-        args.raw = False
-        logging.debug("raw_in changed to False")
-    else:
-        args.raw = make_bool(args.raw)
-        logging.debug("raw_in made bool")
 
-    logging.debug("raw_in: %s", args.raw_in)
-    if not args.raw_in:
-        args.raw_in = False
-    else:
-        args.raw_in = make_bool(args.raw_in)
-    logging.debug("raw_in: %s", args.raw_in)
+def check_daemon(args, params):
+    """send the command to a running 'bam daemon' and exit,
+    or return to call the BAM directly"""
+    if args.command == "daemon":
+        if not args.socket:
+            print("daemon requires --socket or BLUECAT_SOCKET")
+            sys.exit(1)
+        return
+    if args.command:
+        if os.path.exists(args.socket):
+            status = call_daemon(args.socket, args.command, params)
+            if status is not None:
+                sys.exit(status)
+        else:
+            logging.info("no daemon socket %s, calling BAM directly", args.socket)
 
-    # call MAIN
-    with BAM(
-        args.server,
-        args.username,
-        args.password,
-        raw=args.raw,
-        raw_in=args.raw_in,
-        verify=args.verify,
-    ) as conn:
-        entity = conn.do(args.command, **params)
+
+def run_command(conn, args, params):
+    """run the batch, the daemon, or one command, on a logged-in conn"""
+    if args.batch:
+        failed = run_batch(conn, args.batch, args.workers)
+        if failed:
+            sys.exit(1)
+        return
+    if args.command == "daemon":
+        daemon.serve(conn, args.socket)
+        return
+    entity = conn.do(args.command, **params)
+    try:
+        print(json.dumps(entity))
+    except ValueError:
+        print("Failed to convert to json: %s" % (entity))
+
+
+def call_daemon(socket_path, command, params):
+    """send command to 'bam daemon', print result, return exit status,
+    or None if no daemon answers on socket_path"""
+    params = {name: value for name, value in params.items() if value is not None}
+    try:
+        reply = daemon.call(socket_path, command, params)
+    except socket.error as errormsg:
+        # stale socket left by a daemon that was killed, or it died mid-request
+        logging.info("daemon %s: %s, calling BAM directly", socket_path, errormsg)
+        return None
+    if "error" in reply:
+        print(reply["error"], file=sys.stderr)
+        return 1
+    print(json.dumps(reply.get("result")))
+    return 0
+
+
+def run_batch(conn, filename, workers):
+    """run one json command per line from file or stdin('-'),
+    print one json result per line in the same order,
+    a failed command prints {"error": "message"},
+    returns number of failed commands"""
+    if filename == "-":
+        return print_batch(conn, sys.stdin, workers)
+    with open(filename) as f:
+        return print_batch(conn, f, workers)
+
+
+def print_batch(conn, lines, workers):
+    """run batch lines, print results, return number of failures"""
+    failed = 0
+    lines = (line for line in lines if line.strip() != "")
+    for result in conn.map_ordered(
+        lambda line: do_batch_line(conn, line), lines, workers
+    ):
+        if isinstance(result, Exception):
+            failed += 1
+            result = {"error": "%s: %s" % (type(result).__name__, result)}
         try:
-            print(json.dumps(entity))
+            print(json.dumps(result))
         except ValueError:
-            print("Failed to convert to json: %s" % (entity))
+            failed += 1
+            print(json.dumps({"error": "Failed to convert to json: %s" % (result)}))
+    return failed
+
+
+def do_batch_line(conn, line):
+    """run one json command like {"command": "getEntityById", "id": 123}"""
+    params = json.loads(line)
+    if not isinstance(params, dict) or not params.get("command"):
+        raise ValueError("batch line needs a json object with a command")
+    command = params.pop("command")
+    return conn.do(command, **params)
 
 
 def make_bool(var):
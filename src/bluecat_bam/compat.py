@@ -0,0 +1,8 @@
+"""python 2 and 3 compatibility, like:
+from bluecat_bam.compat import basestring
+"""
+
+try:
+    basestring = basestring  # pylint: disable=E0601,W0127,C0103,W0622
+except NameError:
+    basestring = str  # pylint: disable=invalid-name,redefined-builtin
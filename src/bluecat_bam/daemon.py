@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) session daemon
+
+Keeps one logged-in BAM session open, and answers commands sent over a
+Unix domain socket, so that each CLI call does not have to connect and login:
+export BLUECAT_SOCKET=~/.bluecat_bam.sock
+bam daemon &
+bam getEntityById id=3
+
+The socket is created readable only by the owner, since anyone who can
+connect to it can use the session.
+
+Protocol, one json object per line each way:
+{"command": "getEntityById", "id": 3}
+{"result": {"id": 3, "name": "admin", "type": "User", "properties": {...}}}
+or, if the command failed:
+{"error": "HTTPError: 500 Server Error ..."}
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+
+import os
+import sys
+import stat
+import json
+import signal
+import socket
+import logging
+
+try:
+    import socketserver
+except ImportError:  # python 2
+    import SocketServer as socketserver
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """answer each json command line with a json reply line"""
+
+    def handle(self):
+        for line in self.rfile:
+            if line.strip() == b"":
+                continue
+            reply = do_request(self.server.conn, line.decode("utf-8"))
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def do_request(conn, line):
+    """run one json command line, return reply dict"""
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict) or not request.get("command"):
+            raise ValueError("request needs a json object with a command")
+        command = request.pop("command")
+        return {"result": conn.do(command, **request)}
+    except Exception as errormsg:  # pylint: disable=broad-except
+        logging.info("daemon command failed: %s", errormsg)
+        return {"error": "%s: %s" % (type(errormsg).__name__, errormsg)}
+
+
+def serve(conn, socket_path):
+    """serve commands on socket_path using conn, until interrupted"""
+    if os.path.exists(socket_path):
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            print("ERROR - %s exists and is not a socket" % (socket_path))
+            sys.exit(1)
+        if answers(socket_path):
+            print("ERROR - a daemon is already listening on %s" % (socket_path))
+            sys.exit(1)
+        os.remove(socket_path)  # left over from a previous daemon
+    old_umask = os.umask(0o177)  # socket mode 0600
+    try:
+        server = socketserver.ThreadingUnixStreamServer(socket_path, CommandHandler)
+    finally:
+        os.umask(old_umask)
+    server.daemon_threads = True
+    server.conn = conn
+    # stop cleanly on kill, so the socket is removed and the session logged out
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    logging.info("listening on %s", socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+def answers(socket_path):
+    """True if a daemon accepts connections on socket_path"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def call(socket_path, command, params):
+    """send one command to the daemon, return the reply dict,
+    raises socket.error if there is no daemon or it closes without a reply"""
+    request = dict(params)
+    request["command"] = command
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reply_file:
+            reply = reply_file.readline()
+    finally:
+        sock.close()
+    if not reply:
+        raise socket.error("no reply from daemon on %s" % (socket_path))
+    return json.loads(reply.decode("utf-8"))
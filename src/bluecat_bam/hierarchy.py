@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) hierarchy index
+
+Remembers the parent of each entity that BAM has seen, from getParent replies
+and from lists of children like getEntities, so that walking up the tree,
+like finding the View of a record or the Configuration of a network,
+only asks the BAM for the links it does not already know, like:
+import bluecat_bam
+with bluecat_bam.BAM(server, username, password) as conn:
+    view = conn.hierarchy.find_ancestor(conn, record_id, "View")
+
+Only the container types that are looked up as ancestors are kept from lists
+of children, not the IP's and records in them, and the least recently used
+links and entities are dropped when the index is full, to keep memory small.
+Entities are returned as copies, so callers can change them.
+"""
+
+import copy
+import json
+import logging
+import threading
+import collections
+
+from bluecat_bam.compat import basestring
+
+
+class HierarchyIndex:
+    """thread-safe map of entity id to parent, filled in as BAM replies are seen"""
+
+    # entities kept from lists of children, the ancestors that get looked up
+    container_types = (
+        "Configuration",
+        "View",
+        "Zone",
+        "IP4Block",
+        "IP4Network",
+        "IP6Block",
+        "IP6Network",
+    )
+
+    # commands that list or find children of the parentId parameter
+    child_commands = (
+        "getEntities",
+        "getEntitiesByName",
+        "getEntitiesByNameUsingOptions",
+        "getEntityByName",
+        "getZonesByHint",
+        "getIP4NetworksByHint",
+    )
+
+    # writes that can not move existing entities, so the index is kept
+    keep_prefixes = ("add", "assign", "change", "link", "unlink", "deploy", "select")
+    # but adding one of these can put it between existing entities and parents
+    move_words = ("Block", "Network", "Range", "Zone")
+
+    def __init__(self, maxsize=10000):
+        """maxsize is the most links, and the most entities, kept"""
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.parents = collections.OrderedDict()  # entity id: parent id, 0 at top
+        self.entities = collections.OrderedDict()  # entity id: container entity
+        self.fetches = 0  # getParent calls made for missing links
+        self.evictions = 0
+
+    def keep(self, entries, key, value):
+        """add or refresh an LRU entry, dropping the oldest if full,
+        caller holds the lock"""
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def record(self, entity_id, parent_obj):
+        """save the parent entity of entity_id, from getParent"""
+        parent_id = parent_obj.get("id", 0) if parent_obj else 0
+        with self.lock:
+            self.keep(self.parents, entity_id, parent_id)
+            if parent_id:
+                self.keep(self.entities, parent_id, copy.deepcopy(parent_obj))
+
+    def record_children(self, parent_id, children):
+        """save the parent of each container child, from a list of children"""
+        with self.lock:
+            for child in children:
+                if not child or not child.get("id"):
+                    continue
+                if child.get("type") in self.container_types:
+                    self.keep(self.parents, child["id"], parent_id)
+                    self.keep(self.entities, child["id"], copy.deepcopy(child))
+
+    def observe(self, command, params, obj):
+        """record links from a BAM reply, called by BAM.do()"""
+        try:
+            if command == "getParent":
+                if hasattr(obj, "get"):  # entity dict, or compact Entity
+                    self.record(int(params["entityId"]), obj)
+            elif command in self.child_commands and "parentId" in params:
+                children = obj if isinstance(obj, list) else [obj]
+                self.record_children(int(params["parentId"]), children)
+        except (KeyError, TypeError, ValueError):
+            logging.info("hierarchy could not use %s reply", command)
+
+    def after_write(self, command, params, data):
+        """forget links that a command that changes the BAM may have changed"""
+        if command in ("delete", "deleteWithOptions"):
+            self.forget(params.get("objectId"))
+        elif command == "update":
+            if isinstance(data, basestring):
+                try:
+                    data = json.loads(data)
+                except ValueError:
+                    data = None
+            if isinstance(data, dict):
+                self.forget(data.get("id"))
+            else:
+                self.clear()  # could be a rename of any ancestor
+        elif command.startswith(self.keep_prefixes) and not any(
+            word in command for word in self.move_words
+        ):
+            pass
+        else:
+            logging.info("hierarchy cleared after %s", command)
+            self.clear()
+
+    def forget(self, entity_id):
+        """remove what is known about one entity"""
+        try:
+            entity_id = int(entity_id)
+        except (TypeError, ValueError):
+            self.clear()
+            return
+        with self.lock:
+            self.parents.pop(entity_id, None)
+            self.entities.pop(entity_id, None)
+
+    def clear(self):
+        """forget everything"""
+        with self.lock:
+            self.parents.clear()
+            self.entities.clear()
+
+    def get_parent(self, conn, entity_id):
+        """return a copy of the parent entity of entity_id, or None at the top,
+        using BAM conn only if the link or parent entity is not known"""
+        entity_id = int(entity_id)
+        with self.lock:
+            parent_id = self.parents.get(entity_id)
+            if parent_id == 0:
+                self.parents.move_to_end(entity_id)
+                return None
+            parent_obj = self.entities.get(parent_id)
+            if parent_obj is not None:
+                self.parents.move_to_end(entity_id)
+                self.entities.move_to_end(parent_id)
+        if parent_obj is not None:
+            return copy.deepcopy(parent_obj)
+        parent_obj = conn.do("getParent", entityId=entity_id)
+        with self.lock:
+            self.fetches += 1
+        self.record(entity_id, parent_obj)
+        if not parent_obj or not parent_obj.get("id"):
+            return None
+        return parent_obj
+
+    def ancestors(self, conn, entity_id):
+        """yield each parent entity going up the tree from entity_id"""
+        parent_obj = self.get_parent(conn, entity_id)
+        while parent_obj is not None:
+            yield parent_obj
+            parent_obj = self.get_parent(conn, parent_obj["id"])
+
+    def find_ancestor(self, conn, entity_id, entity_type):
+        """return the closest ancestor of entity_id with type entity_type,
+        or None if there is none"""
+        for parent_obj in self.ancestors(conn, entity_id):
+            logging.info(
+                "id: %s, name: %s, type: %s",
+                parent_obj["id"],
+                parent_obj["name"],
+                parent_obj["type"],
+            )
+            if parent_obj["type"] == entity_type:
+                return parent_obj
+        return None
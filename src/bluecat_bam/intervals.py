@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) address space as interval sets
+
+Sets of IP addresses kept as sorted runs of integers, so that finding free
+space in a network is arithmetic on a few runs, not a loop over each address:
+import bluecat_bam
+from bluecat_bam.intervals import NetworkSpace
+
+with bluecat_bam.BAM(server, username, password) as conn:
+    range_list = conn.get_dhcp_ranges(network_obj["id"])
+    ip_list = conn.get_ip_list(network_obj["id"])
+    space = NetworkSpace(network_obj, range_list, ip_list)
+    print(space.to_addresses(space.free.first_fit(32)))
+
+Runs are (start, end) pairs of integers, with both ends in the set.
+"""
+
+import bisect
+import ipaddress
+
+
+class IntervalSet:
+    """immutable set of integers, as sorted, merged (start, end) runs"""
+
+    def __init__(self, runs=()):
+        self.runs = []
+        for start, end in sorted((int(start), int(end)) for start, end in runs):
+            if start > end:
+                continue
+            if self.runs and start <= self.runs[-1][1] + 1:
+                if end > self.runs[-1][1]:
+                    self.runs[-1] = (self.runs[-1][0], end)
+            else:
+                self.runs.append((start, end))
+        self.starts = [start for start, _ in self.runs]
+
+    @classmethod
+    def from_values(cls, values):
+        """set holding each of values, integers or ipaddress objects"""
+        return cls((value, value) for value in values)
+
+    def __iter__(self):
+        return iter(self.runs)
+
+    def __bool__(self):
+        return bool(self.runs)
+
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        return isinstance(other, IntervalSet) and self.runs == other.runs
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "IntervalSet(%s)" % self.runs
+
+    def __contains__(self, value):
+        index = bisect.bisect_right(self.starts, int(value)) - 1
+        return index >= 0 and int(value) <= self.runs[index][1]
+
+    def size(self):
+        """number of integers in the set"""
+        return sum(end - start + 1 for start, end in self.runs)
+
+    def union(self, other):
+        """integers in either set"""
+        return IntervalSet(self.runs + list(other))
+
+    def intersection(self, other):
+        """integers in both sets"""
+        runs = []
+        other_runs = list(other)
+        i = j = 0
+        while i < len(self.runs) and j < len(other_runs):
+            start = max(self.runs[i][0], other_runs[j][0])
+            end = min(self.runs[i][1], other_runs[j][1])
+            if start <= end:
+                runs.append((start, end))
+            if self.runs[i][1] < other_runs[j][1]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet(runs)
+
+    def difference(self, other):
+        """integers in this set and not in other"""
+        runs = []
+        other_runs = list(other)
+        j = 0
+        for start, end in self.runs:
+            while j < len(other_runs) and other_runs[j][1] < start:
+                j += 1
+            k = j
+            while k < len(other_runs) and other_runs[k][0] <= end:
+                if other_runs[k][0] > start:
+                    runs.append((start, other_runs[k][0] - 1))
+                start = max(start, other_runs[k][1] + 1)
+                k += 1
+            if start <= end:
+                runs.append((start, end))
+        return IntervalSet(runs)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def largest(self):
+        """longest run, the first one if tied, or None if empty"""
+        best_start = best_end = None
+        for start, end in self.runs:
+            if best_start is None or end - start > best_end - best_start:
+                best_start, best_end = start, end
+        if best_start is None:
+            return None
+        return (best_start, best_end)
+
+    def first_fit(self, count):
+        """lowest run of count contiguous integers, or None if none are long enough"""
+        for start, end in self.runs:
+            if end - start + 1 >= count:
+                return (start, start + count - 1)
+        return None
+
+    def nth(self, count, reverse=False):
+        """the count'th integer of the set, counting from 1 at the lowest,
+        or at the highest if reverse, or None if the set is smaller"""
+        for start, end in reversed(self.runs) if reverse else self.runs:
+            if count <= end - start + 1:
+                return end - count + 1 if reverse else start + count - 1
+            count -= end - start + 1
+        return None
+
+
+class NetworkSpace:
+    """address space of one network, from its entity, DHCP ranges, and IP's"""
+
+    # states of IP's handed out by DHCP
+    active_states = ("DHCP_ALLOCATED", "DHCP_RESERVED")
+    # states of IP's set aside by hand
+    reserved_states = ("STATIC", "RESERVED", "GATEWAY")
+    # states that leave an IP available
+    free_states = ("DHCP_FREE", "UNALLOCATED")
+
+    def __init__(self, network_obj, range_list=(), ip_list=()):
+        self.network_obj = network_obj
+        properties = network_obj["properties"]
+        self.network_net = ipaddress.ip_network(
+            properties.get("CIDR") or properties["prefix"]
+        )
+        self.address_class = type(self.network_net.network_address)
+        first = int(self.network_net.network_address)
+        last = int(self.network_net.broadcast_address)
+        self.network = IntervalSet([(first, last)])
+        if self.network_net.version == 4 and self.network_net.prefixlen < 31:
+            self.hosts = IntervalSet([(first + 1, last - 1)])
+        else:
+            self.hosts = self.network
+        self.ranges = IntervalSet(
+            (
+                ipaddress.ip_address(range_obj["properties"]["start"]),
+                ipaddress.ip_address(range_obj["properties"]["end"]),
+            )
+            for range_obj in range_list
+        )
+        states = {}
+        for ip_obj in ip_list:
+            ip_properties = ip_obj["properties"]
+            states.setdefault(ip_properties.get("state"), []).append(
+                ipaddress.ip_address(ip_properties["address"])
+            )
+        self.by_state = {
+            state: IntervalSet.from_values(addresses)
+            for state, addresses in states.items()
+        }
+
+    def in_states(self, states):
+        """addresses of IP's in any of states"""
+        found = IntervalSet()
+        for state in states:
+            found = found | self.by_state.get(state, IntervalSet())
+        return found
+
+    @property
+    def active(self):
+        """addresses handed out by DHCP"""
+        return self.in_states(self.active_states)
+
+    @property
+    def reserved(self):
+        """addresses set aside by hand"""
+        return self.in_states(self.reserved_states)
+
+    @property
+    def used(self):
+        """addresses with an IP in any state that is not free"""
+        return self.in_states(
+            state for state in self.by_state if state not in self.free_states
+        )
+
+    @property
+    def free(self):
+        """host addresses with no IP, or an IP that is free"""
+        return self.hosts - self.used
+
+    def to_addresses(self, run):
+        """(start, end) integers as ipaddress objects, or None"""
+        if run is None:
+            return None
+        return (self.address_class(run[0]), self.address_class(run[1]))
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+"""Columnar table of the IP addresses in one IPv4 network, for fast counting
+
+Needs numpy (pip install numpy), like:
+import bluecat_bam
+from bluecat_bam.network_table import NetworkTable
+
+with bluecat_bam.BAM(server, username, password) as conn:
+    table = NetworkTable.from_network(conn, network_obj)
+    print(table.state_histogram())
+    count_in, count_out = table.split_by_ranges(conn.get_dhcp_ranges(network_id))
+
+Each IP4Address entity is one row, sorted by address, with columns of
+address integers, state codes, and MAC address integers (0 for none).
+Addresses with no entity count as state "Free".
+"""
+
+import ipaddress
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class NetworkTable:  # pylint: disable=R0902
+    """address, state, and MAC columns for the IP entities in one IPv4 network"""
+
+    free = "Free"  # state name for addresses without an entity
+
+    def __init__(self, network_obj, ip_list):
+        """network_obj is the IP4Network entity, ip_list from get_ip_list"""
+        if numpy is None:
+            raise ImportError("NetworkTable requires numpy, pip install numpy")
+        self.network_obj = network_obj
+        self.network = ipaddress.IPv4Network(network_obj["properties"]["CIDR"])
+        self.network_int = int(self.network.network_address)
+        self.broadcast_int = int(self.network.broadcast_address)
+        if self.network.prefixlen < 31:
+            self.first_host = self.network_int + 1
+            self.last_host = self.broadcast_int - 1
+        else:
+            self.first_host = self.network_int
+            self.last_host = self.broadcast_int
+        self.state_names = [self.free]
+        state_codes = {self.free: 0}
+        addresses = []
+        states = []
+        macs = []
+        ids = []
+        for ip_obj in ip_list:
+            properties = ip_obj["properties"]
+            addresses.append(int(ipaddress.IPv4Address(properties["address"])))
+            state = properties.get("state")
+            if state not in state_codes:
+                state_codes[state] = len(self.state_names)
+                self.state_names.append(state)
+            states.append(state_codes[state])
+            macs.append(self.mac_to_int(properties.get("macAddress")))
+            ids.append(ip_obj["id"])
+        order = numpy.argsort(numpy.array(addresses, dtype=numpy.uint32))
+        self.addresses = numpy.array(addresses, dtype=numpy.uint32)[order]
+        self.states = numpy.array(states, dtype=numpy.uint8)[order]
+        self.macs = numpy.array(macs, dtype=numpy.uint64)[order]
+        self.ids = numpy.array(ids, dtype=numpy.int64)[order]
+
+    @classmethod
+    def from_network(cls, conn, network_obj, window=1):
+        """get the IP list for network_obj from BAM conn, and make the table"""
+        return cls(network_obj, conn.get_ip_list(network_obj["id"], window=window))
+
+    @staticmethod
+    def mac_to_int(mac):
+        """MAC address string in any common format to integer, 0 for none"""
+        if not mac:
+            return 0
+        return int(mac.replace("-", "").replace(":", "").replace(".", ""), 16)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def host_mask(self):
+        """rows that are usable host addresses (not network or broadcast)"""
+        return (self.addresses >= self.first_host) & (self.addresses <= self.last_host)
+
+    def count_states(self, mask, free_count):
+        """dict of state name: count for the rows in mask, plus free_count"""
+        counts = numpy.bincount(self.states[mask], minlength=len(self.state_names))
+        histogram = {
+            name: int(count)
+            for name, count in zip(self.state_names, counts)
+            if count and name != self.free
+        }
+        if free_count:
+            histogram[self.free] = int(free_count)
+        return histogram
+
+    def state_histogram(self):
+        """dict of state name: count, for host addresses, including Free"""
+        hosts = self.host_mask()
+        host_count = self.last_host - self.first_host + 1
+        return self.count_states(hosts, host_count - int(hosts.sum()))
+
+    def range_bounds(self, range_list):
+        """sorted start and end integer arrays for DHCP range entities"""
+        bounds = sorted(
+            (
+                int(ipaddress.IPv4Address(dhcp_range["properties"]["start"])),
+                int(ipaddress.IPv4Address(dhcp_range["properties"]["end"])),
+            )
+            for dhcp_range in range_list
+        )
+        starts = numpy.array([start for start, _ in bounds], dtype=numpy.uint32)
+        ends = numpy.array([end for _, end in bounds], dtype=numpy.uint32)
+        return starts, ends
+
+    def range_mask(self, range_list):
+        """rows with addresses inside any of the DHCP ranges"""
+        starts, ends = self.range_bounds(range_list)
+        if len(starts) == 0:
+            return numpy.zeros(len(self.addresses), dtype=bool)
+        index = numpy.searchsorted(starts, self.addresses, side="right") - 1
+        inside = index >= 0
+        return inside & (self.addresses <= ends[numpy.maximum(index, 0)])
+
+    def split_by_ranges(self, range_list):
+        """(count_in, count_out) dicts of state name: count for host addresses
+        inside and outside of the DHCP ranges, including Free"""
+        starts, ends = self.range_bounds(range_list)
+        hosts = self.host_mask()
+        inside = self.range_mask(range_list) & hosts
+        outside = hosts & ~inside
+        # range addresses that are hosts, clipped to the network
+        range_size = int(
+            (
+                numpy.minimum(ends.astype(numpy.int64), self.last_host)
+                - numpy.maximum(starts.astype(numpy.int64), self.first_host)
+                + 1
+            )
+            .clip(min=0)
+            .sum()
+        )
+        host_count = self.last_host - self.first_host + 1
+        count_in = self.count_states(inside, range_size - int(inside.sum()))
+        count_out = self.count_states(
+            outside, host_count - range_size - int(outside.sum())
+        )
+        return count_in, count_out
+
+    def free_mask(self):
+        """boolean array for every address in the network, indexed by offset
+        from the network address, True for host addresses with no entity"""
+        mask = numpy.zeros(self.broadcast_int - self.network_int + 1, dtype=bool)
+        first = self.first_host - self.network_int
+        stop = self.last_host - self.network_int + 1
+        mask[first:stop] = True
+        mask[self.addresses.astype(numpy.int64) - self.network_int] = False
+        return mask
+
+    def free_addresses(self):
+        """integer array of host addresses with no entity"""
+        offsets = numpy.flatnonzero(self.free_mask())
+        return (offsets + self.network_int).astype(numpy.uint32)
+
+    def mac_mask(self, macs):
+        """rows whose MAC address is in macs (strings or integers)"""
+        wanted = numpy.array(
+            [mac if isinstance(mac, int) else self.mac_to_int(mac) for mac in macs],
+            dtype=numpy.uint64,
+        )
+        return (self.macs != 0) & numpy.isin(self.macs, wanted)
+
+    def join_macs(self, other):
+        """arrays of row indexes (mine, theirs) with the same MAC address in
+        another NetworkTable, using the first matching row of other"""
+        mine = numpy.flatnonzero(self.macs != 0)
+        theirs = numpy.flatnonzero(other.macs != 0)
+        order = numpy.argsort(other.macs[theirs], kind="stable")
+        sorted_macs = other.macs[theirs][order]
+        position = numpy.searchsorted(sorted_macs, self.macs[mine])
+        found = position < len(sorted_macs)
+        found[found] = sorted_macs[position[found]] == self.macs[mine][found]
+        return mine[found], theirs[order[position[found]]]
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) IPv4 range index
+
+All the IP4Blocks, IP4Networks, and DHCP4Ranges of one Configuration, loaded
+once, so that finding the block, network, or range that holds an address, or
+the object for a CIDR, does not need a getIPRangedByIP or getEntityByCIDR call:
+import bluecat_bam
+with bluecat_bam.BAM(server, username, password) as conn:
+    conn.load_range_index(configuration_id)
+    network_obj = conn.get_range("10.1.2.0", configuration_id, "IP4Network")
+
+CIDR blocks and networks are found by longest prefix match, with one dict per
+prefix length.  DHCP ranges do not overlap, so they are found by bisect on
+their start addresses.  Blocks given as start-end instead of a CIDR are few,
+and are checked one by one.
+When a Block and a Network have the same CIDR, the Network is the closer match,
+which is what getIPRangedByIP should return, but does not.
+"""
+
+import json
+import bisect
+import logging
+import ipaddress
+
+from bluecat_bam.compat import basestring
+
+
+class IPRangeIndex:  # pylint: disable=R0902
+    """IPv4 blocks, networks, and DHCP ranges of one Configuration"""
+
+    # parent type: child types to list under it
+    child_types = {
+        "Configuration": ("IP4Block",),
+        "IP4Block": ("IP4Block", "IP4Network", "DHCP4Range"),
+        "IP4Network": ("DHCP4Range",),
+    }
+
+    # types of the entities in the index
+    entity_types = ("IP4Block", "IP4Network", "DHCP4Range")
+    # writes that can change the index, with no type or id to check
+    change_commands = ("moveIPObject",)
+
+    def __init__(self, configuration_id):
+        self.configuration_id = configuration_id
+        self.cidrs = {}  # prefix length: {network address int: [entities]}
+        self.prefix_lengths = []  # longest first
+        self.range_starts = []  # sorted DHCP range start ints
+        self.ranges = []  # (start int, end int, entity), same order
+        self.other_blocks = []  # (start int, end int, entity), not CIDR
+        self.ids = set()  # ids of indexed entities, to know when to reload
+
+    def load(self, conn, max_workers=8):
+        """list all blocks, networks and ranges using BAM conn,
+        and record their parents in conn.hierarchy"""
+        root = {"id": self.configuration_id, "type": "Configuration"}
+        for _, parent_id, entity in conn.walk_tree(root, self.child_types, max_workers):
+            conn.hierarchy.record_children(parent_id, [entity])
+            self.add(entity)
+        self.finish()
+        logging.info(
+            "range index for configuration %s: %s objects",
+            self.configuration_id,
+            len(self.ids),
+        )
+        return self
+
+    def add(self, entity):
+        """index one block, network, or range, call finish() after the last"""
+        self.ids.add(entity["id"])
+        properties = entity["properties"]
+        cidr = properties.get("CIDR")
+        if cidr:
+            network = ipaddress.IPv4Network(cidr)
+            self.cidrs.setdefault(network.prefixlen, {}).setdefault(
+                int(network.network_address), []
+            ).append(entity)
+            return
+        start = int(ipaddress.IPv4Address(properties["start"]))
+        end = int(ipaddress.IPv4Address(properties["end"]))
+        if entity["type"] == "DHCP4Range":
+            self.ranges.append((start, end, entity))
+        else:
+            self.other_blocks.append((start, end, entity))
+
+    def finish(self):
+        """sort after adding"""
+        self.prefix_lengths = sorted(self.cidrs, reverse=True)
+        self.ranges.sort(key=lambda item: item[0])
+        self.range_starts = [start for start, _, _ in self.ranges]
+        # Network before Block with the same CIDR
+        for by_address in self.cidrs.values():
+            for entity_list in by_address.values():
+                entity_list.sort(key=lambda entity: entity["type"] != "IP4Network")
+
+    @staticmethod
+    def covers(address):
+        """True if address is IPv4, which is all this index has"""
+        try:
+            ipaddress.IPv4Address(address)
+        except ValueError:
+            return False
+        return True
+
+    def get_range(self, address, object_type=""):
+        """closest DHCP range, network, or block holding address,
+        only of object_type if given, or None"""
+        address_int = int(ipaddress.IPv4Address(address))
+        if object_type in ("", "DHCP4Range"):
+            index = bisect.bisect_right(self.range_starts, address_int) - 1
+            if index >= 0 and address_int <= self.ranges[index][1]:
+                return self.ranges[index][2]
+            if object_type:
+                return None
+        best = None
+        best_size = None
+        for prefix_length in self.prefix_lengths:
+            key = address_int >> (32 - prefix_length) << (32 - prefix_length)
+            for entity in self.cidrs[prefix_length].get(key, ()):
+                if not object_type or entity["type"] == object_type:
+                    best = entity
+                    best_size = 1 << (32 - prefix_length)
+                    break
+            if best is not None:
+                break
+        if object_type in ("", "IP4Block"):
+            for start, end, entity in self.other_blocks:
+                size = end - start + 1
+                if start <= address_int <= end and (best is None or size < best_size):
+                    best = entity
+                    best_size = size
+        return best
+
+    def get_cidr(self, cidr, object_type=""):
+        """block or network with exactly this CIDR, Network first if both,
+        only of object_type if given, or None"""
+        network = ipaddress.IPv4Network(cidr)
+        by_address = self.cidrs.get(network.prefixlen, {})
+        for entity in by_address.get(int(network.network_address), ()):
+            if not object_type or entity["type"] == object_type:
+                return entity
+        return None
+
+    def changed_by(self, command, params, data):
+        """True if a command that changes the BAM may have changed this index"""
+        if command in self.change_commands or any(
+            word in command for word in ("Block", "Network", "Range")
+        ):
+            return True
+        if command in ("addEntity", "update"):
+            data = self.body_dict(data)
+            if data is None:
+                return True
+            if command == "addEntity":
+                return data.get("type") in self.entity_types
+            changed_id = data.get("id")
+        elif command in ("delete", "deleteWithOptions"):
+            changed_id = params.get("objectId")
+        else:
+            return False
+        try:
+            return int(changed_id) in self.ids
+        except (TypeError, ValueError):
+            return True
+
+    @staticmethod
+    def body_dict(data):
+        """body of a write as a dict, or None if it is not one"""
+        if isinstance(data, basestring):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                return None
+        return data if isinstance(data, dict) else None
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) server index
+
+All the Servers and NetworkServerInterfaces of one Configuration, loaded once
+with paged list calls, so that finding a server by any of its names is a
+dictionary lookup, like:
+import bluecat_bam
+with bluecat_bam.BAM(server, username, password) as conn:
+    server_obj, interface_obj = conn.getserver("dns1", configuration_id)
+
+Names are matched without regard to case.  An interface name matches by its
+full name or any leading part ending at a dot, so "dns1" finds interface
+"dns1.domain.example".  A server matches by its display name, its
+fullHostName, or the first label of its fullHostName.
+"""
+
+import re
+import json
+import logging
+
+from bluecat_bam.compat import basestring
+
+
+class ServerIndex:
+    """servers and interfaces of one Configuration, keyed by lower case names"""
+
+    # server commands that do not change servers or interfaces
+    deploy_prefixes = ("deploy", "quickDeploy", "selectiveDeploy")
+
+    def __init__(self, configuration_id):
+        self.configuration_id = configuration_id
+        self.interfaces = []  # (server_obj, interface_obj)
+        self.by_interface_name = {}  # name or dotted prefix: [(server, interface)]
+        self.by_server_name = {}  # name, fullHostName, short name: [server_obj]
+        self.server_interfaces = {}  # server id: [interface_obj]
+        self.ids = set()  # server and interface ids, to know when to reload
+
+    def load(self, conn, max_workers=8):
+        """list all servers, then their interfaces, using BAM conn"""
+        server_list = conn.get_bam_api_list(
+            "getEntities", parentId=self.configuration_id, type="Server"
+        )
+        interface_lists = conn.map_ordered(
+            lambda server_obj: conn.get_bam_api_list(
+                "getEntities", parentId=server_obj["id"], type="NetworkServerInterface"
+            ),
+            server_list,
+            max_workers,
+        )
+        for server_obj, interface_list in zip(server_list, interface_lists):
+            if isinstance(interface_list, Exception):
+                raise interface_list
+            self.add(server_obj, interface_list)
+        logging.info(
+            "server index for configuration %s: %s servers, %s interfaces",
+            self.configuration_id,
+            len(self.server_interfaces),
+            len(self.interfaces),
+        )
+        return self
+
+    def add(self, server_obj, interface_list):
+        """index one server and its interfaces"""
+        self.ids.add(server_obj["id"])
+        self.server_interfaces[server_obj["id"]] = list(interface_list)
+        names = set([server_obj["name"].lower()])
+        full_host_name = (server_obj.get("properties") or {}).get("fullHostName")
+        if full_host_name:
+            names.add(full_host_name.lower())
+            names.add(full_host_name.lower().split(".")[0])
+        for name in names:
+            self.by_server_name.setdefault(name, []).append(server_obj)
+        for interface_obj in interface_list:
+            self.ids.add(interface_obj["id"])
+            self.interfaces.append((server_obj, interface_obj))
+            labels = interface_obj["name"].lower().split(".")
+            for end in range(1, len(labels) + 1):
+                self.by_interface_name.setdefault(".".join(labels[:end]), []).append(
+                    (server_obj, interface_obj)
+                )
+
+    def find_by_interface_name(self, name):
+        """return list of (server, interface) with interface name starting with
+        name, at a dot or other word boundary"""
+        found = self.by_interface_name.get(name.lower())
+        if found is not None:
+            return found
+        # like "dns1" in "dns1-mgmt", not at a dot, so not in the dictionary
+        name_pattern = re.compile(re.escape(name.lower()) + r"\b")
+        return [
+            (server_obj, interface_obj)
+            for server_obj, interface_obj in self.interfaces
+            if name_pattern.match(interface_obj["name"].lower())
+        ]
+
+    def find_by_server_name(self, name):
+        """return list of servers with name as display name or host name"""
+        return self.by_server_name.get(name.lower(), [])
+
+    def changed_by(self, command, params, data):
+        """True if a command that changes the BAM may have changed this index"""
+        if command == "addEntity" or (
+            "Server" in command and not command.startswith(self.deploy_prefixes)
+        ):
+            return True
+        if command in ("delete", "deleteWithOptions"):
+            changed_id = params.get("objectId")
+        elif command == "update":
+            if isinstance(data, basestring):
+                try:
+                    data = json.loads(data)
+                except ValueError:
+                    return True
+            changed_id = data.get("id") if isinstance(data, dict) else None
+        else:
+            return False
+        try:
+            return int(changed_id) in self.ids
+        except (TypeError, ValueError):
+            return True
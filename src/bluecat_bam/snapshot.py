@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) configuration snapshot in SQLite
+
+Copies the blocks, networks, DHCP ranges, IP addresses, MAC addresses, views,
+and zones of one Configuration into a local SQLite file, so reports can run
+against the copy without loading the BAM, like:
+import bluecat_bam
+from bluecat_bam.snapshot import Snapshot
+
+with bluecat_bam.BAM(server, username, password) as conn:
+    configuration_obj = conn.do(
+        "getEntityByName", parentId=0, name=configuration_name, type="Configuration"
+    )
+    with Snapshot("config.sqlite") as snap:
+        snap.export(conn, configuration_obj)
+        snap.refresh(conn, [network_id])  # later, to update only one subtree
+
+Then, with only the file, like:
+sqlite3 config.sqlite "select state, count(*) from entities
+    where type = 'IP4Address' group by state"
+
+The entities table has one row per entity, with its parent_id, and the
+properties as json.  IPv4 addresses and the first and last address of blocks,
+networks, and ranges are also kept as integers, so containment is a range
+query on indexed columns.
+"""
+
+import re
+import time
+import json
+import logging
+import sqlite3
+import ipaddress
+
+SCHEMA = """
+create table if not exists entities (
+    id integer primary key,
+    parent_id integer,
+    type text,
+    name text,
+    cidr text,
+    start_int integer,
+    end_int integer,
+    address_int integer,
+    mac text,
+    state text,
+    absolute_name text,
+    properties text
+);
+create index if not exists entities_parent on entities (parent_id);
+create index if not exists entities_type on entities (type);
+create index if not exists entities_cidr on entities (cidr);
+create index if not exists entities_range on entities (start_int, end_int);
+create index if not exists entities_address on entities (address_int);
+create index if not exists entities_mac on entities (mac);
+create index if not exists entities_name on entities (name);
+create index if not exists entities_absolute_name on entities (absolute_name);
+create table if not exists meta (
+    key text primary key,
+    value text
+);
+"""
+
+# parent type: child types to list under it
+CHILD_TYPES = {
+    "Configuration": ("IP4Block", "View", "MACAddress"),
+    "IP4Block": ("IP4Block", "IP4Network", "DHCP4Range"),
+    "IP4Network": ("IP4Address", "DHCP4Range"),
+    "View": ("Zone",),
+    "Zone": ("Zone",),
+}
+
+
+def walk_entities(conn, root_obj, max_workers=8):
+    """yield (parent id, entity) for everything under root_obj that is in the
+    snapshot, listing all the parents of one level of the tree at once"""
+    for _, parent_id, entity in conn.walk_tree(root_obj, CHILD_TYPES, max_workers):
+        yield parent_id, entity
+
+
+def normalize_mac(mac):
+    """MAC address in the BAM format, like 00-11-22-AA-BB-CC, or None"""
+    if not mac:
+        return None
+    digits = "".join(c for c in mac if c.isalnum()).upper()
+    return "-".join(re.findall("..", digits))
+
+
+def ip_int(address):
+    """integer for an IPv4 address, or None"""
+    try:
+        return int(ipaddress.IPv4Address(address))
+    except (TypeError, ValueError):
+        return None
+
+
+def entity_row(parent_id, entity):
+    """tuple of column values for the entities table"""
+    properties = dict(entity.get("properties") or {})
+    cidr = properties.get("CIDR")
+    start_int = end_int = address_int = None
+    if cidr:
+        try:
+            network = ipaddress.IPv4Network(cidr)
+            start_int = int(network.network_address)
+            end_int = int(network.broadcast_address)
+        except ValueError:
+            pass
+    elif "start" in properties:
+        start_int = ip_int(properties["start"])
+        end_int = ip_int(properties.get("end"))
+    if entity["type"] == "IP4Address":
+        address_int = ip_int(properties.get("address"))
+    mac = properties.get("macAddress")
+    if entity["type"] == "MACAddress":
+        mac = properties.get("address")
+    return (
+        entity["id"],
+        parent_id,
+        entity["type"],
+        entity["name"],
+        cidr,
+        start_int,
+        end_int,
+        address_int,
+        normalize_mac(mac),
+        properties.get("state"),
+        properties.get("absoluteName"),
+        json.dumps(properties),
+    )
+
+
+class Snapshot:
+    """SQLite copy of a Configuration"""
+
+    insert = "insert or replace into entities values (%s)" % (",".join("?" * 12))
+    batch_size = 1000
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """close the file"""
+        self.connection.close()
+
+    def save(self, rows):
+        """insert or replace (parent id, entity) pairs, return count"""
+        count = 0
+        batch = []
+        for parent_id, entity in rows:
+            batch.append(entity_row(parent_id, entity))
+            if len(batch) >= self.batch_size:
+                self.connection.executemany(self.insert, batch)
+                count += len(batch)
+                batch = []
+        self.connection.executemany(self.insert, batch)
+        return count + len(batch)
+
+    def export(self, conn, configuration_obj, max_workers=8):
+        """replace the snapshot with the current contents of a configuration"""
+        start = time.time()
+        with self.connection:
+            self.connection.execute("delete from entities")
+            count = self.save([(0, configuration_obj)])
+            count += self.save(walk_entities(conn, configuration_obj, max_workers))
+            self.set_meta("configuration_id", configuration_obj["id"])
+            self.set_meta("exported", time.time())
+        logging.info(
+            "snapshot of %s entities in %.1f seconds", count, time.time() - start
+        )
+        return count
+
+    def refresh(self, conn, entity_ids, max_workers=8):
+        """replace the subtrees under each of entity_ids with what is in the BAM
+        now, the rest of the snapshot is not changed"""
+        count = 0
+        with self.connection:
+            for entity_id in entity_ids:
+                row = self.connection.execute(
+                    "select parent_id from entities where id = ?", (entity_id,)
+                ).fetchone()
+                entity = conn.do("getEntityById", id=entity_id)
+                self.delete_subtree(entity_id)
+                if not entity or not entity.get("id"):
+                    continue  # deleted from the BAM
+                if row:
+                    parent_id = row[0]
+                else:
+                    parent_id = conn.do("getParent", entityId=entity_id)["id"]
+                count += self.save([(parent_id, entity)])
+                count += self.save(walk_entities(conn, entity, max_workers))
+            self.set_meta("refreshed", time.time())
+        logging.info("refreshed %s entities", count)
+        return count
+
+    def delete_subtree(self, entity_id):
+        """remove an entity and everything under it"""
+        self.connection.execute(
+            """
+            with recursive subtree(id) as (
+                select ?
+                union all
+                select entities.id from entities, subtree
+                where entities.parent_id = subtree.id
+            )
+            delete from entities where id in (select id from subtree)
+            """,
+            (entity_id,),
+        )
+
+    def set_meta(self, key, value):
+        """save a value in the meta table"""
+        self.connection.execute(
+            "insert or replace into meta values (?, ?)", (key, json.dumps(value))
+        )
+
+    def get_meta(self, key):
+        """value from the meta table, or None"""
+        row = self.connection.execute(
+            "select value from meta where key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, sql, params=()):
+        """run a select, return list of rows"""
+        return self.connection.execute(sql, params).fetchall()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) login token cache
+
+Saves login tokens in a file that only the owner can read, so that
+separate runs of the CLI can reuse one login, like:
+export BLUECAT_TOKEN_CACHE=~/.bluecat_bam_tokens
+bam getEntityById id=3
+bam getEntityById id=4
+
+Tokens are keyed by server url and username, and expire after "ttl" seconds.
+The BAM also expires tokens, so BAM will login again if a cached token is refused.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+
+import os
+import sys
+import stat
+import time
+import json
+import logging
+
+
+class TokenCache:
+    """login tokens saved in a file readable only by the owner"""
+
+    def __init__(self, filename, ttl=900):
+        """filename for the cache, ttl in seconds"""
+        self.filename = os.path.expanduser(filename)
+        self.ttl = ttl
+
+    @staticmethod
+    def key(mainurl, username):
+        """cache key for a server and username"""
+        return mainurl + " " + username
+
+    def read(self):
+        """read all cached tokens, ignoring the file if others can read it"""
+        try:
+            file_stat = os.stat(self.filename)
+        except OSError:
+            return {}
+        if file_stat.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            print(
+                "Warning - ignoring token cache %s, permissions should be 0600"
+                % (self.filename),
+                file=sys.stderr,
+            )
+            return {}
+        try:
+            with open(self.filename) as f:
+                tokens = json.load(f)
+        except ValueError:
+            logging.info("token cache %s is not valid json", self.filename)
+            return {}
+        now = time.time()
+        return {k: v for k, v in tokens.items() if v.get("expires", 0) > now}
+
+    def write(self, tokens):
+        """replace the cache file, created with mode 0600"""
+        tmpname = "%s.%s.tmp" % (self.filename, os.getpid())
+        fd = os.open(tmpname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(tokens, f)
+        os.rename(tmpname, self.filename)
+
+    def get(self, mainurl, username):
+        """return cached token, or None if missing or expired"""
+        entry = self.read().get(self.key(mainurl, username))
+        if entry:
+            logging.info("using cached token for %s", username)
+            return entry["token"]
+        return None
+
+    def put(self, mainurl, username, token):
+        """save token"""
+        tokens = self.read()
+        tokens[self.key(mainurl, username)] = {
+            "token": token,
+            "expires": time.time() + self.ttl,
+        }
+        self.write(tokens)
+
+    def remove(self, mainurl, username):
+        """forget token, after logout"""
+        tokens = self.read()
+        if tokens.pop(self.key(mainurl, username), None):
+            self.write(tokens)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) zone cache
+
+Remembers which names are zones under each View or Zone, and which are not,
+so that BAM.get_zone() only asks the BAM about names it has not seen, like:
+import bluecat_bam
+with bluecat_bam.BAM(server, username, password) as conn:
+    conn.zones.preload(conn, view_id)  # optional, one list call per zone
+    zone_obj, remainder = conn.get_zone("host.sub.domain.example", view_id)
+
+Entries are keyed by parent id and lower case name, so together they form a
+tree of zones for each view.  After preload(), a name that is not in the
+tree is known not to be a zone without asking.
+Threads looking up the same name at once share one BAM call.
+Adding zones, or deleting or renaming a cached zone, through the same BAM
+clears the cache.
+"""
+
+import json
+import logging
+import threading
+
+from bluecat_bam.compat import basestring
+
+
+class ZoneCache:
+    """thread-safe (parent id, name): zone entity, or None for not a zone"""
+
+    # writes that can create zones
+    add_commands = ("addZone", "addEntity")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.zones = {}  # (parent id, lower case name): zone entity or None
+        self.zone_ids = set()  # ids of cached zones
+        self.complete = set()  # parent ids with all child zones loaded
+        self.pending = {}  # (parent id, lower case name): Event, lookups in flight
+        self.fetches = 0  # getEntityByName calls made
+
+    def lookup(self, conn, parent_id, name):
+        """return the zone called name directly under parent_id, or None,
+        asking BAM conn only if not already known, or waiting for another
+        thread that is already asking"""
+        key = (parent_id, name.lower())
+        with self.lock:
+            if key in self.zones:
+                return self.zones[key]
+            if parent_id in self.complete:
+                return None
+            in_flight = self.pending.get(key)
+            if in_flight is None:
+                in_flight = self.pending[key] = threading.Event()
+                asking = True
+            else:
+                asking = False
+        if not asking:
+            in_flight.wait()
+            with self.lock:
+                if key in self.zones:
+                    return self.zones[key]
+            # the other lookup failed, or the cache was cleared
+            return self.lookup(conn, parent_id, name)
+        try:
+            zone_obj = conn.do(
+                "getEntityByName",
+                method="get",
+                parentId=parent_id,
+                name=name,
+                type="Zone",
+            )
+            if not zone_obj or not zone_obj.get("id"):
+                zone_obj = None
+            with self.lock:
+                self.fetches += 1
+                self.zones[key] = zone_obj
+                if zone_obj is not None:
+                    self.zone_ids.add(zone_obj["id"])
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+            in_flight.set()
+        return zone_obj
+
+    def add_children(self, parent_id, zone_list):
+        """save all the child zones of parent_id"""
+        with self.lock:
+            for zone_obj in zone_list:
+                self.zones[(parent_id, zone_obj["name"].lower())] = zone_obj
+                self.zone_ids.add(zone_obj["id"])
+            self.complete.add(parent_id)
+
+    def preload(self, conn, view_id, max_workers=8):
+        """load every zone in a view, listing each level of the tree at once,
+        so later lookups in this view need no BAM calls"""
+        parent_ids = [view_id]
+        while parent_ids:
+            next_ids = []
+            for parent_id, zone_list in zip(
+                parent_ids,
+                conn.map_ordered(self.list_zones(conn), parent_ids, max_workers),
+            ):
+                if isinstance(zone_list, Exception):
+                    raise zone_list
+                self.add_children(parent_id, zone_list)
+                next_ids.extend(zone_obj["id"] for zone_obj in zone_list)
+            parent_ids = next_ids
+        logging.info("zone cache loaded view %s, %s zones", view_id, len(self.zones))
+
+    @staticmethod
+    def list_zones(conn):
+        """function to list the child zones of a parent id"""
+        return lambda parent_id: conn.get_bam_api_list(
+            "getEntities", parentId=parent_id, type="Zone"
+        )
+
+    def clear(self):
+        """forget everything"""
+        with self.lock:
+            self.zones.clear()
+            self.zone_ids.clear()
+            self.complete.clear()
+
+    def after_write(self, command, params, data):
+        """clear if a command that changes the BAM may have changed zones"""
+        if command in self.add_commands:
+            self.clear()
+            return
+        if command in ("delete", "deleteWithOptions"):
+            changed_id = params.get("objectId")
+        elif command == "update":
+            if isinstance(data, basestring):
+                try:
+                    data = json.loads(data)
+                except ValueError:
+                    data = None
+            changed_id = data.get("id") if isinstance(data, dict) else None
+        else:
+            return
+        try:
+            changed_id = int(changed_id)
+        except (TypeError, ValueError):
+            changed_id = None
+        if changed_id is None or changed_id in self.zone_ids:
+            logging.info("zone cache cleared after %s", command)
+            self.clear()
@@ -0,0 +1,201 @@
+"""shared test fixtures, a fake BAM REST API behind requests_mock"""
+
+import re
+import json
+import threading
+
+try:
+    from urllib.parse import urlsplit, parse_qsl
+except ImportError:
+    from urlparse import urlsplit, parse_qsl  # pylint: disable=import-error
+
+import pytest
+import requests_mock
+
+import bluecat_bam
+
+SERVER = "http://bam.example"
+URL = SERVER + "/Services/REST/v1/"
+
+
+class Reply:  # pylint: disable=R0903
+    """handler result with an HTTP status other than 200"""
+
+    def __init__(self, status, obj=None):
+        self.status = status
+        self.obj = obj
+
+
+class BAMServer:  # pylint: disable=R0902
+    """answers BAM REST API calls from a tree of entities, like a BAM would,
+    records each call as (command, params), with params as strings,
+    other commands are answered by handlers added with handle()"""
+
+    def __init__(self, mocker):
+        self.lock = threading.Lock()
+        self.calls = []  # (command, params)
+        self.entities = {}  # id: entity, properties as a dict
+        self.parents = {}  # id: parent id
+        self.handlers = {}  # command: function(params, body) returning the reply
+        self.tokens = set()  # tokens that are logged in
+        self.logins = 0
+        mocker.register_uri(
+            requests_mock.ANY, re.compile(re.escape(URL)), content=self.reply
+        )
+
+    def connect(self, **kwargs):
+        """logged-in BAM for this server"""
+        return bluecat_bam.BAM(SERVER, "user", "password", **kwargs)
+
+    def handle(self, command, func):
+        """answer command with func(params, body)"""
+        self.handlers[command] = func
+
+    def add(self, parent_id, entity):
+        """add an entity dict under parent_id"""
+        self.entities[entity["id"]] = entity
+        self.parents[entity["id"]] = parent_id
+
+    def add_tree(self, tree):
+        """add {parent id: [child entity, ...]}"""
+        for parent_id, children in tree.items():
+            for child in children:
+                self.add(parent_id, child)
+
+    def commands(self):
+        """list of the commands called, in order, without login"""
+        return [command for command, _ in self.calls if command != "login"]
+
+    def children(self, parent_id, entity_type=None):
+        """child entities of parent_id, of entity_type if given"""
+        return [
+            entity
+            for entity_id, entity in sorted(self.entities.items())
+            if self.parents[entity_id] == parent_id
+            and (entity_type is None or entity["type"] == entity_type)
+        ]
+
+    def reply(self, request, context):
+        """requests_mock callback"""
+        parts = urlsplit(request.url)
+        command = parts.path.rsplit("/", 1)[1]
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        body = json.loads(request.body) if request.body else None
+        with self.lock:
+            self.calls.append((command, params))
+        if command == "login":
+            obj = self.do_login(params, body)
+        elif request.headers.get("Authorization") not in self.tokens:
+            obj = Reply(401, "Unauthorized")
+        else:
+            handler = self.handlers.get(command) or getattr(self, "do_" + command, None)
+            if handler is None:
+                obj = Reply(500, "unknown command %s" % (command))
+            else:
+                try:
+                    obj = handler(params, body)
+                except (KeyError, TypeError, ValueError) as error:
+                    obj = Reply(500, "%s: %s" % (type(error).__name__, error))
+        if isinstance(obj, Reply):
+            context.status_code = obj.status
+            obj = obj.obj
+        content = b"" if obj is None else json.dumps(self.to_bam(obj)).encode()
+        context.headers["Content-Length"] = str(len(content))
+        return content
+
+    def to_bam(self, obj):
+        """entities with properties as name=value| strings, like the BAM"""
+        if isinstance(obj, list):
+            return [self.to_bam(item) for item in obj]
+        if isinstance(obj, dict) and isinstance(obj.get("properties"), dict):
+            obj = dict(obj)
+            properties = obj["properties"]
+            obj["properties"] = (
+                bluecat_bam.BAM.convert_dict_to_str(properties) if properties else None
+            )
+        return obj
+
+    @staticmethod
+    def from_bam(entity):
+        """entity with properties as a dict"""
+        entity = dict(entity)
+        properties = entity.get("properties") or ""
+        if not isinstance(properties, dict):
+            entity["properties"] = dict(
+                pair.split("=", 1) for pair in properties.split("|") if pair
+            )
+        return entity
+
+    @staticmethod
+    def page(entity_list, params):
+        """one page of a list, like the BAM"""
+        start = int(params.get("start", 0))
+        stop = start + int(params.get("count", 10))
+        return entity_list[start:stop]
+
+    def do_login(self, params, body):  # pylint: disable=unused-argument
+        """new token for each login"""
+        with self.lock:
+            self.logins += 1
+            token = "BAMAuthToken: token%d" % (self.logins)
+            self.tokens.add(token)
+        return "Session Token-> %s <- for User : %s" % (token, params["username"])
+
+    def do_logout(self, params, body):  # pylint: disable=unused-argument
+        """nothing to do"""
+        return None
+
+    def do_getEntityById(self, params, body):  # pylint: disable=C0103,W0613
+        """entity, or id 0"""
+        return self.entities.get(int(params["id"]), {"id": 0})
+
+    def do_getParent(self, params, body):  # pylint: disable=C0103,W0613
+        """parent entity, or id 0 at the top"""
+        parent_id = self.parents.get(int(params["entityId"]), 0)
+        return self.entities.get(parent_id, {"id": 0})
+
+    def do_getEntities(self, params, body):  # pylint: disable=C0103,W0613
+        """children of one type"""
+        children = self.children(int(params["parentId"]), params["type"])
+        return self.page(children, params)
+
+    def do_getEntityByName(self, params, body):  # pylint: disable=C0103,W0613
+        """child with a name, not case sensitive, or id 0"""
+        for entity in self.children(int(params["parentId"]), params["type"]):
+            if entity["name"].lower() == params["name"].lower():
+                return entity
+        return {"id": 0}
+
+    def do_getEntitiesByNameUsingOptions(self, params, body):  # pylint: disable=C0103
+        """children with a name"""
+        return self.page(
+            [
+                entity
+                for entity in self.do_getEntities(
+                    dict(params, start=0, count=10**9), body
+                )
+                if entity["name"].lower() == params["name"].lower()
+            ],
+            params,
+        )
+
+    def do_update(self, params, body):  # pylint: disable=unused-argument
+        """replace an entity"""
+        self.entities[body["id"]] = self.from_bam(body)
+
+    def do_delete(self, params, body):  # pylint: disable=unused-argument
+        """remove an entity"""
+        self.entities.pop(int(params["objectId"]), None)
+
+
+@pytest.fixture(name="bam_server")
+def fixture_bam_server():
+    """fake BAM REST API, for BAM objects made with bam_server.connect()"""
+    with requests_mock.Mocker(case_sensitive=True) as mocker:
+        yield BAMServer(mocker)
+
+
+@pytest.fixture(name="bam")
+def fixture_bam(bam_server):
+    """BAM logged in to bam_server"""
+    return bam_server.connect()
@@ -1,10 +1,33 @@
 """test_api_main"""  # pylint requires docstring
+import json
+
 import pytest
 
-from bluecat_bam.cli import main
+from bluecat_bam.cli import main, print_batch
 
 
 def test_main_no_args():
     """test"""
     with pytest.raises(SystemExit):
         main()
+
+
+def test_print_batch(bam_server, capsys):
+    """one json result line per batch line, in order, errors inline"""
+    for entity_id in (1, 2):
+        bam_server.add(
+            0, {"id": entity_id, "name": "e%d" % (entity_id), "type": "User"}
+        )
+    lines = [
+        '{"command": "getEntityById", "id": 1}\n',
+        "\n",
+        "not json\n",
+        '{"command": "getEntityById", "id": 2}\n',
+    ]
+    failed = print_batch(bam_server.connect(), lines, 2)
+    out = capsys.readouterr().out.splitlines()
+    assert failed == 1
+    assert len(out) == 3
+    assert json.loads(out[0]) == {"id": 1, "name": "e1", "type": "User"}
+    assert "error" in json.loads(out[1])
+    assert json.loads(out[2]) == {"id": 2, "name": "e2", "type": "User"}
@@ -0,0 +1,100 @@
+"""test_api_convert"""  # pylint requires docstring
+
+import copy
+import json
+import pickle
+
+import bluecat_bam
+
+BAM = bluecat_bam.BAM
+
+
+def test_lazy_properties_dict():
+    """behaves like the dict it replaces"""
+    props = BAM.convert_str_to_dict("address=10.0.0.1|state=STATIC|a=b=c|")
+    assert isinstance(props, dict)
+    assert props.pending
+    assert props["state"] == "STATIC"
+    assert not props.pending
+    assert props == {"address": "10.0.0.1", "state": "STATIC", "a": "b=c"}
+    assert sorted(props) == ["a", "address", "state"]
+    assert props.get("missing") is None
+    assert "address" in props
+    assert len(props) == 3
+
+
+def test_lazy_properties_json():
+    """json output before and after splitting"""
+    conn = BAM.__new__(BAM)  # no server needed
+    entity = conn.convert_dict_entries(
+        {"id": 5, "name": "x", "properties": "address=10.0.0.1|state=STATIC|"}
+    )
+    expected = {"address": "10.0.0.1", "state": "STATIC"}
+    assert json.loads(json.dumps(entity))["properties"] == expected
+    assert json.loads(json.dumps(entity))["properties"] == expected
+    assert BAM.convert_str_to_dict("x=1|") == BAM.convert_str_to_dict("x=1|")
+
+
+def test_lazy_properties_back_to_str():
+    """unchanged properties go back as the original string"""
+    text = "address=10.0.0.1|state=STATIC|"
+    props = BAM.convert_str_to_dict(text)
+    assert BAM.convert_dict_to_str(props) == text
+    props["state"] = "DHCP_RESERVED"
+    assert props.text is None
+    assert BAM.convert_dict_to_str(props) == "address=10.0.0.1|state=DHCP_RESERVED|"
+
+
+def test_lazy_properties_copy():
+    """copies stay unsplit, and changes to a copy do not leak back"""
+    props = BAM.convert_str_to_dict("state=STATIC|")
+    other = copy.deepcopy(props)
+    assert other.pending
+    other["state"] = "RESERVED"
+    assert props["state"] == "STATIC"
+    assert pickle.loads(pickle.dumps(props)) == {"state": "STATIC"}
+
+
+def test_compact_entity():
+    """Entity reads like the entity dict, with shared strings"""
+    conn = BAM.__new__(BAM)  # no server needed
+    obj = [
+        {"id": i, "name": None, "type": "IP4Address", "properties": text}
+        for i, text in enumerate(
+            ["address=10.0.0.1|state=STATIC|", "address=10.0.0.2|state=STATIC|"]
+        )
+    ]
+    first, second = conn.convert_response(obj, compact=True)
+    assert isinstance(first, bluecat_bam.Entity)
+    assert first["properties"]["state"] == "STATIC"
+    assert first["properties"]["state"] is second["properties"]["state"]
+    assert first.get("name") is None
+    assert first.get("missing", 1) == 1
+    assert first == {
+        "id": 0,
+        "name": None,
+        "type": "IP4Address",
+        "properties": {"address": "10.0.0.1", "state": "STATIC"},
+    }
+    assert json.loads(json.dumps(second.to_dict()))["id"] == 1
+    assert conn.convert_response({"id": 0, "type": None}, compact=True)["id"] == 0
+
+
+def test_compact_get_obj(bam_server):
+    """compact entities go through get_obj, get_obj_list, and getParent"""
+    network = {
+        "id": 5,
+        "name": "net",
+        "type": "IP4Network",
+        "properties": {"CIDR": "10.0.0.0/24"},
+    }
+    bam_server.add(1, {"id": 1, "name": "config", "type": "Configuration"})
+    bam_server.add(1, network)
+    bam_server.handle("getIPRangedByIP", lambda params, body: network)
+    conn = bam_server.connect(compact=True)
+    obj, obj_type = conn.get_obj("10.0.0.0/24", 1, "")
+    assert isinstance(obj, bluecat_bam.Entity)
+    assert obj["id"] == 5 and obj_type == "IP4Network"
+    assert conn.get_obj_list("10.0.0.0/24", 1, "") == [obj]
+    assert conn.do("getParent", entityId=5)["id"] == 1
+    assert conn.hierarchy.parents[5] == 1
@@ -1,4 +1,5 @@
 """test_api_dhcp_ranges"""  # pylint requires docstring
+
 import ipaddress
 
 # import pytest
@@ -76,3 +77,64 @@ def test_make_dhcp_ranges_list():
     ]
 
     assert dhcp_ranges_list == expected
+
+
+def test_dhcp_range_lookup_any_order():
+    """in_range and find_range in any order, inclusive of start and end"""
+    network_obj = {"id": 1, "properties": {"CIDR": "10.0.0.0/24"}}
+    range_list = [
+        {"id": 3, "properties": {"start": "10.0.0.200", "end": "10.0.0.210"}},
+        {"id": 2, "properties": {"start": "10.0.0.10", "end": "10.0.0.20"}},
+    ]
+    dhcp_ranges_list = bluecat_bam.DhcpRangeList(range_list, network_obj)
+    checks = [
+        ("10.0.0.205", 3),
+        ("10.0.0.10", 2),
+        ("10.0.0.211", None),
+        ("10.0.0.20", 2),
+        ("10.0.0.9", None),
+        ("10.0.0.200", 3),
+    ]
+    for ip, range_id in checks:
+        found = dhcp_ranges_list.find_range(ipaddress.ip_address(ip))
+        assert (found and found["id"]) == range_id
+        assert dhcp_ranges_list.in_range(ip) == bool(range_id)
+
+
+def test_dhcp_range_lookup_ipv6():
+    """IP6Network uses the prefix property"""
+    network_obj = {"id": 1, "properties": {"prefix": "2001:db8::/64"}}
+    range_list = [
+        {"id": 2, "properties": {"start": "2001:db8::100", "end": "2001:db8::1ff"}}
+    ]
+    dhcp_ranges_list = bluecat_bam.DhcpRangeList(range_list, network_obj)
+    assert dhcp_ranges_list.in_range("2001:db8::1a0")
+    assert not dhcp_ranges_list.in_range("2001:db8::200")
+
+
+def test_contains_many(monkeypatch):
+    """same answers with and without numpy"""
+    network_obj = {"id": 1, "properties": {"CIDR": "10.0.0.0/24"}}
+    range_list = [
+        {"id": 3, "properties": {"start": "10.0.0.200", "end": "10.0.0.210"}},
+        {"id": 2, "properties": {"start": "10.0.0.10", "end": "10.0.0.20"}},
+    ]
+    dhcp_ranges_list = bluecat_bam.DhcpRangeList(range_list, network_obj)
+    addresses = [int(ipaddress.ip_address("10.0.0.%d" % (i))) for i in range(256)]
+    mask, indexes = dhcp_ranges_list.contains_many(addresses)
+    assert sum(mask) == 22
+    assert indexes[15] == 0 and indexes[205] == 1 and indexes[100] == -1
+    first = int(ipaddress.ip_address("10.0.0.0"))
+    range_mask, range_indexes = dhcp_ranges_list.contains_many(
+        range(first, first + 256)
+    )
+    assert list(range_mask) == list(mask)
+    assert list(range_indexes) == list(indexes)
+    strings = ["10.0.0.%d" % (i) for i in range(256)]
+    assert list(dhcp_ranges_list.contains_many(strings)[0]) == list(mask)
+    empty = bluecat_bam.DhcpRangeList([], network_obj)
+    assert not any(empty.contains_many(addresses)[0])
+    monkeypatch.setattr(bluecat_bam.api, "numpy", None)
+    plain_mask, plain_indexes = dhcp_ranges_list.contains_many(addresses)
+    assert list(plain_mask) == list(mask)
+    assert list(plain_indexes) == list(indexes)
@@ -0,0 +1,12 @@
+"""test_api_do_many"""  # pylint requires docstring
+import requests
+
+
+def test_do_many_order_and_errors(bam_server, bam):
+    """results come back in input order, failures are returned not raised"""
+    for entity_id in (3, 5, 8):
+        bam_server.add(0, {"id": entity_id, "name": "e", "type": "Entity"})
+    calls = [("getEntityById", {"id": i}) for i in (5, 3, "x", 8)]
+    results = bam.do_many(calls, max_workers=3)
+    assert [r["id"] for r in results if isinstance(r, dict)] == [5, 3, 8]
+    assert isinstance(results[2], requests.HTTPError)
@@ -0,0 +1,54 @@
+"""test_api_fqdns"""  # pylint requires docstring
+
+import collections
+
+# view 1 has zone example (2), with sub-zone big (3)
+TREE = {
+    0: [{"id": 1, "name": "view", "type": "View"}],
+    1: [{"id": 2, "name": "example", "type": "Zone"}],
+    2: [{"id": 3, "name": "big", "type": "Zone"}]
+    + [
+        {"id": 2000 + i, "name": name, "type": "HostRecord"}
+        for i, name in enumerate(["www", "mail", "a.b"])
+    ],
+    3: [{"id": 3000 + i, "name": "h%d" % (i), "type": "HostRecord"} for i in range(30)],
+}
+
+
+def test_resolve_fqdns(bam_server):
+    """small zones are looked up by name, big zones listed once"""
+    bam_server.add_tree(TREE)
+    conn = bam_server.connect()
+    names = ["h%d.big.example" % (i) for i in range(25)]
+    names += ["WWW.example", "a.b.example", "missing.example", "x.invalid"]
+    results = conn.resolve_fqdns(names + ["h1.big.example"], 1)
+    assert isinstance(results, collections.OrderedDict)
+    assert list(results) == names
+    assert all(len(results[name]) == 1 for name in names[:25])
+    assert results["h3.big.example"][0]["name"] == "h3"
+    assert results["WWW.example"][0]["name"] == "www"
+    assert results["a.b.example"][0]["name"] == "a.b"
+    assert results["missing.example"] == []
+    assert results["x.invalid"] == []
+    commands = bam_server.commands()
+    assert commands.count("getEntities") == 1
+    assert commands.count("getEntitiesByNameUsingOptions") == 3
+
+
+def test_resolve_fqdns_zone(bam_server):
+    """record_type Zone returns the zones"""
+    bam_server.add_tree(TREE)
+    results = bam_server.connect().resolve_fqdns(["big.example"], 1, record_type="Zone")
+    assert results["big.example"][0]["id"] == 3
+
+
+def test_resolve_fqdns_big_zone(bam_server):
+    """a zone with many more records than names is looked up by name"""
+    bam_server.add_tree(TREE)
+    conn = bam_server.connect()
+    names = ["h%d.big.example" % (i) for i in range(25)]
+    results = conn.resolve_fqdns(names, 1, list_ratio=1)
+    assert all(len(results[name]) == 1 for name in names)
+    commands = bam_server.commands()
+    assert commands.count("getEntities") == 1  # stopped after one page
+    assert commands.count("getEntitiesByNameUsingOptions") == 25
@@ -0,0 +1,115 @@
+"""test_api_lists"""  # pylint requires docstring
+
+
+def add_addresses(bam_server, size):
+    """add size IP4Address entities under network 1, ids from 100"""
+    for i in range(size):
+        bam_server.add(
+            1,
+            {
+                "id": 100 + i,
+                "name": None,
+                "type": "IP4Address",
+                "properties": {"address": "10.0.%d.%d" % (i // 256, i % 256)},
+            },
+        )
+    return list(range(100, 100 + size))
+
+
+def pages(bam_server, key):
+    """start or count of each getEntities call"""
+    return [
+        int(params[key])
+        for command, params in bam_server.calls
+        if command == "getEntities"
+    ]
+
+
+def test_iter_bam_api_list(bam_server):
+    """yields every entity in order, stops after the first short page"""
+    expected = add_addresses(bam_server, 25)
+    conn = bam_server.connect()
+    ids = [
+        e["id"]
+        for e in conn.iter_bam_api_list(
+            "getEntities", parentId=1, type="IP4Address", count=10
+        )
+    ]
+    assert ids == expected
+    assert pages(bam_server, "start") == [0, 10, 20]
+
+
+def test_iter_bam_api_list_exact_pages(bam_server):
+    """a full last page needs one more call to see the end"""
+    expected = add_addresses(bam_server, 20)
+    conn = bam_server.connect()
+    ids = [
+        e["id"]
+        for e in conn.iter_bam_api_list(
+            "getEntities", parentId=1, type="IP4Address", count=10
+        )
+    ]
+    assert ids == expected
+    assert pages(bam_server, "start") == [0, 10, 20]
+
+
+def test_get_bam_api_list_window(bam_server):
+    """several pages at once, same entities, no duplicates"""
+    expected = add_addresses(bam_server, 65)
+    conn = bam_server.connect()
+    entities = conn.get_bam_api_list(
+        "getEntities", parentId=1, type="IP4Address", window=4, count=10
+    )
+    assert [e["id"] for e in entities] == expected
+    assert set(range(0, 70, 10)) <= set(pages(bam_server, "start"))
+
+
+def test_get_bam_api_list_auto(bam_server):
+    """fast small pages grow, up to the largest size for the type"""
+    expected = add_addresses(bam_server, 5000)
+    conn = bam_server.connect()
+    entities = conn.get_bam_api_list(
+        "getEntities", parentId=1, type="IP4Address", count="auto"
+    )
+    assert [e["id"] for e in entities] == expected
+    assert pages(bam_server, "count") == [1000, 2000, 4000]
+
+
+def test_next_page_size(bam_server):
+    """slow or large pages shrink, by at most half"""
+    conn = bam_server.connect()
+    assert conn.next_page_size(1000, 8.0, 1000, 100, 5000) == 500
+    assert conn.next_page_size(1000, 1.0, 1000, 100, 5000) == 2000
+    assert conn.next_page_size(1000, 0.1, 16000000, 100, 5000) == 500
+    assert conn.next_page_size(4000, 0.1, 1000, 100, 5000) == 5000
+
+
+def test_walk_tree(bam_server):
+    """breadth first, with depth and parent id, all pages of long lists"""
+    bam_server.add_tree(
+        {
+            0: [{"id": 1, "name": "config", "type": "Configuration"}],
+            1: [{"id": 2, "type": "IP4Block"}, {"id": 3, "type": "IP4Block"}],
+            2: [{"id": 4, "type": "IP4Block"}, {"id": 5, "type": "IP4Network"}],
+            3: [{"id": 100 + i, "type": "IP4Network"} for i in range(1500)],
+            4: [{"id": 6, "type": "IP4Network"}],
+        }
+    )
+    conn = bam_server.connect()
+    found = [
+        (depth, parent_id, entity["id"])
+        for depth, parent_id, entity in conn.walk_tree(1, max_workers=4)
+    ]
+    assert found[:4] == [(1, 1, 2), (1, 1, 3), (2, 2, 4), (2, 2, 5)]
+    assert [entity_id for _, _, entity_id in found[4:-1]] == [
+        100 + i for i in range(1500)
+    ]
+    assert found[-1] == (3, 4, 6)
+    listed = [
+        (params["parentId"], params["type"], params["start"])
+        for command, params in bam_server.calls
+        if command == "getEntities"
+    ]
+    assert ("3", "IP4Network", "1000") in listed
+    # networks are not listed as parents
+    assert not [call for call in listed if call[0] in ("5", "6")]
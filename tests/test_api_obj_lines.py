@@ -0,0 +1,126 @@
+"""test_api_obj_lines"""  # pylint requires docstring
+
+import time
+
+
+def slow_entity(params, body):  # pylint: disable=unused-argument
+    """numbered entity, up to 100, slower for low numbers"""
+    number = int(params["id"])
+    time.sleep(0.01 / number)  # finish out of order
+    if number > 100:
+        return {"id": 0}
+    return {"id": number, "name": params["id"], "type": "User"}
+
+
+def looked_up(bam_server):
+    """ids asked for with getEntityById"""
+    return [
+        params["id"]
+        for command, params in bam_server.calls
+        if command == "getEntityById"
+    ]
+
+
+def test_get_obj_lines_order_and_dedup(bam_server, capsys):
+    """each line looked up once, results in line order"""
+    bam_server.handle("getEntityById", slow_entity)
+    conn = bam_server.connect()
+    lines = ["1\n", "2\n", "\n", "3\n", "1\n", "500\n", "4\n", "2\n"]
+    obj_list = conn.get_obj_lines(lines, 5, "")
+    assert [obj["id"] for obj in obj_list] == [1, 2, 3, 1, 4, 2]
+    assert sorted(looked_up(bam_server)) == ["1", "2", "3", "4", "500"]
+    assert "not found 500" in capsys.readouterr().out
+
+
+def test_iter_obj_lines_streams(bam_server):
+    """results are yielded before all lines are looked up"""
+    bam_server.handle("getEntityById", slow_entity)
+    conn = bam_server.connect()
+    lines = iter(["%d" % (number) for number in range(1, 60)])
+    results = conn.iter_obj_lines(lines, 5, "", max_workers=2)
+    line, obj = next(results)
+    assert line == "1" and obj["id"] == 1
+    assert len(looked_up(bam_server)) <= 5
+
+
+def ip_entity(entity_id, address):
+    """IP4Address entity dict"""
+    return {
+        "id": entity_id,
+        "name": None,
+        "type": "IP4Address",
+        "properties": {"address": address, "state": "STATIC"},
+    }
+
+
+def add_networks(bam_server):
+    """configuration 1, block 2, networks 3 and 4, with 30 IP's in 3
+    and one in 4"""
+    bam_server.add_tree(
+        {
+            0: [{"id": 1, "name": "config", "type": "Configuration"}],
+            1: [
+                {
+                    "id": 2,
+                    "name": "block",
+                    "type": "IP4Block",
+                    "properties": {"CIDR": "10.0.0.0/16"},
+                }
+            ],
+            2: [
+                {
+                    "id": network_id,
+                    "name": "net",
+                    "type": "IP4Network",
+                    "properties": {"CIDR": "10.0.%d.0/24" % (network_id)},
+                }
+                for network_id in (3, 4)
+            ],
+            3: [ip_entity(100 + i, "10.0.3.%d" % (i)) for i in range(1, 31)],
+            4: [ip_entity(200, "10.0.4.5")],
+        }
+    )
+
+    def get_ip(params, body):  # pylint: disable=unused-argument
+        for entity in bam_server.entities.values():
+            if (entity.get("properties") or {}).get("address") == params["address"]:
+                return entity
+        return {"id": 0}
+
+    bam_server.handle("getIP4Address", get_ip)
+
+
+def test_get_obj_lines_grouped(bam_server):
+    """CIDRs come from the range index, IP's of a busy network from one list"""
+    add_networks(bam_server)
+    conn = bam_server.connect()
+    ips = ["10.0.3.%d" % (i) for i in range(1, 31)]
+    lines = ["10.0.3.0/24", "10.0.4.0/24", "10.0.9.0/24", "10.0.4.5", "3"] + ips
+    results = dict(conn.iter_obj_lines(lines + ["10.0.3.7"], 1, "", use_index=True))
+    assert results["10.0.3.0/24"]["id"] == 3
+    assert results["10.0.4.0/24"]["id"] == 4
+    assert results["10.0.9.0/24"] is None
+    assert results["10.0.4.5"]["id"] == 200
+    assert results["3"]["id"] == 3
+    assert [results[ip]["id"] for ip in ips] == list(range(101, 131))
+    commands = bam_server.commands()
+    assert "getIPRangedByIP" not in commands
+    assert "getEntityByCIDR" not in commands
+    assert commands.count("getIP4Address") == 1  # 10.0.4.5, one IP in its network
+    ip_lists = [
+        params["parentId"]
+        for command, params in bam_server.calls
+        if command == "getEntities" and params["type"] == "IP4Address"
+    ]
+    assert ip_lists == ["3"]
+
+
+def test_get_obj_lines_no_index(bam_server):
+    """the range index is not loaded unless asked for"""
+    add_networks(bam_server)
+    conn = bam_server.connect()
+    results = dict(conn.iter_obj_lines(["10.0.4.5", "10.0.3.1"], 1, ""))
+    assert results["10.0.4.5"]["id"] == 200
+    assert results["10.0.3.1"]["id"] == 101
+    assert "getEntities" not in bam_server.commands()
+    assert not conn.range_indexes
@@ -0,0 +1,40 @@
+"""test_api_pool"""  # pylint requires docstring
+
+import pytest
+
+import bluecat_bam
+
+from .conftest import SERVER
+
+
+def test_pool_shares_one_login(bam_server):
+    """all sessions use the token of the first login"""
+    pool = bluecat_bam.BAMPool(SERVER, "user", "password", size=3, pool_maxsize=2)
+    assert bam_server.logins == 1
+    assert {conn.token for conn in pool.sessions} == {pool.token}
+    assert pool.sessions[0].pool_maxsize == 2
+
+
+def test_pool_relogin_once(bam_server):
+    """when the shared token expires, only one session logs in again"""
+    pool = bluecat_bam.BAMPool(SERVER, "user", "password", size=3)
+    bam_server.tokens.clear()  # expired on the BAM
+    first, second = pool.checkout(), pool.checkout()
+    first.do("getEntityById", id=1)
+    second.do("getEntityById", id=1)  # same stale token, no second login
+    assert bam_server.logins == 2
+    assert second.token == pool.token == "BAMAuthToken: token2"
+    pool.checkin(first)
+    pool.checkin(second)
+    # idle session picks up the new token at checkout
+    with pool.session() as conn:
+        assert conn.token == "BAMAuthToken: token2"
+    pool.close()
+    assert bam_server.commands()[-1] == "logout"
+
+
+def test_pool_size_zero(bam_server):
+    """a pool needs at least one session"""
+    with pytest.raises(ValueError):
+        bluecat_bam.BAMPool(SERVER, "user", "password", size=0)
+    assert bam_server.logins == 0
@@ -0,0 +1,54 @@
+"""test_async_api"""  # pylint requires docstring
+
+import asyncio
+import threading
+import time
+
+import bluecat_bam
+
+from .conftest import SERVER
+
+
+def test_async_do_concurrency_limit(bam_server):
+    """login on enter, results in order, no more than 'concurrency' calls at once,
+    logout on exit"""
+    for entity_id in range(1, 13):
+        bam_server.add(0, {"id": entity_id, "name": "e", "type": "Entity"})
+    lock = threading.Lock()
+    active = [0, 0]  # now, most at once
+
+    def counted(do):
+        """BAM.do that counts calls in flight, outside requests_mock's send lock"""
+
+        def wrapper(*args, **kwargs):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.02)
+            try:
+                return do(*args, **kwargs)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        return wrapper
+
+    async def run():
+        async with bluecat_bam.AsyncBAM(
+            SERVER, "user", "password", concurrency=4
+        ) as conn:
+            conn.conn.do = counted(conn.conn.do)
+            return await asyncio.gather(
+                *[conn.do("getEntityById", id=i) for i in range(1, 13)]
+            )
+
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert [r["id"] for r in results] == list(range(1, 13))
+    assert 1 < active[1] <= 4
+    commands = [command for command, _ in bam_server.calls]
+    assert commands[0] == "login" and commands[-1] == "logout"
+    assert commands.count("login") == 1
@@ -0,0 +1,175 @@
+"""test_bulk"""  # pylint requires docstring
+
+import io
+import json
+import time
+import threading
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+import bluecat_bam
+
+from .conftest import Reply
+
+
+def slow_delete(failures):
+    """delete handler, fails the first tries of some objectId's with
+    failures, {objectId: [Reply or exception, ...]}"""
+
+    def delete(params, body):  # pylint: disable=unused-argument
+        object_id = int(params["objectId"])
+        time.sleep(0.001)
+        errors = failures.get(object_id)
+        if errors:
+            error = errors.pop(0)
+            if isinstance(error, Exception):
+                raise error
+            return error
+        return None
+
+    return delete
+
+
+def test_results_in_order_and_logged(bam_server):
+    """each operation has a result, in the order given, one json line each"""
+    bam_server.handle("delete", slow_delete({}))
+    log = io.StringIO()
+    writer = bluecat_bam.BulkWriter(bam_server.connect(), max_workers=4, log=log)
+    results = list(writer.run(("delete", {"objectId": i}) for i in range(20)))
+    assert [result["params"]["objectId"] for result in results] == list(range(20))
+    assert all(result["ok"] for result in results)
+    lines = [json.loads(line) for line in log.getvalue().splitlines()]
+    assert [line["index"] for line in lines] == list(range(20))
+    assert lines[3]["keys"] == [["id", "3"]]
+    assert writer.counts["ok"] == 20
+
+
+def test_retries(bam_server):
+    """transient failures are retried, others are not"""
+    bam_server.handle(
+        "delete",
+        slow_delete(
+            {
+                1: [Reply(503), requests.ConnectionError("reset")],
+                2: [Reply(500, "error")],
+                3: [Reply(429)] * 5,
+            }
+        ),
+    )
+    writer = bluecat_bam.BulkWriter(bam_server.connect(), retries=3, backoff=0)
+    results = writer.run(("delete", {"objectId": i}) for i in range(1, 5))
+    by_id = {result["params"]["objectId"]: result for result in results}
+    assert by_id[1]["ok"] and by_id[1]["attempts"] == 3
+    assert not by_id[2]["ok"] and by_id[2]["attempts"] == 1
+    assert by_id[2]["status"] == 500
+    assert not by_id[3]["ok"] and by_id[3]["attempts"] == 4
+    assert by_id[4]["ok"] and by_id[4]["attempts"] == 1
+    assert writer.counts == {"ok": 2, "failed": 2, "retried": 2}
+
+
+def test_create_retries(bam_server):
+    """adds and assigns are retried only if the request was not sent"""
+    refused = requests.ConnectionError(
+        MaxRetryError(None, "/", NewConnectionError(None, "refused"))
+    )
+    failures = {
+        "10.0.0.1": [requests.ReadTimeout("read")],
+        "10.0.0.2": [requests.ConnectTimeout("connect")],
+        "10.0.0.3": [refused],
+        "10.0.0.4": [requests.ConnectionError("reset")],
+        "10.0.0.5": [Reply(504)],
+        "10.0.0.6": [Reply(503)],
+    }
+
+    def assign(params, body):  # pylint: disable=unused-argument
+        errors = failures.get(params["ip4Address"])
+        if errors:
+            error = errors.pop(0)
+            if isinstance(error, Exception):
+                raise error
+            return error
+        return 9
+
+    bam_server.handle("assignIP4Address", assign)
+    bam_server.handle("delete", slow_delete({1: [requests.ReadTimeout("read")]}))
+    writer = bluecat_bam.BulkWriter(bam_server.connect(), retries=3, backoff=0)
+    operations = [
+        ("assignIP4Address", {"ip4Address": "10.0.0.%d" % (i)}) for i in range(1, 7)
+    ]
+    results = list(writer.run(operations + [("delete", {"objectId": 1})]))
+    ok_list = [result["ok"] for result in results]
+    assert ok_list == [False, True, True, False, False, True, True]
+    assert [result["attempts"] for result in results] == [1, 2, 2, 1, 1, 2, 2]
+
+
+def test_id_and_address_keys_wait():
+    """an operation keyed only by id waits for those before it keyed only
+    by address, and the other way around, unless it has both keys"""
+    writer = bluecat_bam.BulkWriter(None)
+    scheduled = list(
+        writer.schedule(
+            [
+                ("assignIP4Address", {"ip4Address": "10.0.0.1"}),
+                ("delete", {"objectId": 5}),
+                ("delete", {"objectId": 6}),
+                ("assignIP4Address", {"ip4Address": "10.0.0.2"}),
+                ("delete", {"objectId": 7}, [("id", "7"), ("ip", "10.0.0.3")]),
+            ]
+        )
+    )
+    done = [item[5] for item in scheduled]
+    waits = [item[4] for item in scheduled]
+    assert waits[0] == []
+    assert waits[1] == [done[0]]
+    assert waits[2] == [done[0]]  # ids do not wait for each other
+    assert waits[3] == [done[1], done[2]]
+    assert waits[4] == [done[1], done[2], done[0], done[3]]
+    done[0].set()
+    done[1].set()
+    scheduled = list(writer.schedule([("delete", {"objectId": 8})]))
+    assert scheduled[0][4] == [done[3]]
+
+
+def test_same_key_in_order(bam_server):
+    """operations on the same IP or MAC run one after another"""
+    order = []
+    lock = threading.Lock()
+
+    def write(command, seconds):
+        """handler that records the order of each address"""
+
+        def handler(params, body):  # pylint: disable=unused-argument
+            time.sleep(seconds)
+            with lock:
+                order.append((command, params["ip4Address"]))
+
+        return handler
+
+    bam_server.handle("assignIP4Address", write("assignIP4Address", 0.002))
+    bam_server.handle("changeStateIP4Address", write("changeStateIP4Address", 0))
+    writer = bluecat_bam.BulkWriter(bam_server.connect(), max_workers=8)
+    operations = []
+    for i in range(10):
+        address = "10.0.0.%d" % i
+        operations.append(("assignIP4Address", {"ip4Address": address}))
+        operations.append(("changeStateIP4Address", {"ip4Address": address}))
+    writer.write_all(operations)
+    for i in range(10):
+        address = "10.0.0.%d" % i
+        assert order.index(("assignIP4Address", address)) < order.index(
+            ("changeStateIP4Address", address)
+        )
+
+
+def test_keys():
+    """default keys from addresses, MAC's, names, and ids"""
+    writer = bluecat_bam.BulkWriter(None)
+    assert writer.keys(
+        "assignIP4Address",
+        {"ip4Address": "10.0.0.1", "macAddress": "00:11:22:aa:bb:cc"},
+    ) == [("ip", "10.0.0.1"), ("mac", "001122AABBCC")]
+    assert writer.keys(
+        "addHostRecord", {"absoluteName": "Host.Example.", "addresses": "1.2.3.4,"}
+    ) == [("ip", "1.2.3.4"), ("name", "host.example")]
+    assert writer.keys("update", {"data": '{"id": 7, "name": "x"}'}) == [("id", "7")]
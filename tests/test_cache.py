@@ -0,0 +1,54 @@
+"""test_cache"""  # pylint requires docstring
+
+import bluecat_bam
+
+
+def admin(bam_server):
+    """add a User entity, id 3"""
+    bam_server.add(0, {"id": 3, "name": "admin", "type": "User", "properties": {}})
+
+
+def test_cache_hit_and_copy(bam_server):
+    """second lookup is not sent, and changing a result does not change the cache"""
+    admin(bam_server)
+    conn = bam_server.connect(cache=True)
+    first = conn.do("getEntityById", id=3)
+    first["name"] = "changed"
+    assert conn.do("getEntityById", id=3)["name"] == "admin"
+    assert bam_server.commands() == ["getEntityById"]
+    assert conn.cache.stats()["hits"] == 1
+
+
+def test_cache_not_found_not_kept(bam_server):
+    """id 0 results are asked again"""
+    conn = bam_server.connect(cache=True)
+    conn.do("getEntityById", id=4)
+    bam_server.add(0, {"id": 4, "name": "new", "type": "User", "properties": {}})
+    assert conn.do("getEntityById", id=4)["name"] == "new"
+
+
+def test_cache_update_invalidates(bam_server):
+    """update removes the entity it changed"""
+    admin(bam_server)
+    conn = bam_server.connect(cache=True)
+    conn.do("getEntityById", id=3)
+    conn.do("update", body={"id": 3, "name": "root", "type": "User"})
+    assert conn.do("getEntityById", id=3)["name"] == "root"
+    assert bam_server.commands() == ["getEntityById", "update", "getEntityById"]
+
+
+def test_cache_lru_and_ttl():
+    """least recently used entry is dropped, ttl 0 is not cached"""
+    cache = bluecat_bam.EntityCache(maxsize=2, ttls={"getParent": 0})
+    for entity_id in (1, 2):
+        cache.put("getEntityById", {"id": entity_id}, {"id": entity_id})
+    assert cache.get("getEntityById", {"id": 1})[0]
+    cache.put("getEntityById", {"id": 5}, {"id": 5})
+    assert not cache.get("getEntityById", {"id": 2})[0]
+    assert cache.get("getEntityById", {"id": 1})[0]
+    assert cache.stats()["evictions"] == 1
+    assert not cache.cacheable("getParent")
+    # entries that mention an id as a parameter go too
+    cache.put("getEntityByName", {"parentId": 7, "name": "x"}, {"id": 1})
+    cache.after_write("delete", {"objectId": 7}, None)
+    assert cache.stats()["size"] == 1
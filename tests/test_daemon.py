@@ -0,0 +1,111 @@
+"""test_daemon"""  # pylint requires docstring
+
+import socket
+import socketserver
+import threading
+
+import pytest
+
+from bluecat_bam import cli, daemon
+
+
+def add_users(bam_server):
+    """add User entities 3 and 4"""
+    for entity_id in (3, 4):
+        bam_server.add(
+            0, {"id": entity_id, "name": "u%d" % (entity_id), "type": "User"}
+        )
+
+
+def stale_socket(socket_path):
+    """leave a socket file with no daemon listening, like after kill -9"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(socket_path)
+    sock.close()
+
+
+def start_server(bam_server, socket_path):
+    """daemon server on socket_path in a thread, return server and thread"""
+    server = socketserver.ThreadingUnixStreamServer(socket_path, daemon.CommandHandler)
+    server.conn = bam_server.connect()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    return server, thread
+
+
+def stop_server(server, thread):
+    """stop a server from start_server"""
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_do_request(bam_server):
+    """replies hold a result or an error"""
+    add_users(bam_server)
+    conn = bam_server.connect()
+    reply = daemon.do_request(conn, '{"command": "getEntityById", "id": "3"}')
+    assert reply == {"result": {"id": 3, "name": "u3", "type": "User"}}
+    assert "error" in daemon.do_request(conn, '{"command": "getFail"}')
+    assert "error" in daemon.do_request(conn, "not json")
+
+
+def test_call(bam_server, tmp_path):
+    """client sends a command over the socket and reads the reply"""
+    add_users(bam_server)
+    socket_path = str(tmp_path / "bam.sock")
+    server, thread = start_server(bam_server, socket_path)
+    try:
+        reply = daemon.call(socket_path, "getEntityById", {"id": "4"})
+    finally:
+        stop_server(server, thread)
+    assert reply == {"result": {"id": 4, "name": "u4", "type": "User"}}
+
+
+def test_call_daemon_stale_socket(tmp_path):
+    """a socket with no daemon falls back to calling the BAM directly"""
+    socket_path = str(tmp_path / "bam.sock")
+    stale_socket(socket_path)
+    assert cli.call_daemon(socket_path, "getEntityById", {"id": "4"}) is None
+
+
+def test_call_daemon_no_reply(tmp_path):
+    """a daemon that dies before it replies falls back to the BAM"""
+    socket_path = str(tmp_path / "bam.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+
+    def hang_up():
+        sock, _ = listener.accept()
+        sock.recv(1024)
+        sock.close()
+
+    thread = threading.Thread(target=hang_up)
+    thread.start()
+    try:
+        assert cli.call_daemon(socket_path, "getEntityById", {"id": "4"}) is None
+    finally:
+        thread.join()
+        listener.close()
+
+
+def test_serve_refuses_running_daemon(bam_server, tmp_path):
+    """a second daemon exits instead of taking over the socket"""
+    socket_path = str(tmp_path / "bam.sock")
+    server, thread = start_server(bam_server, socket_path)
+    try:
+        assert daemon.answers(socket_path)
+        with pytest.raises(SystemExit):
+            daemon.serve(bam_server.connect(), socket_path)
+        reply = daemon.call(socket_path, "getEntityById", {"id": "4"})
+    finally:
+        stop_server(server, thread)
+    assert reply == {"result": {"id": 0}}
+
+
+def test_answers_stale_socket(tmp_path):
+    """a socket with no daemon does not answer"""
+    socket_path = str(tmp_path / "bam.sock")
+    stale_socket(socket_path)
+    assert not daemon.answers(socket_path)
@@ -0,0 +1,101 @@
+"""test_hierarchy"""  # pylint requires docstring
+
+from bluecat_bam.hierarchy import HierarchyIndex
+
+# id: (parent id, type)
+TREE = {
+    1: (0, "Configuration"),
+    2: (1, "View"),
+    3: (2, "Zone"),
+    4: (3, "Zone"),
+    10: (4, "HostRecord"),
+    11: (4, "HostRecord"),
+}
+
+
+def entity(entity_id):
+    """entity dict from TREE"""
+    return {
+        "id": entity_id,
+        "name": "e%d" % (entity_id),
+        "type": TREE[entity_id][1],
+        "properties": {},
+    }
+
+
+def add_tree(bam_server):
+    """add TREE to the server"""
+    for entity_id, (parent_id, _) in TREE.items():
+        bam_server.add(parent_id, entity(entity_id))
+
+
+def fetched(bam_server):
+    """entity ids of the getParent calls made"""
+    return [
+        int(params["entityId"])
+        for command, params in bam_server.calls
+        if command == "getParent"
+    ]
+
+
+def test_find_ancestor_fetches_missing_links_once(bam_server):
+    """second record under the same zone needs one getParent, then none"""
+    add_tree(bam_server)
+    conn = bam_server.connect()
+    index = HierarchyIndex()
+    assert index.find_ancestor(conn, 10, "View")["id"] == 2
+    assert fetched(bam_server) == [10, 4, 3]
+    assert index.find_ancestor(conn, 11, "View")["id"] == 2
+    assert fetched(bam_server) == [10, 4, 3, 11]
+    assert index.find_ancestor(conn, 10, "View")["id"] == 2
+    assert index.find_ancestor(conn, 10, "TagGroup") is None
+    assert fetched(bam_server) == [10, 4, 3, 11, 2, 1]
+    assert index.fetches == 6
+
+
+def test_children_from_listing(bam_server):
+    """links to containers from getEntities replies are used without getParent,
+    links to records and IP's are not kept"""
+    add_tree(bam_server)
+    conn = bam_server.connect()
+    index = HierarchyIndex()
+    index.observe("getParent", {"entityId": 4}, entity(3))
+    index.observe(
+        "getEntities", {"parentId": "4", "type": "HostRecord"}, [entity(10), entity(11)]
+    )
+    index.observe("getEntities", {"parentId": "1", "type": "View"}, [entity(2)])
+    index.observe("getEntities", {"parentId": "2", "type": "Zone"}, [entity(3)])
+    assert 11 not in index.parents
+    assert index.parents[3] == 2
+    # the zone entity itself was not listed, so it is fetched once
+    assert index.get_parent(conn, 11)["id"] == 4
+    assert fetched(bam_server) == [11]
+    assert next(index.ancestors(conn, 4))["id"] == 3
+    assert next(index.ancestors(conn, 3))["id"] == 2
+    assert fetched(bam_server) == [11]
+
+
+def test_copies_and_lru():
+    """callers get copies, and the oldest links are dropped when full"""
+    index = HierarchyIndex(maxsize=2)
+    index.record(4, entity(3))
+    parent = index.get_parent(None, 4)
+    parent["name"] = "changed"
+    assert index.get_parent(None, 4)["name"] == "e3"
+    index.record(10, entity(4))
+    index.get_parent(None, 4)  # 4 is used, so 10 is the oldest
+    index.record(11, entity(4))
+    assert list(index.parents) == [4, 11]
+    assert index.evictions == 1
+
+
+def test_after_write():
+    """delete forgets the entity, adding a block could move anything"""
+    index = HierarchyIndex()
+    index.record_children(2, [entity(3), entity(4)])
+    index.after_write("delete", {"objectId": "3"}, None)
+    assert 3 not in index.parents and 4 in index.parents
+    index.after_write("assignIP4Address", {"configurationId": 1}, None)
+    assert 4 in index.parents
+    index.after_write("addIP4BlockByCIDR", {"parentId": 1}, None)
+    assert not index.parents
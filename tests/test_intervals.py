@@ -0,0 +1,86 @@
+"""test_intervals"""  # pylint requires docstring
+
+import random
+import ipaddress
+
+from bluecat_bam.intervals import IntervalSet, NetworkSpace
+
+
+def as_set(interval_set):
+    """python set of the integers in an IntervalSet"""
+    return set(value for start, end in interval_set for value in range(start, end + 1))
+
+
+def test_merge_and_contains():
+    """overlapping and adjacent runs are merged"""
+    intervals = IntervalSet([(10, 12), (1, 3), (4, 5), (11, 20), (30, 29)])
+    assert intervals.runs == [(1, 5), (10, 20)]
+    assert intervals.size() == 16
+    assert 5 in intervals
+    assert 6 not in intervals
+    assert 0 not in intervals
+    assert IntervalSet.from_values([3, 1, 2, 7]).runs == [(1, 3), (7, 7)]
+    assert not IntervalSet()
+
+
+def test_set_operations_match_python_sets():
+    """union, intersection, difference agree with set on random runs"""
+    rng = random.Random(7)
+    for _ in range(200):
+        runs = []
+        for _ in range(2):
+            starts = [rng.randint(0, 100) for _ in range(rng.randint(0, 6))]
+            runs.append(
+                IntervalSet((start, start + rng.randint(0, 9)) for start in starts)
+            )
+        first = runs[0]
+        second = runs[1]
+        assert as_set(first | second) == as_set(first) | as_set(second)
+        assert as_set(first & second) == as_set(first) & as_set(second)
+        assert as_set(first - second) == as_set(first) - as_set(second)
+        assert (first - second) == IntervalSet.from_values(
+            as_set(first) - as_set(second)
+        )
+
+
+def test_queries():
+    """largest, first_fit, nth"""
+    intervals = IntervalSet([(1, 3), (10, 19), (30, 39)])
+    assert intervals.largest() == (10, 19)
+    assert intervals.first_fit(3) == (1, 3)
+    assert intervals.first_fit(4) == (10, 13)
+    assert intervals.first_fit(11) is None
+    assert intervals.nth(4) == 10
+    assert intervals.nth(1, reverse=True) == 39
+    assert intervals.nth(11, reverse=True) == 19
+    assert intervals.nth(24) is None
+    assert IntervalSet().largest() is None
+
+
+def test_network_space():
+    """free, active, and reserved runs of a network"""
+    network_obj = {"id": 1, "type": "IP4Network", "properties": {"CIDR": "10.0.0.0/28"}}
+    range_list = [{"properties": {"start": "10.0.0.8", "end": "10.0.0.12"}}]
+    states = {
+        "10.0.0.1": "GATEWAY",
+        "10.0.0.2": "STATIC",
+        "10.0.0.5": "DHCP_FREE",
+        "10.0.0.8": "DHCP_ALLOCATED",
+        "10.0.0.9": "DHCP_RESERVED",
+    }
+    ip_list = [
+        {"properties": {"address": address, "state": state}}
+        for address, state in states.items()
+    ]
+    space = NetworkSpace(network_obj, range_list, ip_list)
+    base = int(ipaddress.IPv4Address("10.0.0.0"))
+    assert space.hosts.runs == [(base + 1, base + 14)]
+    assert space.ranges.runs == [(base + 8, base + 12)]
+    assert space.active.runs == [(base + 8, base + 9)]
+    assert space.reserved.runs == [(base + 1, base + 2)]
+    assert space.free.runs == [(base + 3, base + 7), (base + 10, base + 14)]
+    assert space.to_addresses(space.free.first_fit(5)) == (
+        ipaddress.IPv4Address("10.0.0.3"),
+        ipaddress.IPv4Address("10.0.0.7"),
+    )
+    assert (space.ranges - space.active).size() == 3
@@ -0,0 +1,82 @@
+"""test_network_table"""  # pylint requires docstring
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+# pylint: disable=wrong-import-position
+from bluecat_bam.network_table import NetworkTable  # noqa: E402
+
+
+def make_ip(ip_id, address, state, mac=None):
+    """IP4Address entity like get_ip_list returns"""
+    properties = {"address": address, "state": state}
+    if mac:
+        properties["macAddress"] = mac
+    return {"id": ip_id, "name": "", "type": "IP4Address", "properties": properties}
+
+
+def make_table():
+    """a /27 with a few addresses, out of order, including the network address"""
+    network = {"id": 1, "properties": {"CIDR": "10.0.0.0/27"}}
+    ip_list = [
+        make_ip(15, "10.0.0.15", "DHCP_ALLOCATED", "00-11-22-33-44-55"),
+        make_ip(2, "10.0.0.2", "STATIC", "aa:bb:cc:dd:ee:ff"),
+        make_ip(0, "10.0.0.0", "RESERVED"),
+        make_ip(10, "10.0.0.10", "DHCP_RESERVED", "00-11-22-33-44-66"),
+        make_ip(11, "10.0.0.11", "DHCP_ALLOCATED"),
+    ]
+    return NetworkTable(network, ip_list)
+
+
+def test_state_histogram():
+    """network address is not counted, free fills the 30 hosts"""
+    table = make_table()
+    assert len(table) == 5
+    assert list(table.addresses) == [
+        167772160,
+        167772162,
+        167772170,
+        167772171,
+        167772175,
+    ]
+    assert table.state_histogram() == {
+        "STATIC": 1,
+        "DHCP_RESERVED": 1,
+        "DHCP_ALLOCATED": 2,
+        "Free": 26,
+    }
+
+
+def test_split_by_ranges():
+    """counts inside and outside the DHCP ranges"""
+    table = make_table()
+    ranges = [
+        {"properties": {"start": "10.0.0.10", "end": "10.0.0.19"}},
+        {"properties": {"start": "10.0.0.30", "end": "10.0.0.31"}},
+    ]
+    count_in, count_out = table.split_by_ranges(ranges)
+    assert count_in == {"DHCP_RESERVED": 1, "DHCP_ALLOCATED": 2, "Free": 8}
+    assert count_out == {"STATIC": 1, "Free": 18}
+
+
+def test_free_addresses():
+    """host addresses with no entity"""
+    free = make_table().free_addresses()
+    assert len(free) == 26
+    assert free[0] == 167772161  # 10.0.0.1
+    assert 167772162 not in free
+    assert free[-1] == 167772190  # 10.0.0.30
+
+
+def test_macs():
+    """match MAC addresses in any format"""
+    table = make_table()
+    assert list(table.ids[table.mac_mask(["AA-BB-CC-DD-EE-FF"])]) == [2]
+    other = NetworkTable(
+        {"id": 2, "properties": {"CIDR": "10.0.1.0/24"}},
+        [make_ip(99, "10.0.1.5", "STATIC", "001122334466")],
+    )
+    mine, theirs = table.join_macs(other)
+    assert list(table.ids[mine]) == [10]
+    assert list(other.ids[theirs]) == [99]
@@ -0,0 +1,113 @@
+"""test_range_index"""  # pylint requires docstring
+
+
+def entity(entity_id, entity_type, **properties):
+    """entity dict"""
+    return {
+        "id": entity_id,
+        "name": "e%d" % (entity_id),
+        "type": entity_type,
+        "properties": properties,
+    }
+
+
+# parent id: children, configuration is 1
+TREE = {
+    1: [entity(2, "IP4Block", CIDR="10.0.0.0/8")],
+    2: [
+        entity(3, "IP4Block", CIDR="10.1.0.0/16"),
+        entity(4, "IP4Block", start="10.2.0.0", end="10.2.0.99"),
+    ],
+    3: [
+        entity(5, "IP4Block", CIDR="10.1.1.0/24"),
+        entity(6, "IP4Network", CIDR="10.1.2.0/24"),
+    ],
+    5: [entity(7, "IP4Network", CIDR="10.1.1.0/24")],
+    7: [entity(8, "DHCP4Range", start="10.1.1.100", end="10.1.1.199")],
+}
+
+
+def connect(bam_server):
+    """BAM for a server with TREE"""
+    bam_server.add_tree(TREE)
+    return bam_server.connect()
+
+
+def test_range_index_lookups(bam_server):
+    """longest prefix, ranges, start-end blocks, and same CIDR"""
+    conn = connect(bam_server)
+    index = conn.load_range_index(1)
+    assert index.get_range("10.1.1.150")["id"] == 8
+    assert index.get_range("10.1.1.50")["id"] == 7
+    assert index.get_range("10.1.1.50", "IP4Block")["id"] == 5
+    assert index.get_range("10.1.3.1")["id"] == 3
+    assert index.get_range("10.2.0.5")["id"] == 4
+    assert index.get_range("10.2.0.100")["id"] == 2
+    assert index.get_range("11.0.0.1") is None
+    assert index.get_range("10.1.2.5", "DHCP4Range") is None
+    assert index.get_cidr("10.1.1.0/24")["id"] == 7
+    assert index.get_cidr("10.1.1.0/24", "IP4Block")["id"] == 5
+    assert conn.hierarchy.parents[7] == 5
+
+
+def test_get_range_uses_index(bam_server):
+    """BAM.get_range answers from the index, with the same checks"""
+    conn = connect(bam_server)
+    conn.load_range_index(1)
+    calls = len(bam_server.calls)
+    assert conn.get_range("10.1.1.0", 1, "")["id"] == 7
+    assert conn.get_range("10.1.1.100", 1, None)["id"] == 8
+    assert conn.get_range("10.1.1.5", 1, "IP4Network") is None  # not the start
+    assert conn.get_range("11.0.0.0", 1, "") is None
+    assert len(bam_server.calls) == calls
+
+
+def test_reload_after_change(bam_server):
+    """adding a network or deleting an indexed object drops the index"""
+    conn = connect(bam_server)
+    index = conn.load_range_index(1)
+    assert index.changed_by("addIP4Network", {"blockId": 3}, None)
+    assert index.changed_by("delete", {"objectId": 8}, None)
+    assert not index.changed_by("delete", {"objectId": 99}, None)
+    assert not index.changed_by("update", {}, '{"id": 99, "name": "x"}')
+
+
+def test_changed_by_each_write(bam_server):
+    """every kind of write that can change blocks, networks, or ranges"""
+    index = connect(bam_server).load_range_index(1)
+    changed = [
+        ("addIP4BlockByCIDR", {"parentId": 1}, None),
+        ("resizeRange", {"objectId": 8}, None),
+        ("splitIP4Network", {"networkId": 7}, None),
+        ("delete", {"objectId": "8"}, None),
+        ("deleteWithOptions", {"objectId": 7}, None),
+        ("delete", {"objectId": "x"}, None),
+        ("update", {}, '{"id": 7, "name": "renamed"}'),
+        ("update", {}, "not json"),
+        ("addEntity", {"parentId": 3}, '{"type": "IP4Network", "name": "n"}'),
+        ("addEntity", {"parentId": 7}, {"type": "DHCP4Range", "name": "r"}),
+        ("addEntity", {"parentId": 3}, "not json"),
+        ("moveIPObject", {"objectId": 99, "address": "10.3.0.0"}, None),
+    ]
+    for command, params, data in changed:
+        assert index.changed_by(command, params, data), command
+    unchanged = [
+        ("delete", {"objectId": 99}, None),
+        ("update", {}, {"id": 99, "name": "x"}),
+        ("addEntity", {"parentId": 7}, '{"type": "IP4Address", "name": "a"}'),
+        ("assignIP4Address", {"configurationId": 1}, None),
+        ("changeStateIP4Address", {"addressId": 99}, None),
+    ]
+    for command, params, data in unchanged:
+        assert not index.changed_by(command, params, data), command
+
+
+def test_write_drops_index(bam_server):
+    """BAM.do drops the index after addEntity of a network"""
+    conn = connect(bam_server)
+    conn.load_range_index(1)
+    bam_server.handle("addEntity", lambda params, body: 9)
+    conn.do("addEntity", parentId=3, body={"type": "IP4Address", "name": "a"})
+    assert 1 in conn.range_indexes
+    conn.do("addEntity", parentId=3, body={"type": "IP4Network", "name": "n"})
+    assert 1 not in conn.range_indexes
@@ -0,0 +1,55 @@
+"""test_server_index"""  # pylint requires docstring
+
+SERVERS = {
+    10: {"id": 10, "name": "DNS One", "properties": {"fullHostName": "dns1.x.org"}},
+    20: {"id": 20, "name": "dns10", "properties": {"fullHostName": "dns10.x.org"}},
+    30: {"id": 30, "name": "dhcp", "properties": {"fullHostName": "dhcp.x.org"}},
+}
+INTERFACES = {
+    10: [{"id": 11, "name": "dns1.x.org"}],
+    20: [{"id": 21, "name": "dns10.x.org"}],
+    30: [{"id": 31, "name": "dhcp-a.x.org"}, {"id": 32, "name": "dhcp-b.x.org"}],
+}
+
+
+def connect(bam_server):
+    """BAM for a server with SERVERS and INTERFACES in configuration 5"""
+    for server_id, server_obj in SERVERS.items():
+        bam_server.add(5, dict(server_obj, type="Server"))
+        for interface_obj in INTERFACES[server_id]:
+            bam_server.add(
+                server_id, dict(interface_obj, type="NetworkServerInterface")
+            )
+    return bam_server.connect()
+
+
+def test_getserver(bam_server):
+    """all names are found from one load of the configuration"""
+    conn = connect(bam_server)
+    server_obj, interface_obj = conn.getserver("dns1", 5)
+    assert server_obj["id"] == 10 and interface_obj["id"] == 11
+    assert conn.getserver("DNS10.x.org", 5)[1]["id"] == 21
+    assert conn.getserver("dns one", 5)[1]["id"] == 11
+    assert conn.getinterface("dhcp-b", 5)["id"] == 32
+    assert bam_server.commands() == ["getEntities"] * 4
+
+
+def test_getserver_not_found(bam_server, capsys):
+    """ambiguous or unknown names are errors"""
+    conn = connect(bam_server)
+    assert conn.getserver("dhcp", 5) == (None, None)
+    assert "more than one interface" in capsys.readouterr().out
+    assert conn.getserver("dns", 5) == (None, None)
+    assert conn.getserver("dns1.x", 5)[0]["id"] == 10
+
+
+def test_reload_after_change(bam_server):
+    """deleting an indexed interface drops the index"""
+    conn = connect(bam_server)
+    index = conn.get_server_index(5)
+    assert index.changed_by("delete", {"objectId": "32"}, None)
+    assert not index.changed_by("delete", {"objectId": "99"}, None)
+    assert index.changed_by("addServer", {"configurationId": 5}, None)
+    assert not index.changed_by("deployServerConfig", {"serverId": 10}, None)
+    conn.do("delete", objectId=32)
+    assert 5 not in conn.server_indexes
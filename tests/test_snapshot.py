@@ -0,0 +1,79 @@
+"""test_snapshot"""  # pylint requires docstring
+
+from bluecat_bam.snapshot import Snapshot
+
+
+def entity(entity_id, entity_type, properties):
+    """entity dict"""
+    return {
+        "id": entity_id,
+        "name": "e%d" % (entity_id),
+        "type": entity_type,
+        "properties": properties,
+    }
+
+
+CONFIG = entity(1, "Configuration", {})
+# parent id: children
+TREE = {
+    1: [
+        entity(2, "IP4Block", {"CIDR": "10.0.0.0/8"}),
+        entity(5, "View", {}),
+        entity(8, "MACAddress", {"address": "aa:bb:cc:00:11:22"}),
+    ],
+    2: [entity(3, "IP4Network", {"CIDR": "10.1.0.0/24"})],
+    3: [
+        entity(4, "DHCP4Range", {"start": "10.1.0.100", "end": "10.1.0.200"}),
+        entity(
+            10,
+            "IP4Address",
+            {
+                "address": "10.1.0.10",
+                "state": "STATIC",
+                "macAddress": "AA-BB-CC-00-11-22",
+            },
+        ),
+        entity(11, "IP4Address", {"address": "10.1.0.150", "state": "DHCP_RESERVED"}),
+    ],
+    5: [entity(6, "Zone", {"absoluteName": "example"})],
+    6: [entity(7, "Zone", {"absoluteName": "sub.example"})],
+}
+
+
+def connect(bam_server):
+    """BAM for a server with CONFIG and TREE"""
+    bam_server.add(0, CONFIG)
+    bam_server.add_tree(TREE)
+    return bam_server.connect()
+
+
+def test_export_and_query(bam_server, tmp_path):
+    """everything is saved, with integer and mac columns for queries"""
+    conn = connect(bam_server)
+    with Snapshot(str(tmp_path / "snap.sqlite")) as snap:
+        assert snap.export(conn, CONFIG) == 10
+        assert snap.get_meta("configuration_id") == 1
+        # which network holds 10.1.0.150
+        rows = snap.query(
+            "select id from entities where type = 'IP4Network'"
+            " and start_int <= ? and end_int >= ?",
+            (167837846, 167837846),
+        )
+        assert rows == [(3,)]
+        rows = snap.query(
+            "select id from entities where mac = ? order by id", ("AA-BB-CC-00-11-22",)
+        )
+        assert rows == [(8,), (10,)]
+        rows = snap.query("select parent_id, absolute_name from entities where id = 7")
+        assert rows == [(6, "sub.example")]
+
+
+def test_refresh_subtree(bam_server, tmp_path):
+    """refresh replaces only the subtree"""
+    conn = connect(bam_server)
+    with Snapshot(str(tmp_path / "snap.sqlite")) as snap:
+        snap.export(conn, CONFIG)
+        bam_server.do_delete({"objectId": "11"}, None)
+        assert snap.refresh(conn, [3]) == 3
+        ids = [row[0] for row in snap.query("select id from entities order by id")]
+        assert ids == [1, 2, 3, 4, 5, 6, 7, 8, 10]
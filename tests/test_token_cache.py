@@ -0,0 +1,83 @@
+"""test_token_cache"""  # pylint requires docstring
+
+import os
+import stat
+
+import pytest
+import requests
+
+from bluecat_bam.token_cache import TokenCache
+
+from .conftest import URL as BAM_URL, Reply
+
+URL = "https://bam.example/Services/REST/v1/"
+
+
+def test_token_cache_put_get_remove(tmp_path):
+    """tokens are saved per server and user, in a 0600 file"""
+    filename = str(tmp_path / "tokens")
+    cache = TokenCache(filename)
+    assert cache.get(URL, "admin") is None
+    cache.put(URL, "admin", "BAMAuthToken: abc")
+    assert stat.S_IMODE(os.stat(filename).st_mode) == 0o600
+    assert TokenCache(filename).get(URL, "admin") == "BAMAuthToken: abc"
+    assert cache.get(URL, "other") is None
+    cache.remove(URL, "admin")
+    assert cache.get(URL, "admin") is None
+
+
+def test_token_cache_expired(tmp_path):
+    """expired tokens are not returned"""
+    cache = TokenCache(str(tmp_path / "tokens"), ttl=-1)
+    cache.put(URL, "admin", "BAMAuthToken: abc")
+    assert cache.get(URL, "admin") is None
+
+
+def test_token_cache_ignores_open_permissions(tmp_path):
+    """a cache file others can read is not trusted"""
+    filename = str(tmp_path / "tokens")
+    cache = TokenCache(filename)
+    cache.put(URL, "admin", "BAMAuthToken: abc")
+    os.chmod(filename, 0o644)
+    assert cache.get(URL, "admin") is None
+
+
+def test_bam_reuses_cached_token(bam_server, tmp_path):
+    """a cached token is used without a login, and kept on exit"""
+    filename = str(tmp_path / "tokens")
+    bam_server.tokens.add("BAMAuthToken: cached")
+    TokenCache(filename).put(BAM_URL, "user", "BAMAuthToken: cached")
+    with bam_server.connect(token_cache=filename) as conn:
+        assert conn.do("getEntityById", id=1) == {"id": 0}
+    assert bam_server.logins == 0
+    assert [command for command, _ in bam_server.calls] == ["getEntityById"]
+    assert TokenCache(filename).get(BAM_URL, "user") == "BAMAuthToken: cached"
+
+
+def test_bam_relogin_once_on_401(bam_server, tmp_path):
+    """a refused token logs in once, retries once, and replaces the cached token"""
+    filename = str(tmp_path / "tokens")
+    TokenCache(filename).put(BAM_URL, "user", "BAMAuthToken: stale")
+    conn = bam_server.connect(token_cache=filename)
+    assert conn.do("getEntityById", id=1) == {"id": 0}
+    assert [command for command, _ in bam_server.calls] == [
+        "getEntityById",
+        "login",
+        "getEntityById",
+    ]
+    assert TokenCache(filename).get(BAM_URL, "user") == "BAMAuthToken: token1"
+
+
+def test_bam_401_after_relogin_is_raised(bam_server, tmp_path):
+    """a retry that is refused again raises, without another login"""
+    filename = str(tmp_path / "tokens")
+    TokenCache(filename).put(BAM_URL, "user", "BAMAuthToken: stale")
+    conn = bam_server.connect(token_cache=filename)
+    bam_server.handle("getEntityById", lambda params, body: Reply(401, "Unauthorized"))
+    with pytest.raises(requests.HTTPError):
+        conn.do("getEntityById", id=1)
+    assert [command for command, _ in bam_server.calls] == [
+        "getEntityById",
+        "login",
+        "getEntityById",
+    ]
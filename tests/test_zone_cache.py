@@ -0,0 +1,103 @@
+"""test_zone_cache"""  # pylint requires docstring
+
+import threading
+import time
+
+from bluecat_bam.zone_cache import ZoneCache
+
+# (parent id, name): zone id, view is 1
+ZONES = {
+    (1, "example"): 2,
+    (2, "domain"): 3,
+    (3, "sub"): 4,
+    (1, "other.test"): 5,
+}
+
+
+def connect(bam_server):
+    """BAM for a server with ZONES"""
+    for (parent_id, name), zone_id in ZONES.items():
+        bam_server.add(parent_id, {"id": zone_id, "name": name, "type": "Zone"})
+    return bam_server.connect()
+
+
+def zone_calls(bam_server):
+    """(parent id, name) for each getEntityByName, ("list", parent id) for each
+    getEntities"""
+    return [
+        (
+            ("list", int(params["parentId"]))
+            if command == "getEntities"
+            else (int(params["parentId"]), params["name"])
+        )
+        for command, params in bam_server.calls
+        if command in ("getEntities", "getEntityByName")
+    ]
+
+
+def test_get_zone_cached(bam_server):
+    """second name in the same zones asks only about new labels"""
+    conn = connect(bam_server)
+    zone_obj, remainder = conn.get_zone("host.sub.domain.example", 1)
+    assert zone_obj["id"] == 4
+    assert remainder == "host"
+    calls = len(zone_calls(bam_server))
+    zone_obj, remainder = conn.get_zone("www.Domain.example", 1)
+    assert zone_obj["id"] == 3
+    assert remainder == "www"
+    assert zone_calls(bam_server)[calls:] == [(3, "www")]  # not a zone, now cached too
+    conn.get_zone("www.domain.example", 1)
+    assert len(zone_calls(bam_server)) == calls + 1
+
+
+def test_dotted_zone_and_no_zone(bam_server):
+    """zone names with dots, and names with no zone at all"""
+    conn = connect(bam_server)
+    assert conn.get_zone("a.other.test", 1)[0]["id"] == 5
+    assert conn.get_zone("nothing.invalid", 1) == (None, "nothing.invalid")
+    assert conn.get_fqdn("nothing.invalid", 1) == []
+
+
+def test_lookup_in_flight_shared(bam_server):
+    """threads asking about the same zone at once make one BAM call"""
+    conn = connect(bam_server)
+    zone_by_name = bam_server.do_getEntityByName
+
+    def slow_zone(params, body):
+        time.sleep(0.05)
+        return zone_by_name(params, body)
+
+    bam_server.handle("getEntityByName", slow_zone)
+    found = []
+    threads = [
+        threading.Thread(target=lambda: found.append(conn.get_zone("a.example", 1)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [zone_obj["id"] for zone_obj, _ in found] == [2] * 4
+    assert zone_calls(bam_server) == [(1, "example"), (2, "a")]
+    assert conn.zones.fetches == 2
+
+
+def test_preload(bam_server):
+    """after preload, lookups in the view need no calls"""
+    conn = connect(bam_server)
+    conn.zones.preload(conn, 1)
+    assert zone_calls(bam_server).count(("list", 1)) == 1
+    calls = len(zone_calls(bam_server))
+    assert conn.get_zone("host.sub.domain.example", 1)[0]["id"] == 4
+    assert conn.get_zone("x.y.invalid", 1)[0] is None
+    assert len(zone_calls(bam_server)) == calls
+
+
+def test_invalidate():
+    """adding a zone clears the cache, deleting a record does not"""
+    cache = ZoneCache()
+    cache.add_children(1, [{"id": 2, "name": "example", "type": "Zone"}])
+    cache.after_write("delete", {"objectId": 99}, None)
+    assert cache.zones
+    cache.after_write("update", {}, '{"id": 2, "name": "renamed"}')
+    assert not cache.zones and not cache.complete